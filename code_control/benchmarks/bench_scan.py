@@ -0,0 +1,164 @@
+"""Benchmark: update_map.py extraction on a synthetic scripts/ tree.
+
+Generates thousands of .js files with exports and @desc/@category
+annotations, then times the legacy per-line extractor (four regex searches
+per line plus an 8-line window re-scan per export), the single-pass
+extractor serially and in a process pool, and a fully cached rerun. Every
+mode must produce the same elements.
+
+Usage: python code_control/benchmarks/bench_scan.py [--files 3000] [--exports 12] [--filler 30] [--workers N]
+"""
+import argparse
+import contextlib
+import io
+import os
+import random
+import re
+import sys
+import tempfile
+import time
+
+CODE_CONTROL_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, CODE_CONTROL_DIR)
+
+import update_map  # noqa: E402
+
+SUBDIRS = ['ui', 'data', 'utils', 'features', 'logic']
+
+PATTERN_EXPORT_CONST = re.compile(r'export\s+const\s+(\w+)')
+PATTERN_EXPORT_FUNCTION = re.compile(r'export\s+function\s+(\w+)\s*\(([^)]*)\)')
+PATTERN_EXPORT_CLASS = re.compile(r'export\s+class\s+(\w+)')
+PATTERN_LOCAL_FUNCTION = re.compile(r'^function\s+(\w+)\s*\(([^)]*)\)')
+PATTERN_DESC = re.compile(r'//\s*@desc\s*(.*)')
+PATTERN_CATEGORY = re.compile(r'//\s*@category\s*(.*)')
+
+
+def legacy_extract(lines, rel_path):
+    """The per-line extractor scan_files used before the single-pass tokenizer (kept for comparison)."""
+    export_lines = {}
+    for idx, line in enumerate(lines):
+        m_const = PATTERN_EXPORT_CONST.search(line)
+        m_func = PATTERN_EXPORT_FUNCTION.search(line)
+        m_class = PATTERN_EXPORT_CLASS.search(line)
+        m_local_func = PATTERN_LOCAL_FUNCTION.search(line)
+        if m_const:
+            export_lines[idx] = (m_const.group(1), 'constant', 'N/A')
+        elif m_func:
+            export_lines[idx] = (m_func.group(1), 'function', f'({m_func.group(2)}) => void')
+        elif m_class:
+            export_lines[idx] = (m_class.group(1), 'class', 'class')
+        elif m_local_func:
+            export_lines[idx] = (m_local_func.group(1), 'function', f'({m_local_func.group(2)}) => void')
+
+    elements = []
+    for idx, (name, typ, sig) in export_lines.items():
+        desc = ""
+        manual_categories = []
+        for search_idx in range(max(0, idx-3), min(len(lines), idx+5)):
+            if search_idx != idx:
+                desc_match = PATTERN_DESC.search(lines[search_idx])
+                if desc_match:
+                    desc = desc_match.group(1).strip()
+                cat_match = PATTERN_CATEGORY.search(lines[search_idx])
+                if cat_match:
+                    manual_categories.extend(c.strip() for c in cat_match.group(1).split(','))
+        elements.append({
+            "name": name,
+            "file": rel_path,
+            "type": typ,
+            "signature": sig,
+            "description": desc,
+            "categories": list(dict.fromkeys(update_map.get_default_categories(rel_path) + manual_categories)),
+            "dependencies": [],
+            "sideEffects": False,
+        })
+    return elements
+
+
+def legacy_scan(scripts_dir):
+    project_root = os.path.dirname(scripts_dir)
+    found = []
+    for root, dirs, files in os.walk(scripts_dir):
+        dirs.sort()
+        for file in sorted(files):
+            if file.endswith('.js'):
+                full_path = os.path.join(root, file)
+                rel_path = os.path.relpath(full_path, project_root).replace('\\', '/')
+                with open(full_path, 'r', encoding='utf-8') as f:
+                    found.extend(legacy_extract(f.readlines(), rel_path))
+    return found
+
+
+def write_tree(scripts_dir, files, exports, filler, seed=7):
+    """Writes `files` modules of `exports` annotated exports, each followed by `filler` lines of code."""
+    rng = random.Random(seed)
+    for i in range(files):
+        subdir = os.path.join(scripts_dir, SUBDIRS[i % len(SUBDIRS)])
+        os.makedirs(subdir, exist_ok=True)
+        lines = [f"import {{ helper{i} }} from './shared{i % 50}.js';", ""]
+        for j in range(exports):
+            name = f"item{i}_{j}"
+            if rng.random() < 0.7:
+                lines.append(f"// @desc Synthetic element {j} of module {i}.")
+            if rng.random() < 0.3:
+                lines.append(f"// @category {rng.choice(['UI', 'LOGIC', 'DATA'])}, BENCH")
+            kind = j % 4
+            if kind == 0:
+                lines.append(f"export const {name} = {{ value: {j}, label: 'x' }};")
+            elif kind == 1:
+                lines += [f"export function {name}(a, b) {{", "    const total = a + b;", "    return total;", "}"]
+            elif kind == 2:
+                lines += [f"export class {name} {{", "    constructor() { this.ready = true; }", "}"]
+            else:
+                lines += [f"function {name}(state) {{", "    if (!state) return null;", "    return state;", "}"]
+            lines += ["", "// plain comment"]
+            lines += [f"    const local{k} = compute(state.items[{k}], options, (value) => value + {k});" for k in range(filler)]
+            lines.append("")
+        with open(os.path.join(subdir, f"module{i}.js"), 'w', encoding='utf-8') as f:
+            f.write("\n".join(lines) + "\n")
+
+
+def timed(label, func):
+    started = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):  # scan_files' progress lines
+        result = func()
+    elapsed = time.perf_counter() - started
+    print(f"{label:<28} {elapsed * 1000:>9.1f} ms  ({len(result)} elements)")
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--files", type=int, default=3000)
+    parser.add_argument("--exports", type=int, default=12)
+    parser.add_argument("--filler", type=int, default=30, help="Lines of plain code after each export")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        scripts_dir = os.path.join(tmp, 'scripts')
+        write_tree(scripts_dir, args.files, args.exports, args.filler)
+        print(f"Synthetic tree: {args.files} files x {args.exports} exports x {args.filler} filler lines, "
+              f"{args.workers} worker(s)\n")
+
+        cache = update_map.load_cache()
+        cache['files'] = {}
+        results = {}
+        for label, func in [
+            ("legacy (per line)", lambda: legacy_scan(scripts_dir)),
+            ("single pass, serial", lambda: update_map.scan_files(workers=1, scripts_dir=scripts_dir)),
+            ("single pass, process pool", lambda: update_map.scan_files(workers=args.workers, scripts_dir=scripts_dir)),
+            ("cold cache", lambda: update_map.scan_files(cache, workers=args.workers, scripts_dir=scripts_dir)),
+            ("warm cache (no changes)", lambda: update_map.scan_files(cache, workers=args.workers, scripts_dir=scripts_dir)),
+        ]:
+            results[label] = timed(label, func)
+
+    reference = results["legacy (per line)"]
+    mismatched = [label for label, elements in results.items() if elements != reference]
+    if mismatched:
+        sys.exit(f"\nOutput differs from the legacy extractor: {', '.join(mismatched)}")
+    print("\nAll modes produced identical elements.")
+
+
+if __name__ == "__main__":
+    main()
@@ -13,21 +13,58 @@ import os
 import re
 import json
 import sys
+import time
+import select
+import struct
+import argparse
+import bisect
+import hashlib
+import posixpath
+import shutil
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
 
 # Configuration
 CURRENT_DIR = os.path.dirname(os.path.abspath(__file__))
 PROJECT_ROOT = os.path.dirname(CURRENT_DIR) # Go up one level to chat-nov28
 SCRIPTS_DIR = os.path.join(PROJECT_ROOT, 'scripts')
 MAP_FILE = os.path.join(CURRENT_DIR, 'codebase-map.json')
-JS_MAP_FILE = os.path.join(SCRIPTS_DIR, 'utils', 'codebaseMap.js')
+JS_MAP_FILE = os.path.join(SCRIPTS_DIR, 'utils', 'codebaseMap.js') # --js-map full
+JS_MAP_DIR = os.path.join(SCRIPTS_DIR, 'utils', 'codebaseMap') # --js-map split: index.js + hashed chunks
+JS_MAP_HASH_LENGTH = 10
+CACHE_FILE = os.path.join(CURRENT_DIR, '.update_map_cache.json') # Per-file scan cache (gitignored)
+INDEX_FILE = os.path.join(CURRENT_DIR, 'codebase-index.json') # Import graph and reverse dependencies
+CACHE_VERSION = 3 # Bump whenever extraction changes so stale entries are rescanned
 
-# Regex patterns
-PATTERN_EXPORT_CONST = re.compile(r'export\s+const\s+(\w+)')
-PATTERN_EXPORT_FUNCTION = re.compile(r'export\s+function\s+(\w+)\s*\(([^)]*)\)')
-PATTERN_EXPORT_CLASS = re.compile(r'export\s+class\s+(\w+)')
-PATTERN_LOCAL_FUNCTION = re.compile(r'^function\s+(\w+)\s*\(([^)]*)\)')
-PATTERN_DESC = re.compile(r'//\s*@desc\s*(.*)')
-PATTERN_CATEGORY = re.compile(r'//\s*@category\s*(.*)')
+# Regex patterns, run over each file's whole text (see _tokens).
+# Each starts with a literal so `re` can skip ahead with a fast substring
+# search. [^\S\n] (whitespace but not newline) keeps each match on one line,
+# as when the file was scanned line by line. Each scan costs about as much as
+# the rest of the extraction, so `export` and `import` share one, anchored on
+# the "port" they have in common (match positions are 2 past the keyword).
+_WS = r'[^\S\n]'
+PATTERN_PORT = re.compile(rf"""port(?:(?<=export)(?:{_WS}+(?:
+      const{_WS}+(?P<const>\w+)
+    | function{_WS}+(?P<function>\w+){_WS}*\((?P<function_args>[^)\n]*)\)
+    | class{_WS}+(?P<class>\w+))
+    | \s+(?P<reexport>[{{*]))
+  | (?<=import)(?P<import>\b))""", re.X)
+PATTERN_LOCAL_FUNCTION = re.compile(rf"\nfunction{_WS}+(\w+){_WS}*\(([^)\n]*)\)") # Column 0 only
+PATTERN_NOTE = re.compile(rf"//{_WS}*@(desc|category){_WS}*(?=(.*))") # Text in a lookahead: notes may repeat on a line
+EXPORT_PRIORITY = {'const': 0, 'function_args': 1, 'class': 2} # Local functions: 3
+# Static imports and re-exports (bindings may span lines), matched at the positions _tokens found:
+#   import a, { b, c as d } from './x.js' / import * as ns from '...' / import '...'
+#   export { a, b } from '...' / export * from '...'
+_IMPORT_CLAUSE = r"""
+    (?:\{(?P<named>[^}]*)\}\s*|(?P<star>\*)\s*(?:as\s+(?P<namespace>[A-Za-z_$][\w$]*)\s*)?)"""
+_IMPORT_MODULE = r"""['"](?P<module>[^'"\n]+)['"]"""
+PATTERN_IMPORT = re.compile(r"""import\s+
+    (?:(?P<default>[A-Za-z_$][\w$]*)\s*,?\s*)?""" + _IMPORT_CLAUSE + "?" + r"""
+    (?:from\s*)?""" + _IMPORT_MODULE, re.X)
+PATTERN_REEXPORT = re.compile(r"export\s+" + _IMPORT_CLAUSE + r"from\s*" + _IMPORT_MODULE, re.X)
+PATTERN_MEMBER = re.compile(r'\s*\.\s*([A-Za-z_$][\w$]*)')
+PATTERN_WORD_CHAR = re.compile(r'[\w$]')
+PARALLEL_MIN_FILES = 200 # Below this, process start-up costs more than it saves
 
 def load_existing_map():
     if os.path.exists(MAP_FILE):
@@ -61,88 +98,277 @@ def get_default_categories(rel_path):
     if not categories:
         categories.append('Uncategorized')
         
-    return list(set(categories)) # Unique
+    return list(dict.fromkeys(categories)) # Unique, in a stable order
 
-def scan_files():
-    found_elements = []
-    print(f"Scanning scripts in {SCRIPTS_DIR}...")
+def _tokens(padded):
+    """Returns (tokens, statements) from one scan per pattern.
+
+    tokens: (position, priority, match) for every export and annotation, in
+    text order. statements: positions where an import or re-export statement
+    may start, for extract_imports.
+    """
+    tokens = []
+    statements = []
+    for m in PATTERN_PORT.finditer(padded):
+        if m.lastgroup in EXPORT_PRIORITY:
+            tokens.append((m.start() - 2, EXPORT_PRIORITY[m.lastgroup], m))
+        else: # import, or reexport
+            statements.append(m.start() - 2)
+    tokens += [(m.start() + 1, 3, m) for m in PATTERN_LOCAL_FUNCTION.finditer(padded)] # After the newline
+    tokens += [(m.start(), None, m) for m in PATTERN_NOTE.finditer(padded)]
+    tokens.sort(key=lambda token: token[0])
+    return tokens, statements
+
+def resolve_module(spec, rel_path):
+    """Project-relative path of a relative import; bare packages and URLs are kept as written."""
+    if spec.startswith('.'):
+        return posixpath.normpath(posixpath.join(posixpath.dirname(rel_path), spec))
+    return spec
+
+def extract_imports(padded, statements, rel_path):
+    """Returns (imports, bindings) for one file's static imports and re-exports.
+
+    `padded` is the file's text after a leading newline and `statements` the
+    candidate positions from _tokens. imports: [{"module", "kind", "names"}]
+    in text order, "names" holding the exported names taken ("*" for
+    namespace imports and `export *`, the local name for default imports).
+    bindings: local name -> (module, name), name None for a namespace, whose
+    members are resolved where they are used.
+    """
+    imports = []
+    bindings = {}
+    for position in statements:
+        line_start = padded.rfind('\n', 0, position) + 1
+        if padded[line_start:position].strip():
+            continue # Statements start their line; this is inside an expression or a comment
+        if padded.startswith('import', position):
+            m = PATTERN_IMPORT.match(padded, position)
+        else:
+            m = PATTERN_REEXPORT.match(padded, position)
+        if m is None:
+            continue
+        kind = padded[position:position + 6]
+        module = resolve_module(m.group('module'), rel_path)
+        names = []
+        if kind == 'import' and m.group('default'):
+            names.append(m.group('default'))
+            bindings[m.group('default')] = (module, m.group('default'))
+        if m.group('star'):
+            names.append('*')
+            if kind == 'import' and m.group('namespace'):
+                bindings[m.group('namespace')] = (module, None)
+        for item in (m.group('named') or '').split(','):
+            parts = item.split()
+            if not parts:
+                continue
+            names.append(parts[0])
+            if kind == 'import':
+                bindings[parts[-1]] = (module, parts[0]) # `a as b` binds b
+        imports.append({"module": module, "kind": kind, "names": names})
+    return imports, bindings
+
+def _references(padded, bindings, start=0):
+    """Returns (position, name) for every use of an imported binding from `start` on, `ns.member` giving the member.
+
+    One str.find loop per binding: compiling a per-file alternation costs
+    more than scanning the text a few times.
+    """
+    references = []
+    for local, (_, name) in bindings.items():
+        position = padded.find(local, start)
+        while position != -1:
+            end = position + len(local)
+            before = padded[position - 1]
+            if not (before.isalnum() or before in '_$.') and not PATTERN_WORD_CHAR.match(padded, end):
+                if name is not None:
+                    references.append((position, name))
+                else:
+                    member = PATTERN_MEMBER.match(padded, end)
+                    if member:
+                        references.append((position, member.group(1)))
+            position = padded.find(local, end)
+    return references
+
+def extract_elements(padded, tokens, rel_path, bindings=None):
+    """Extracts the exported elements (with @desc/@category metadata) from one file's scanned text.
+
+    `padded` and `tokens` come from extract_file and _tokens: one read and
+    three literal-anchored scans of the whole text replace the
+    per-line searches: exports and annotations are merged in text order and
+    bucketed by line, so the @desc/@category window around an export is a few
+    dict lookups. With `bindings` (see extract_imports), an element's
+    dependencies are the imported names used between it and the next element.
+    """
+    exports = {} # line -> (priority, name, type, signature); lowest priority wins
+    descs = {}
+    categories = {}
+    line = -1 # Counting the padding newline
+    last = 0
+    for position, priority, m in tokens:
+        line += padded.count('\n', last, position)
+        last = position
+        if priority is None:
+            (descs if m.group(1) == 'desc' else categories).setdefault(line, m.group(2))
+            continue
+        if line in exports and exports[line][0] <= priority:
+            continue # The per-line scan took the first match of the highest-priority pattern
+        if priority == 0:
+            exports[line] = (0, m.group('const'), 'constant', 'N/A', position)
+        elif priority == 1:
+            exports[line] = (1, m.group('function'), 'function', f"({m.group('function_args')}) => void", position)
+        elif priority == 2:
+            exports[line] = (2, m.group('class'), 'class', 'class', position)
+        else:
+            exports[line] = (3, m.group(1), 'function', f'({m.group(2)}) => void', position)
+
+    lines = sorted(exports)
+    dependencies = {} # Index into lines -> imported names used by that element
+    if bindings and lines:
+        starts = [exports[idx][4] for idx in lines]
+        # From the first element on: uses before it are the import statements themselves
+        for position, name in _references(padded, bindings, starts[0]):
+            dependencies.setdefault(bisect.bisect_right(starts, position) - 1, set()).add(name)
+
+    default_cats = get_default_categories(rel_path)
+    elements = []
+    for owner, idx in enumerate(lines):
+        _, name, typ, sig, _ = exports[idx]
+        desc = ""
+        manual_categories = []
+
+        # Look ahead and behind for comments (restricted range to avoid overlap)
+        if descs or categories:
+            for search_idx in range(max(0, idx-3), idx+5):
+                if search_idx == idx: # Don't search the export line itself
+                    continue
+                if search_idx in descs:
+                    desc = descs[search_idx].strip()
+                if search_idx in categories:
+                    manual_categories.extend(c.strip() for c in categories[search_idx].split(','))
+
+        # Code-derived fields first, then the REQUIRED_FIELDS defaults (keeps the JSON key order)
+        elements.append({
+            "name": name,
+            "file": rel_path,
+            "type": typ,
+            "signature": sig,
+            "description": desc,
+            "categories": list(dict.fromkeys(default_cats + manual_categories)) if manual_categories else list(default_cats),
+            "dependencies": sorted(dependencies[owner]) if owner in dependencies else [],
+            "sideEffects": False
+        })
+
+    return elements
+
+def extract_file(job):
+    """Process-pool worker: returns (sha256, (elements, imports)), None when the hash is unchanged."""
+    full_path, rel_path, cached_sha = job
+    with open(full_path, 'rb') as f:
+        raw = f.read()
+    digest = hashlib.sha256(raw).hexdigest()
+    if digest == cached_sha:
+        return digest, None
+    text = raw.decode('utf-8')
+    if '\r' in text:
+        text = text.replace('\r\n', '\n').replace('\r', '\n') # Universal newlines, as in text mode
+    padded = '\n' + text # Lets PATTERN_LOCAL_FUNCTION match on the first line too
+    tokens, statements = _tokens(padded)
+    imports, bindings = extract_imports(padded, statements, rel_path)
+    return digest, (extract_elements(padded, tokens, rel_path, bindings), imports)
+
+def run_jobs(jobs, workers=None):
+    """Runs extract_file over `jobs`, in a process pool for large batches; results keep job order."""
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or len(jobs) < PARALLEL_MIN_FILES:
+        return [extract_file(job) for job in jobs]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(extract_file, jobs, chunksize=max(1, len(jobs) // (workers * 4))))
+
+def load_cache():
+    """Loads the per-file scan cache; a missing, corrupt or outdated cache starts empty."""
+    if os.path.exists(CACHE_FILE):
+        try:
+            with open(CACHE_FILE, 'r', encoding='utf-8') as f:
+                cache = json.load(f)
+            if cache.get('version') == CACHE_VERSION:
+                return cache
+        except (OSError, ValueError):
+            print(f"Warning: Could not read {CACHE_FILE}. Rescanning all files.")
+    return {"version": CACHE_VERSION, "files": {}}
+
+def save_cache(cache):
+    write_if_changed(CACHE_FILE, json.dumps(cache, separators=(',', ':'), sort_keys=True))
+
+def _walk_order(rel_path):
+    """Sort key matching os.walk with sorted names: a directory's files before its subdirectories."""
+    *dirs, file = rel_path.split('/')
+    return tuple((1, d) for d in dirs) + ((0, file),)
+
+def _is_script(rel_path):
+    # Skip the generated map (single file or split chunks) to avoid circular references
+    return rel_path.endswith('.js') and 'codebaseMap.js' not in rel_path and '/codebaseMap/' not in rel_path
+
+def _update_entries(entries, candidates, workers=None):
+    """Re-extracts candidates [(full_path, rel_path, stat)] whose mtime/size changed; returns how many changed."""
+    stale = [(full_path, rel_path, stat) for full_path, rel_path, stat in candidates
+             if not (rel_path in entries and entries[rel_path]['mtime'] == stat.st_mtime_ns
+                     and entries[rel_path]['size'] == stat.st_size)]
+    jobs = [(full_path, rel_path, entries[rel_path]['sha256'] if rel_path in entries else None)
+            for full_path, rel_path, _ in stale]
+    rescanned = 0
+    for (_, rel_path, stat), (digest, extracted) in zip(stale, run_jobs(jobs, workers)):
+        if extracted is None:
+            extracted = entries[rel_path]['elements'], entries[rel_path]['imports'] # Touched but unchanged
+        else:
+            rescanned += 1
+        entries[rel_path] = {"mtime": stat.st_mtime_ns, "size": stat.st_size, "sha256": digest,
+                             "elements": extracted[0], "imports": extracted[1]}
+    return rescanned
+
+def cached_elements(cache):
+    """All elements held by the cache, in scan order."""
+    entries = cache['files']
+    return [el for rel_path in sorted(entries, key=_walk_order) for el in entries[rel_path]['elements']]
+
+def scan_files(cache=None, workers=None, scripts_dir=SCRIPTS_DIR):
+    """Returns the exported elements of every script, in file order.
+
+    With a `cache` (see load_cache), files whose mtime and size, or failing
+    that whose content hash, match their cache entry reuse the elements
+    extracted last time. The cache is updated in place. Changed files are
+    extracted in parallel when there are many of them (see run_jobs).
+    """
+    cache = cache if cache is not None else {"version": CACHE_VERSION, "files": {}}
+    entries = cache['files']
+    project_root = os.path.dirname(scripts_dir)
+    candidates = []
+    print(f"Scanning scripts in {scripts_dir}...")
     
-    for root, dirs, files in os.walk(SCRIPTS_DIR):
+    for root, dirs, files in os.walk(scripts_dir):
         for file in files:
-            if file.endswith('.js'):
-                full_path = os.path.join(root, file)
-                rel_path = os.path.relpath(full_path, PROJECT_ROOT).replace('\\', '/')
-                
-                # Skip the map file itself to avoid circular references if it was in scripts
-                if 'codebaseMap.js' in rel_path:
-                    continue
+            full_path = os.path.join(root, file)
+            rel_path = os.path.relpath(full_path, project_root).replace('\\', '/')
+            if _is_script(rel_path):
+                candidates.append((full_path, rel_path, os.stat(full_path)))
 
-                with open(full_path, 'r', encoding='utf-8') as f:
-                    lines = f.readlines()
-                    
-                    # Build a map of export line numbers to names
-                    export_lines = {}
-                    for idx, line in enumerate(lines):
-                        m_const = PATTERN_EXPORT_CONST.search(line)
-                        m_func = PATTERN_EXPORT_FUNCTION.search(line)
-                        m_class = PATTERN_EXPORT_CLASS.search(line)
-                        m_local_func = PATTERN_LOCAL_FUNCTION.search(line)
-                        
-                        if m_const:
-                            export_lines[idx] = (m_const.group(1), 'constant', 'N/A')
-                        elif m_func:
-                            export_lines[idx] = (m_func.group(1), 'function', f'({m_func.group(2)}) => void')
-                        elif m_class:
-                            export_lines[idx] = (m_class.group(1), 'class', 'class')
-                        elif m_local_func:
-                            export_lines[idx] = (m_local_func.group(1), 'function', f'({m_local_func.group(2)}) => void')
-                            
-                    # For each export, look for metadata comments
-                    for idx, (name, typ, sig) in export_lines.items():
-                        desc = ""
-                        manual_categories = []
-                        
-                        # Look ahead and behind for comments (restricted range to avoid overlap)
-                        search_range = list(range(max(0, idx-3), min(len(lines), idx+5)))
-                        for search_idx in search_range:
-                            if search_idx != idx:  # Don't search the export line itself
-                                line_content = lines[search_idx]
-                                
-                                desc_match = PATTERN_DESC.search(line_content)
-                                if desc_match:
-                                    desc = desc_match.group(1).strip()
-                                    
-                                cat_match = PATTERN_CATEGORY.search(line_content)
-                                if cat_match:
-                                    cats = [c.strip() for c in cat_match.group(1).split(',')]
-                                    manual_categories.extend(cats)
-
-                        # Determine final categories
-                        default_cats = get_default_categories(rel_path)
-                        final_cats = list(set(default_cats + manual_categories))
-                        
-                        el = {
-                            "name": name,
-                            "file": rel_path,
-                            "type": typ,
-                            "signature": sig,
-                            "description": desc,
-                            "categories": final_cats
-                        }
-                        
-                        # Fill defaults for other fields
-                        for field in REQUIRED_FIELDS:
-                            if field not in el:
-                                if field == "dependencies":
-                                    el[field] = []
-                                elif field == "sideEffects":
-                                    el[field] = False
-                                else:
-                                    el[field] = ""
-                                    
-                        found_elements.append(el)
-
-    return found_elements
+    rescanned = _update_entries(entries, candidates, workers)
+    for rel_path in set(entries) - {rel_path for _, rel_path, _ in candidates}:
+        del entries[rel_path]
+    print(f"Extracted {rescanned} changed file(s), reused {len(candidates) - rescanned} from cache.")
+    return cached_elements(cache)
+
+def rescan_paths(cache, rel_paths, workers=None):
+    """Updates the cache for just `rel_paths` (created, changed or deleted files); returns all elements."""
+    entries = cache['files']
+    candidates = []
+    for rel_path in sorted(rel_paths):
+        full_path = os.path.join(PROJECT_ROOT, rel_path)
+        if _is_script(rel_path) and os.path.isfile(full_path):
+            candidates.append((full_path, rel_path, os.stat(full_path)))
+        else:
+            entries.pop(rel_path, None)
+    _update_entries(entries, candidates, workers)
+    return cached_elements(cache)
 
 def merge_maps(existing_data, new_elements):
     existing_elements = existing_data.get("elements", [])
@@ -162,6 +388,7 @@ def merge_maps(existing_data, new_elements):
             merged_entry['type'] = new_el['type']
             merged_entry['signature'] = new_el['signature']
             merged_entry['categories'] = new_el['categories'] # Always sync categories from code/logic
+            merged_entry['dependencies'] = new_el['dependencies'] # Imported names it uses (see extract_imports)
             
             # Preserve description if code doesn't have one, but if code has one, use it
             if new_el['description']:
@@ -191,26 +418,471 @@ def merge_maps(existing_data, new_elements):
     existing_data['elements'] = merged_elements
     return existing_data
 
-def generate_js_map(data):
-    """Generates the JS module file from the JSON data."""
+def _element_id(rel_path, name):
+    return f"{rel_path}#{name}"
+
+def build_index(cache):
+    """Builds the forward and reverse dependency index from the scan cache.
+
+    files: module -> {"imports", "importedBy"} (bare packages and URLs only
+    have importedBy). elements: "file#name" -> {"name", "file", "type",
+    "categories", "uses", "usedBy"}, names used through a re-exporting module
+    (`export * from`) resolved to the file defining them. names and
+    categories map to element ids for the lookups in query_index.
+    """
+    entries = cache['files']
+    order = sorted(entries, key=_walk_order)
+    defined = {rel_path: {el['name'] for el in entries[rel_path]['elements']} for rel_path in order}
+
+    def resolve(module, name, seen=()):
+        """File defining `name` as seen through `module`, following re-exports; None if unknown."""
+        if name in defined.get(module, ()):
+            return module
+        for imp in entries[module]['imports'] if module in entries else []:
+            if imp['kind'] == 'export' and imp['module'] not in seen and ('*' in imp['names'] or name in imp['names']):
+                found = resolve(imp['module'], name, seen + (module,))
+                if found:
+                    return found
+        return None
+
+    def provider(rel_path, name):
+        """Id of the element `name` imported into `rel_path` refers to."""
+        imports = [imp for imp in entries[rel_path]['imports'] if imp['kind'] == 'import']
+        for imp in imports:
+            if name in imp['names']:
+                return _element_id(resolve(imp['module'], name) or imp['module'], name)
+        for imp in imports: # Members of a namespace import
+            if '*' in imp['names'] and resolve(imp['module'], name):
+                return _element_id(resolve(imp['module'], name), name)
+        return _element_id('?', name)
+
+    files = {}
+    for rel_path in order:
+        modules = list(dict.fromkeys(imp['module'] for imp in entries[rel_path]['imports']))
+        files.setdefault(rel_path, {})['imports'] = modules
+        for module in modules:
+            files.setdefault(module, {}).setdefault('importedBy', []).append(rel_path)
+    files = {module: {"imports": info.get('imports', []), "importedBy": info.get('importedBy', [])}
+             for module, info in sorted(files.items())}
+
+    elements = {}
+    names = {}
+    categories = {}
+    for rel_path in order:
+        for el in entries[rel_path]['elements']:
+            el_id = _element_id(rel_path, el['name'])
+            elements[el_id] = {"name": el['name'], "file": rel_path, "type": el['type'],
+                               "categories": el['categories'],
+                               "uses": [provider(rel_path, dep) for dep in el['dependencies']], "usedBy": []}
+            names.setdefault(el['name'], []).append(el_id)
+            for category in el['categories']:
+                categories.setdefault(category, []).append(el_id)
+    for el_id, info in elements.items():
+        for used in info['uses']:
+            if used in elements:
+                elements[used]['usedBy'].append(el_id)
+    return {"files": files, "elements": elements, "names": dict(sorted(names.items())),
+            "categories": dict(sorted(categories.items()))}
+
+def affected_files(index, rel_paths):
+    """`rel_paths` plus every file that imports one of them, directly or through other files."""
+    files = index['files']
+    affected = set()
+    pending = list(rel_paths)
+    while pending:
+        rel_path = pending.pop()
+        if rel_path not in affected:
+            affected.add(rel_path)
+            pending.extend(files.get(rel_path, {}).get('importedBy', []))
+    return sorted(affected, key=_walk_order)
+
+def query_index(index, kind, terms):
+    """Answers a query from the index; returns a list of element records or file paths."""
+    elements = index['elements']
+    if kind == 'affected':
+        return affected_files(index, [t.replace('\\', '/') for t in terms])
+    if kind == 'category':
+        ids = [el_id for term in terms for el_id in index['categories'].get(term.upper(), [])]
+    else:
+        ids = [el_id for term in terms for el_id in index['names'].get(term, [])]
+    if kind == 'usedby':
+        ids = [user for el_id in ids for user in elements[el_id]['usedBy']]
+    elif kind == 'uses':
+        ids = [used for el_id in ids for used in elements[el_id]['uses']]
+    return [elements.get(el_id) or {"name": el_id.rpartition('#')[2], "file": el_id.rpartition('#')[0]}
+            for el_id in dict.fromkeys(ids)]
+
+def run_query(kind, terms, as_json=False):
+    """CLI entry for `update_map.py query`: reads only INDEX_FILE."""
+    try:
+        with open(INDEX_FILE, 'r', encoding='utf-8') as f:
+            index = json.load(f)
+    except (OSError, ValueError) as e:
+        print(f"Error: could not read {INDEX_FILE} ({e}). Run update_map.py first.", file=sys.stderr)
+        sys.exit(1)
+    results = query_index(index, kind, terms)
+    if as_json:
+        print(json.dumps(results, indent=2))
+        return
+    for result in results:
+        if isinstance(result, str):
+            print(result)
+        elif 'type' not in result:
+            print(f"{result['name']}  ({result['file']}, not scanned)")
+        else:
+            print(f"{result['name']}  {result['type']}  {result['file']}  [{', '.join(result['categories'])}]")
+            if kind == 'name':
+                print(f"    uses:    {', '.join(result['uses']) or '-'}")
+                print(f"    used by: {', '.join(result['usedBy']) or '-'}")
+    if not results:
+        print("No matches.", file=sys.stderr)
+        sys.exit(1)
+
+def generate_js_map(data, cache=None):
+    """Generates the JS module file from the JSON data and removes the split map's directory.
+
+    Besides CODEBASE_MAP it exports the split index's API (CATEGORY_OF,
+    getElement, findElement, loadCategory), so importers only change the path.
+    Returns True if anything was written or removed.
+    """
     print(f"Generating JS map at {JS_MAP_FILE}...")
-    
+    category_of = {}
+    for el in data.get('elements', []):
+        category_of.setdefault(el['name'], (el.get('categories') or ['Uncategorized'])[0])
+
     content = f"""/**
  * Codebase Map (Auto-generated)
  * Generated by update_map.py
  * DO NOT EDIT MANUALLY
  */
 export const CODEBASE_MAP = {json.dumps(data, indent=2)};
-"""
+export const CATEGORY_OF = {json.dumps(category_of, indent=2)};
+""" + JS_MAP_FULL_RUNTIME
     # Ensure directory exists
     os.makedirs(os.path.dirname(JS_MAP_FILE), exist_ok=True)
     
-    with open(JS_MAP_FILE, 'w', encoding='utf-8') as f:
-        f.write(content)
+    changed = write_if_changed(JS_MAP_FILE, content)
+    if os.path.isdir(JS_MAP_DIR):
+        shutil.rmtree(JS_MAP_DIR)
+        changed = True
+    _warn_split_importers(cache)
+    return changed
+
+def _warn_split_importers(cache):
+    """Names the scripts that still import the split map, which full mode removes."""
+    split_dir = os.path.relpath(JS_MAP_DIR, PROJECT_ROOT).replace(os.sep, '/') + '/'
+    full_file = os.path.relpath(JS_MAP_FILE, PROJECT_ROOT).replace(os.sep, '/')
+    importers = sorted(rel_path for rel_path, entry in ((cache or {}).get('files') or {}).items()
+                       if any(imp['module'].startswith(split_dir) for imp in entry.get('imports', [])))
+    for rel_path in importers:
+        spec = posixpath.relpath(full_file, posixpath.dirname(rel_path))
+        print(f"Warning: {rel_path} imports {split_dir}index.js; point it at "
+              f"'{spec if spec.startswith('.') else './' + spec}' (same exports) or use --js-map split", file=sys.stderr)
+
+JS_MAP_FULL_RUNTIME = """
+export function getElement(name) {
+    return CODEBASE_MAP.elements.find(e => e.name === name);
+}
+
+export function findElement(name) {
+    return Promise.resolve(getElement(name));
+}
+
+export function loadCategory(category) {
+    return Promise.resolve(CODEBASE_MAP.elements.filter(e => CATEGORY_OF[e.name] === category));
+}
+"""
+
+JS_MAP_INDEX_RUNTIME = """
+const loaded = new Map();
+const pending = new Map();
+
+// Imports one category's chunk (once); resolves to its elements.
+export function loadCategory(category) {
+    if (!(category in CHUNKS)) return Promise.resolve([]);
+    if (!pending.has(category)) {
+        pending.set(category, import(CHUNKS[category]).then(m => {
+            loaded.set(category, m.ELEMENTS);
+            return m.ELEMENTS;
+        }));
+    }
+    return pending.get(category);
+}
+
+// Returns the element if its chunk is already loaded, otherwise starts loading it and returns undefined.
+export function getElement(name) {
+    const category = CATEGORY_OF[name];
+    if (category === undefined) return undefined;
+    if (!loaded.has(category)) {
+        loadCategory(category);
+        return undefined;
+    }
+    return loaded.get(category).find(e => e.name === name);
+}
+
+export function findElement(name) {
+    const category = CATEGORY_OF[name];
+    if (category === undefined) return Promise.resolve(undefined);
+    return loadCategory(category).then(elements => elements.find(e => e.name === name));
+}
+"""
+
+def generate_split_js_map(data):
+    """Writes minified per-category chunks with content-hashed names, plus a small index module.
+
+    Each element goes to the chunk of its first category (the label the
+    logger shows). The index maps names to categories and categories to chunk
+    files, and loads chunks on demand with dynamic import(). Chunk names
+    change only when their content does, so they can be cached indefinitely.
+    Removes the full map's single file. Returns True if anything was written
+    or removed.
+    """
+    print(f"Generating split JS map in {JS_MAP_DIR}...")
+    os.makedirs(JS_MAP_DIR, exist_ok=True)
+
+    chunks = {}
+    category_of = {}
+    for el in data.get('elements', []):
+        category = (el.get('categories') or ['Uncategorized'])[0]
+        chunks.setdefault(category, []).append(el)
+        category_of.setdefault(el['name'], category)
+
+    changed = False
+    files = {}
+    for category in sorted(chunks):
+        content = ("// Codebase Map chunk (auto-generated by update_map.py, DO NOT EDIT MANUALLY)\n"
+                   f"export const ELEMENTS={json.dumps(chunks[category], separators=(',', ':'))};\n")
+        digest = hashlib.sha256(content.encode('utf-8')).hexdigest()[:JS_MAP_HASH_LENGTH]
+        file_name = f"{re.sub(r'[^a-z0-9_-]+', '-', category.lower())}.{digest}.js"
+        files[category] = './' + file_name
+        changed |= write_if_changed(os.path.join(JS_MAP_DIR, file_name), content)
+
+    index = f"""/**
+ * Codebase Map index (Auto-generated)
+ * Generated by update_map.py
+ * DO NOT EDIT MANUALLY
+ */
+export const CHUNKS = {json.dumps(files, separators=(',', ':'))};
+export const CATEGORY_OF = {json.dumps(category_of, separators=(',', ':'))};
+""" + JS_MAP_INDEX_RUNTIME
+    changed |= write_if_changed(os.path.join(JS_MAP_DIR, 'index.js'), index)
+
+    # Drop chunks from earlier runs
+    current = {path[2:] for path in files.values()} | {'index.js'}
+    for file_name in os.listdir(JS_MAP_DIR):
+        if file_name.endswith('.js') and file_name not in current:
+            os.remove(os.path.join(JS_MAP_DIR, file_name))
+            changed = True
+    if os.path.exists(JS_MAP_FILE):
+        os.remove(JS_MAP_FILE)
+        changed = True
+    return changed
+
+def write_if_changed(path, content):
+    """Writes `content` unless the file already holds exactly these bytes; returns True if written.
+
+    The write is atomic (temp file in the same directory, then rename), so
+    readers and watchers never see a half-written file.
+    """
+    data = content.encode('utf-8')
+    mode = 0o644
+    try:
+        with open(path, 'rb') as f:
+            if f.read() == data:
+                return False
+            mode = os.fstat(f.fileno()).st_mode & 0o777
+    except OSError:
+        pass
+    fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix='.' + os.path.basename(path) + '.', suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        os.chmod(temp_path, mode) # mkstemp creates files as 0600
+        os.replace(temp_path, path)
+    except BaseException:
+        os.unlink(temp_path)
+        raise
+    return True
+
+def write_outputs(data, cache, js_map='split'):
+    print(f"Writing to {MAP_FILE}...")
+    if not write_if_changed(MAP_FILE, json.dumps(data, indent=2)):
+        print("Map unchanged, skipped.")
+    if not write_if_changed(INDEX_FILE, json.dumps(build_index(cache), indent=2)):
+        print("Index unchanged, skipped.")
+        
+    written = generate_split_js_map(data) if js_map == 'split' else generate_js_map(data, cache)
+    if not written:
+        print("JS map unchanged, skipped.")
+
+class InotifyWatcher:
+    """Linux inotify through ctypes: one watch per directory under `root`."""
+
+    IN_CLOSE_WRITE = 0x008
+    IN_MOVED_FROM = 0x040
+    IN_MOVED_TO = 0x080
+    IN_CREATE = 0x100
+    IN_DELETE = 0x200
+    IN_Q_OVERFLOW = 0x4000
+    IN_ISDIR = 0x40000000
+    MASK = IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+    EVENT = struct.Struct('iIII')
+
+    def __init__(self, root):
+        import ctypes
+        import ctypes.util
+        self._libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+        self.fd = self._libc.inotify_init1(os.O_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self.root = root
+        self._dirs = {}
+        for directory, _, _ in os.walk(root):
+            self._add(directory)
+
+    def _add(self, directory):
+        wd = self._libc.inotify_add_watch(self.fd, os.fsencode(directory), self.MASK)
+        if wd >= 0:
+            self._dirs[wd] = directory
+
+    def wait(self, timeout=None):
+        """Returns the changed paths (relative to PROJECT_ROOT), None for "rescan everything", or set() on timeout."""
+        if not select.select([self.fd], [], [], timeout)[0]:
+            return set()
+        buffer = os.read(self.fd, 64 * 1024)
+        changed = set()
+        offset = 0
+        while offset < len(buffer):
+            wd, mask, _, length = self.EVENT.unpack_from(buffer, offset)
+            name = buffer[offset + self.EVENT.size:offset + self.EVENT.size + length].rstrip(b'\0')
+            offset += self.EVENT.size + length
+            if mask & self.IN_Q_OVERFLOW:
+                return None
+            if wd not in self._dirs:
+                continue
+            path = os.path.join(self._dirs[wd], os.fsdecode(name))
+            if mask & self.IN_ISDIR:
+                if mask & (self.IN_CREATE | self.IN_MOVED_TO):
+                    for directory, _, _ in os.walk(path):
+                        self._add(directory)
+                changed = None # Whole directories came or went
+            elif changed is not None:
+                changed.add(os.path.relpath(path, PROJECT_ROOT).replace('\\', '/'))
+        return changed
+
+    def close(self):
+        os.close(self.fd)
+
+class PollingWatcher:
+    """Fallback watcher: compares the .js files' mtime and size every `interval` seconds."""
+
+    def __init__(self, root, interval=1.0):
+        self.root = root
+        self.interval = interval
+        self._snapshot = self._stat_all()
+
+    def _stat_all(self):
+        snapshot = {}
+        for directory, _, files in os.walk(self.root):
+            for file in files:
+                if file.endswith('.js'):
+                    path = os.path.join(directory, file)
+                    try:
+                        stat = os.stat(path)
+                    except OSError:
+                        continue # Deleted mid-walk
+                    snapshot[os.path.relpath(path, PROJECT_ROOT).replace('\\', '/')] = (stat.st_mtime_ns, stat.st_size)
+        return snapshot
+
+    def wait(self, timeout=None):
+        """Same contract as InotifyWatcher.wait."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            remaining = self.interval if deadline is None else min(self.interval, deadline - time.monotonic())
+            if remaining > 0:
+                time.sleep(remaining)
+            snapshot = self._stat_all()
+            changed = {path for path in snapshot.keys() | self._snapshot.keys()
+                       if snapshot.get(path) != self._snapshot.get(path)}
+            self._snapshot = snapshot
+            if changed or (deadline is not None and time.monotonic() >= deadline):
+                return changed
+
+    def close(self):
+        pass
+
+def make_watcher(root, interval, polling=False):
+    if not polling and sys.platform.startswith('linux'):
+        try:
+            return InotifyWatcher(root)
+        except (OSError, AttributeError) as e:
+            print(f"Warning: inotify unavailable ({e}). Falling back to polling.")
+    return PollingWatcher(root, interval)
+
+def watch(interval=1.0, debounce=0.3, polling=False, js_map='split'):
+    """Keeps the map up to date: re-extracts touched files after each burst of saves."""
+    cache = load_cache()
+    data = merge_maps(load_existing_map(), scan_files(cache))
+    write_outputs(data, cache, js_map)
+    save_cache(cache)
+
+    watcher = make_watcher(SCRIPTS_DIR, interval, polling)
+    print(f"Watching {SCRIPTS_DIR} with {type(watcher).__name__} (Ctrl+C to stop)...")
+    try:
+        while True:
+            changed = watcher.wait()
+            # Debounce: keep collecting until the tree has been quiet for `debounce` seconds
+            while True:
+                more = watcher.wait(debounce)
+                if more == set():
+                    break
+                changed = None if changed is None or more is None else changed | more
+            if changed is None:
+                elements = scan_files(cache)
+            else:
+                changed = {path for path in changed if _is_script(path)}
+                if not changed:
+                    continue # Only our own outputs or non-script files
+                print(f"Changed: {', '.join(sorted(changed))}")
+                elements = rescan_paths(cache, changed)
+            data = merge_maps(data, elements)
+            write_outputs(data, cache, js_map)
+            save_cache(cache)
+    except KeyboardInterrupt:
+        print("--- Watch Stopped ---")
+    finally:
+        watcher.close()
 
 def main():
+    parser = argparse.ArgumentParser(description="Regenerates codebase-map.json, codebase-index.json and the scripts/utils codebase map.")
+    parser.add_argument('--watch', action='store_true', help="Keep running and update the map as scripts change")
+    parser.add_argument('--interval', type=float, default=1.0, help="Polling interval in seconds (polling watcher only)")
+    parser.add_argument('--debounce', type=float, default=0.3, help="Quiet period in seconds before regenerating")
+    parser.add_argument('--poll', action='store_true', help="Use the polling watcher even where inotify is available")
+    parser.add_argument('--js-map', choices=['split', 'full'], default='split',
+                        help="split: minified, lazily loaded chunks under scripts/utils/codebaseMap/; "
+                             "full: the single pretty-printed scripts/utils/codebaseMap.js. "
+                             "Each mode deletes the other's output; logger.js imports the split index")
+    commands = parser.add_subparsers(dest='command')
+    query = commands.add_parser('query', help="Look up elements and dependencies in codebase-index.json")
+    query.add_argument('kind', choices=['name', 'category', 'usedby', 'uses', 'affected'],
+                       help="name/category: matching elements; usedby: elements using NAME; "
+                            "uses: elements NAME uses; affected: files importing FILE, transitively")
+    query.add_argument('terms', nargs='+', metavar='NAME|CATEGORY|FILE')
+    query.add_argument('--json', action='store_true', help="Print the results as JSON")
+    args = parser.parse_args()
+
+    if args.command == 'query':
+        run_query(args.kind, args.terms, args.json)
+        return
+
+    if args.watch:
+        watch(args.interval, args.debounce, args.poll, args.js_map)
+        return
+
     print("--- Starting Codebase Map Update ---")
-    new_elements = scan_files()
+    cache = load_cache()
+    new_elements = scan_files(cache)
     print(f"Found {len(new_elements)} exported elements.")
     
     print("Loading existing map...")
@@ -219,11 +891,8 @@ def main():
     print("Merging data...")
     updated_data = merge_maps(existing_data, new_elements)
     
-    print(f"Writing to {MAP_FILE}...")
-    with open(MAP_FILE, 'w', encoding='utf-8') as f:
-        json.dump(updated_data, f, indent=2)
-        
-    generate_js_map(updated_data)
+    write_outputs(updated_data, cache, args.js_map)
+    save_cache(cache)
         
     print("--- Update Complete ---")
 
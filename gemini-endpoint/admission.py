@@ -0,0 +1,221 @@
+"""Admission control: cheap checks that reject a request before it costs model quota.
+
+- Size caps: the body (from Content-Length, before the JSON is parsed), then
+  the prompt and the context fields (productChoice, userData, history) are
+  measured in place, never re-serialized. Oversized requests get a 413.
+- Per-client token buckets keyed by the client IP and, when sent, the
+  `X-Session-Id` header. An empty bucket gets a 429 with Retry-After.
+- Global load shedding for the synchronous entry point: at most
+  `SHED_MAX_IN_FLIGHT` model calls run at once. A request that cannot get a
+  slot within `SHED_MAX_QUEUE_SECONDS`, or finds `SHED_MAX_QUEUE` requests
+  already waiting, gets a 429. The async mode sheds with
+  concurrency.ConcurrencyLimiter instead.
+"""
+import math
+import os
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+
+
+# Configuration
+RATE_LIMIT_ENABLED = os.environ.get("RATE_LIMIT_ENABLED", "1") == "1"
+RATE_LIMIT_PER_MINUTE = float(os.environ.get("RATE_LIMIT_PER_MINUTE", 30))  # per session
+RATE_LIMIT_BURST = int(os.environ.get("RATE_LIMIT_BURST", 10))
+RATE_LIMIT_IP_FACTOR = int(os.environ.get("RATE_LIMIT_IP_FACTOR", 4))  # one IP may carry several sessions
+RATE_LIMIT_MAX_CLIENTS = int(os.environ.get("RATE_LIMIT_MAX_CLIENTS", 10000))
+# Trusted proxies appending to X-Forwarded-For; 0 keys clients on the socket peer.
+# Behind Google's external HTTP(S) load balancer ("<client>, <lb>") use 2.
+FORWARDED_HOPS = int(os.environ.get("FORWARDED_HOPS", 0))
+
+MAX_BODY_BYTES = int(os.environ.get("MAX_BODY_BYTES", 64 * 1024))
+MAX_PROMPT_CHARS = int(os.environ.get("MAX_PROMPT_CHARS", 2000))
+MAX_CONTEXT_CHARS = int(os.environ.get("MAX_CONTEXT_CHARS", 16000))
+
+SHED_MAX_IN_FLIGHT = int(os.environ.get("SHED_MAX_IN_FLIGHT", 64))
+SHED_MAX_QUEUE = int(os.environ.get("SHED_MAX_QUEUE", 64))
+SHED_MAX_QUEUE_SECONDS = float(os.environ.get("SHED_MAX_QUEUE_SECONDS", 2.0))
+
+CONTEXT_FIELDS = ["productChoice", "userData", "history"]
+
+
+class Rejected(Exception):
+    """A request turned away before the model call; handlers answer with `status`."""
+
+    def __init__(self, message, status=429, retry_after=None):
+        super().__init__(message)
+        self.status = status
+        self.retry_after = retry_after
+
+
+class TokenBucketLimiter:
+    """One token bucket per key, evicting the least recently seen keys.
+
+    An evicted client starts again with a full bucket, so `max_keys` only has
+    to exceed the number of clients active within one refill period.
+    """
+
+    def __init__(self, per_minute, burst, max_keys=RATE_LIMIT_MAX_CLIENTS, clock=time.monotonic):
+        self.rate = per_minute / 60.0
+        self.burst = float(burst)
+        self.max_keys = max_keys
+        self.clock = clock
+        self._buckets = OrderedDict()  # key -> (tokens, updated)
+        self._lock = threading.Lock()
+        self.limited = 0
+
+    def acquire(self, key, cost=1.0):
+        """Takes `cost` tokens; returns 0.0, or the seconds until they are available."""
+        now = self.clock()
+        with self._lock:
+            tokens, updated = self._buckets.pop(key, (self.burst, now))
+            tokens = min(self.burst, tokens + (now - updated) * self.rate)
+            wait = 0.0
+            if tokens >= cost:
+                tokens -= cost
+            else:
+                self.limited += 1
+                wait = (cost - tokens) / self.rate if self.rate > 0 else float("inf")
+            self._buckets[key] = (tokens, now)
+            while len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+        return wait
+
+    def stats(self):
+        return {"clients": len(self._buckets), "limited": self.limited}
+
+
+class LoadShedder:
+    """Thread-side twin of ConcurrencyLimiter: bounded in-flight calls and wait queue."""
+
+    def __init__(self, max_in_flight=SHED_MAX_IN_FLIGHT, max_queue=SHED_MAX_QUEUE,
+                 queue_timeout=SHED_MAX_QUEUE_SECONDS):
+        self.max_in_flight = max_in_flight
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self._semaphore = threading.BoundedSemaphore(max_in_flight)
+        self._lock = threading.Lock()
+        self.in_flight = 0
+        self.waiting = 0
+        self.shed = 0
+
+    def acquire(self):
+        if not self._semaphore.acquire(blocking=False):
+            with self._lock:
+                if self.waiting >= self.max_queue:
+                    self.shed += 1
+                    raise Rejected("Server busy: queue full", 429, retry_after=1)
+                self.waiting += 1
+            try:
+                acquired = self._semaphore.acquire(timeout=self.queue_timeout)
+            finally:
+                with self._lock:
+                    self.waiting -= 1
+            if not acquired:
+                with self._lock:
+                    self.shed += 1
+                raise Rejected("Server busy: timed out waiting for a slot", 429, retry_after=1)
+        with self._lock:
+            self.in_flight += 1
+
+    def release(self):
+        with self._lock:
+            self.in_flight -= 1
+        self._semaphore.release()
+
+    @contextmanager
+    def slot(self):
+        """Holds one in-flight slot for the duration of the block."""
+        self.acquire()
+        try:
+            yield
+        finally:
+            self.release()
+
+    def stats(self):
+        return {
+            "inFlight": self.in_flight,
+            "waiting": self.waiting,
+            "shed": self.shed,
+            "maxInFlight": self.max_in_flight,
+            "maxQueue": self.max_queue,
+        }
+
+
+def client_ip(request):
+    """The address the outermost trusted proxy saw (FORWARDED_HOPS > 0), else the socket peer."""
+    forwarded = request.headers.get("X-Forwarded-For")
+    if forwarded and FORWARDED_HOPS > 0:
+        hops = [hop.strip() for hop in forwarded.split(",") if hop.strip()]
+        if hops:
+            return hops[-min(FORWARDED_HOPS, len(hops))]
+    return getattr(request, "remote_addr", None) or "unknown"
+
+
+def measure(value, limit):
+    """Character size of a JSON value, walked in place; stops counting past `limit`."""
+    size = 0
+    stack = [value]
+    while stack and size <= limit:
+        item = stack.pop()
+        if isinstance(item, str):
+            size += len(item) + 2
+        elif isinstance(item, dict):
+            size += 2 * len(item) + 2
+            for key, child in item.items():
+                size += len(str(key)) + 2
+                stack.append(child)
+        elif isinstance(item, list):
+            size += len(item) + 2
+            stack.extend(item)
+        else:
+            size += 8  # Numbers, booleans, null
+    return size
+
+
+class Admission:
+    """Per-request checks plus the shared limiter state."""
+
+    def __init__(self, enabled=RATE_LIMIT_ENABLED):
+        self.enabled = enabled
+        self.sessions = TokenBucketLimiter(RATE_LIMIT_PER_MINUTE, RATE_LIMIT_BURST)
+        self.ips = TokenBucketLimiter(RATE_LIMIT_PER_MINUTE * RATE_LIMIT_IP_FACTOR,
+                                      RATE_LIMIT_BURST * RATE_LIMIT_IP_FACTOR)
+        self.shedder = LoadShedder()
+        self.too_large = 0
+
+    def _too_large(self, message):
+        self.too_large += 1
+        return Rejected(message, 413)
+
+    def check_request(self, request):
+        """Body size and rate limits, before the body is parsed. Raises Rejected."""
+        length = getattr(request, "content_length", None)
+        if length is not None and length > MAX_BODY_BYTES:
+            raise self._too_large(f"Request body too large (max {MAX_BODY_BYTES} bytes)")
+        if not self.enabled:
+            return
+        wait = self.ips.acquire(client_ip(request))
+        session = request.headers.get("X-Session-Id")
+        if not wait and session:
+            wait = self.sessions.acquire(session[:128])
+        if wait:
+            raise Rejected("Too many requests", 429, retry_after=max(1, math.ceil(wait)))
+
+    def check_payload(self, req_json):
+        """Prompt and context caps on the parsed body. Raises Rejected."""
+        prompt = req_json.get("prompt")
+        size = len(prompt) if isinstance(prompt, str) else measure(prompt, MAX_PROMPT_CHARS)
+        if size > MAX_PROMPT_CHARS:
+            raise self._too_large(f"'prompt' too long (max {MAX_PROMPT_CHARS} characters)")
+        context = [req_json.get(field) for field in CONTEXT_FIELDS if req_json.get(field) is not None]
+        if context and measure(context, MAX_CONTEXT_CHARS) > MAX_CONTEXT_CHARS:
+            raise self._too_large(f"Context too large (max {MAX_CONTEXT_CHARS} characters)")
+
+    def stats(self):
+        return {
+            "rateLimit": {"sessions": self.sessions.stats(), "ips": self.ips.stats()},
+            "tooLarge": self.too_large,
+            "shedder": self.shedder.stats(),
+        }
@@ -0,0 +1,160 @@
+"""ASGI serving mode, shared by gemini-endpoint and gemini-service.
+
+Run with any ASGI server, e.g. `uvicorn asgi:app --port 8080` from either
+folder. Requests go through `main.ASYNC_HANDLER` (`gemini_endpoint_async` or
+`gemini_chat_async`), which shares its caches with the synchronous Cloud
+Function and runs under a bounded `ConcurrencyLimiter`.
+
+The folders deploy separately, so each ships a copy: edit one and copy it to
+the other (gemini-endpoint/tests/test_shared_modules.py fails while they differ).
+"""
+import json
+from urllib.parse import parse_qs
+
+from concurrency import ConcurrencyLimiter, Overloaded
+from main import ASYNC_HANDLER
+
+MAX_BODY_BYTES = 1024 * 1024
+
+
+class AsgiRequest:
+    """The subset of the Flask request interface the handlers use."""
+
+    def __init__(self, scope, body):
+        self.method = scope["method"]
+        self.path = scope.get("path", "/")
+        self.headers = _Headers(scope.get("headers", []))
+        self.remote_addr = (scope.get("client") or (None,))[0]  # Socket peer, keys rate limits without X-Forwarded-For
+        self.args = {k: v[-1] for k, v in parse_qs(scope.get("query_string", b"").decode("latin-1")).items()}
+        self._body = body
+
+    @property
+    def content_length(self):
+        return len(self._body)
+
+    def get_data(self, as_text=False):
+        return self._body.decode("utf-8", errors="replace") if as_text else self._body
+
+    def get_json(self, silent=False):
+        try:
+            return json.loads(self._body) if self._body else None
+        except ValueError:
+            if silent:
+                return None
+            raise
+
+
+class _Headers:
+    """Case-insensitive read-only header lookup."""
+
+    def __init__(self, raw_headers):
+        self._headers = {k.decode("latin-1").lower(): v.decode("latin-1") for k, v in raw_headers}
+
+    def get(self, name, default=None):
+        return self._headers.get(name.lower(), default)
+
+    def __contains__(self, name):
+        return name.lower() in self._headers
+
+
+def _encode_headers(headers):
+    return [(str(k).lower().encode("latin-1"), str(v).encode("latin-1")) for k, v in headers.items()]
+
+
+def _to_bytes(chunk):
+    return chunk.encode("utf-8") if isinstance(chunk, str) else chunk
+
+
+async def _read_body(receive):
+    body = b""
+    while True:
+        message = await receive()
+        body += message.get("body", b"")
+        if len(body) > MAX_BODY_BYTES:
+            return None
+        if not message.get("more_body", False):
+            return body
+
+
+def _unpack(response):
+    """Normalizes a handler result (tuple or Flask-style Response) to (body, status, headers)."""
+    if isinstance(response, tuple):
+        return response
+    return response.response, response.status_code, dict(response.headers)
+
+
+async def _send_response(send, response):
+    body, status, headers = _unpack(response)
+    headers = dict(headers)
+
+    if isinstance(body, (str, bytes)):
+        payload = _to_bytes(body)
+        headers.setdefault("Content-Type", "application/json")
+        headers["Content-Length"] = str(len(payload))
+        await send({"type": "http.response.start", "status": status, "headers": _encode_headers(headers)})
+        await send({"type": "http.response.body", "body": payload})
+        return
+
+    # Streaming body: pull the first event before committing to a status so a
+    # rejected limiter slot can still be reported as a 429.
+    if hasattr(body, "__anext__"):
+        next_chunk = body.__anext__
+    else:
+        iterator = iter(body)
+
+        async def next_chunk():
+            try:
+                return next(iterator)
+            except StopIteration:
+                raise StopAsyncIteration from None
+
+    try:
+        first = await next_chunk()
+    except StopAsyncIteration:
+        first = None
+    except Overloaded as e:
+        error = json.dumps({"status": "error", "message": str(e)})
+        await _send_response(send, (error, 429, {"Access-Control-Allow-Origin": "*", "Retry-After": str(e.retry_after)}))
+        return
+
+    await send({"type": "http.response.start", "status": status, "headers": _encode_headers(headers)})
+    if first is not None:
+        await send({"type": "http.response.body", "body": _to_bytes(first), "more_body": True})
+        while True:
+            try:
+                chunk = await next_chunk()
+            except StopAsyncIteration:
+                break
+            await send({"type": "http.response.body", "body": _to_bytes(chunk), "more_body": True})
+    await send({"type": "http.response.body", "body": b""})
+
+
+def make_asgi_app(handler, limiter):
+    """Builds an ASGI app around an async `(request, limiter)` handler."""
+
+    async def app(scope, receive, send):
+        if scope["type"] == "lifespan":
+            while True:
+                message = await receive()
+                if message["type"] == "lifespan.startup":
+                    await send({"type": "lifespan.startup.complete"})
+                elif message["type"] == "lifespan.shutdown":
+                    await send({"type": "lifespan.shutdown.complete"})
+                    return
+        if scope["type"] != "http":
+            return
+
+        body = await _read_body(receive)
+        if body is None:
+            error = json.dumps({"status": "error", "message": "Request body too large"})
+            await _send_response(send, (error, 413, {"Access-Control-Allow-Origin": "*"}))
+            return
+
+        response = await handler(AsgiRequest(scope, body), limiter)
+        await _send_response(send, response)
+
+    return app
+
+
+limiter = ConcurrencyLimiter()
+app = make_asgi_app(ASYNC_HANDLER, limiter)
@@ -0,0 +1,46 @@
+"""Reports bytes and estimated prompt tokens for each KB serialization format.
+
+Usage: python gemini-endpoint/benchmarks/bench_kb_format.py [path/to/kb.yaml ...]
+"""
+import argparse
+import os
+import sys
+import time
+
+ENDPOINT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ENDPOINT_DIR)
+
+import yaml  # noqa: E402
+
+from kb_format import SERIALIZERS  # noqa: E402
+from tokens import estimate_tokens  # noqa: E402
+
+
+def report(path):
+    with open(path, "r", encoding="utf-8") as f:
+        kb_data = yaml.safe_load(f)
+
+    results = []
+    for name, serialize in SERIALIZERS.items():
+        start = time.perf_counter()
+        text = serialize(kb_data)
+        elapsed_us = (time.perf_counter() - start) * 1e6
+        results.append((name, len(text.encode("utf-8")), estimate_tokens(text), elapsed_us))
+
+    baseline_bytes = results[0][1] or 1
+    print(f"\n{path}")
+    print(f"{'format':<12} {'bytes':>8} {'~tokens':>8} {'vs pretty':>10} {'serialize':>12}")
+    for name, size, tokens, elapsed_us in results:
+        print(f"{name:<12} {size:>8} {tokens:>8} {size / baseline_bytes:>9.0%} {elapsed_us:>9.1f} us")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("kb_files", nargs="*", default=[os.path.join(ENDPOINT_DIR, "kb.yaml")])
+    args = parser.parse_args()
+    for path in args.kb_files:
+        report(path)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+"""Micro-benchmark: legacy f-string prompt vs. the compiled prompt template.
+
+Usage: python gemini-endpoint/benchmarks/bench_prompt.py [--iterations N] [--kb path/to/kb.yaml]
+"""
+import argparse
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+ENDPOINT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ENDPOINT_DIR)
+
+import yaml  # noqa: E402
+
+from prompt_template import PromptTemplate  # noqa: E402
+
+
+def legacy_build_system_prompt(user_prompt, product_choice, user_data, kb_content):
+    """The per-request f-string builder the template replaced (kept for comparison)."""
+    ctx_product = json.dumps(product_choice, ensure_ascii=False) if product_choice else "None"
+    ctx_user = json.dumps(user_data, ensure_ascii=False) if user_data else "{}"
+    return f"""
+    You are a specialized Window & Door Configurator Agent.
+    Your goal is to process the user's request and return a SINGLE JSON object.
+
+    **CONTEXT**
+    - User Prompt: "{user_prompt}"
+    - Current Product: {ctx_product}
+    - User Data: {ctx_user}
+
+    **KNOWLEDGE BASE**
+    {kb_content}
+
+    **MISSIONS (IN ORDER OF PRIORITY)**
+
+    1. **PRIORITY 1: HUMAN HANDOFF (EXIT)**
+       - CHECK: Does the user explicitly ask for a human, price, buying, or negotiation?
+       - ACTION: Stop configuration. Set `target: "user-data"` and `payload: {{ "talkToHuman": true }}`.
+       - MESSAGE: Friendly acknowledgment and handoff.
+
+    2. **PRIORITY 2: DATA COLLECTION (LEAD)**
+       - CHECK: Is `talkToHuman` TRUE in User Data?
+       - ACTION: Extract `userName`, `userPhone`, or `userEmail` from the prompt.
+       - OUTPUT: Set `target: "user-data"` with extracted fields.
+       - MESSAGE: Confirm receipt or ask for missing info.
+
+    3. **PRIORITY 3: PRODUCT CONFIGURATION (CORE)**
+       - CHECK: Default if P1 and P2 are not met.
+       - ACTION: Map user intent to valid product attributes.
+       - VALID ATTRIBUTES:
+         - categoria: "janela" | "porta"
+         - sistema: "janela-correr" | "porta-correr" | "maxim-ar" | "giro"
+         - persiana: "sim" | "nao"
+         - persianaMotorizada: "motorizada" | "manual" (only if persiana="sim")
+         - material: "vidro" | "vidro + veneziana" | "lambri" | "veneziana" | "vidro + lambri"
+         - folhas: 1 | 2 | 3 | 4 | 6
+       - OUTPUT: Set `target: "product-choice"` with identified attributes.
+       - MESSAGE: Helpful guidance or confirmation based on the KB.
+
+    **OUTPUT SCHEMA (STRICT JSON)**
+    {{
+      "status": "success",
+      "message": "User-facing message in Portuguese",
+      "data": {{
+        "target": "product-choice" | "user-data",
+        "payload": {{ ...values... }}
+      }}
+    }}
+    """
+
+
+def measure(label, fn, iterations):
+    """Reports mean build time and mean bytes allocated per call."""
+    fn()  # Warm up
+    start = time.perf_counter()
+    for _ in range(iterations):
+        fn()
+    elapsed = time.perf_counter() - start
+
+    samples = min(iterations, 200)
+    tracemalloc.start()
+    allocated = 0
+    for _ in range(samples):
+        tracemalloc.reset_peak()
+        base, _ = tracemalloc.get_traced_memory()
+        result = fn()
+        _, peak = tracemalloc.get_traced_memory()
+        allocated += peak - base
+        del result
+    tracemalloc.stop()
+
+    print(f"{label:<22} {elapsed / iterations * 1e6:>10.2f} us/call {allocated / samples:>12.0f} B/call")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=20000)
+    parser.add_argument("--kb", default=os.path.join(ENDPOINT_DIR, "kb.yaml"))
+    args = parser.parse_args()
+
+    with open(args.kb, "r", encoding="utf-8") as f:
+        kb_content = json.dumps(yaml.safe_load(f), indent=2, ensure_ascii=False)
+
+    user_prompt = "Quero uma janela de correr de vidro"
+    product_choice = {"categoria": "janela"}
+    user_data = {"talkToHuman": False}
+
+    compile_start = time.perf_counter()
+    template = PromptTemplate(kb_content)
+    compile_us = (time.perf_counter() - compile_start) * 1e6
+
+    print(f"KB: {args.kb} ({len(kb_content)} chars), prefix {len(template.prefix)} chars, "
+          f"compiled once in {compile_us:.1f} us")
+    measure("legacy f-string", lambda: legacy_build_system_prompt(
+        user_prompt, product_choice, user_data, kb_content), args.iterations)
+    measure("template.render", lambda: template.render(
+        user_prompt, product_choice, user_data), args.iterations)
+    measure("template.render_suffix", lambda: template.render_suffix(
+        user_prompt, product_choice, user_data), args.iterations)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""Local Gemini stand-in for benchmarks: configurable latency, errors and output size."""
+import asyncio
+import json
+import random
+import threading
+import time
+
+_FILLER = ("Temos ótimas opções de janelas e portas de alumínio para o seu projeto. "
+           "Posso te ajudar a escolher o sistema, o material e o número de folhas. ")
+
+
+class FakeModelError(RuntimeError):
+    """Injected upstream failure."""
+
+
+class FakeResponse:
+    def __init__(self, text):
+        self.text = text
+        self.usage_metadata = None
+
+
+class FakeGenerativeModel:
+    """Mimics the parts of `genai.GenerativeModel` the endpoint uses.
+
+    Latency is drawn from a log-normal distribution around `latency_ms`
+    (`latency_sigma=0` makes it fixed); `error_rate` is the probability a call
+    raises; `output_chars` sets the length of the reply's message.
+    """
+
+    def __init__(self, model_name, latency_ms=800.0, latency_sigma=0.35, error_rate=0.0,
+                 output_chars=160, stream_chunks=8, seed=None):
+        self.model_name = model_name
+        self.latency_ms = latency_ms
+        self.latency_sigma = latency_sigma
+        self.error_rate = error_rate
+        self.output_chars = output_chars
+        self.stream_chunks = stream_chunks
+        self._rng = random.Random(seed)
+        self._rng_lock = threading.Lock()
+        self.calls = 0
+
+    def _draw(self):
+        with self._rng_lock:
+            self.calls += 1
+            if self.latency_sigma > 0:
+                delay = self.latency_ms * self._rng.lognormvariate(0, self.latency_sigma)
+            else:
+                delay = self.latency_ms
+            failed = self._rng.random() < self.error_rate
+        return delay / 1000.0, failed
+
+    def _reply_text(self):
+        message = (_FILLER * (self.output_chars // len(_FILLER) + 1))[:self.output_chars]
+        return json.dumps({
+            "status": "success",
+            "message": message,
+            "data": {"target": "product-choice", "payload": {"categoria": "janela"}},
+        }, ensure_ascii=False)
+
+    def generate_content(self, prompt, generation_config=None, stream=False, **kwargs):
+        delay, failed = self._draw()
+        if stream:
+            return self._stream(delay, failed)
+        time.sleep(delay)
+        if failed:
+            raise FakeModelError("Injected upstream error")
+        return FakeResponse(self._reply_text())
+
+    def _stream(self, delay, failed):
+        text = self._reply_text()
+        size = max(1, len(text) // self.stream_chunks + 1)
+        for i in range(0, len(text), size):
+            time.sleep(delay / self.stream_chunks)
+            if failed and i > 0:
+                raise FakeModelError("Injected upstream error")
+            yield FakeResponse(text[i:i + size])
+
+    async def generate_content_async(self, prompt, generation_config=None, **kwargs):
+        delay, failed = self._draw()
+        await asyncio.sleep(delay)
+        if failed:
+            raise FakeModelError("Injected upstream error")
+        return FakeResponse(self._reply_text())
+
+    def count_tokens(self, contents):
+        return None
+
+
+def fake_model_factory(**options):
+    """Returns a `model_registry.set_model_factory` factory building fake models."""
+    return lambda model_name: FakeGenerativeModel(model_name, **options)
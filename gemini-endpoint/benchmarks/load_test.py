@@ -0,0 +1,280 @@
+"""Offline load test for `gemini_endpoint` and `gemini_chat` against a fake model.
+
+Drives the handlers in-process with the prompts in corpus.txt, using a thread
+pool for concurrency and `fake_model.FakeGenerativeModel` in place of Gemini.
+Reports throughput, p50/p95/p99 latency and per-request allocations, appends
+the run to results/history.jsonl (tagged with the current git commit) and
+compares it with the previous run that used the same settings.
+
+Usage:
+    python gemini-endpoint/benchmarks/load_test.py --target endpoint --requests 500 --concurrency 32
+    python gemini-endpoint/benchmarks/load_test.py --target both --latency-ms 1200 --error-rate 0.02
+"""
+import argparse
+import importlib.util
+import json
+import os
+import subprocess
+import sys
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+ENDPOINT_DIR = os.path.dirname(BENCH_DIR)
+SERVICE_DIR = os.path.join(os.path.dirname(ENDPOINT_DIR), "gemini-service")
+CORPUS_FILE = os.path.join(BENCH_DIR, "corpus.txt")
+RESULTS_FILE = os.path.join(BENCH_DIR, "results", "history.jsonl")
+
+TARGETS = {
+    "endpoint": (ENDPOINT_DIR, "gemini_endpoint"),
+    "service": (SERVICE_DIR, "gemini_chat"),
+}
+
+
+class BenchRequest:
+    """Minimal stand-in for the Flask request the handlers receive."""
+
+    method = "POST"
+    path = "/"
+
+    def __init__(self, payload):
+        self._payload = payload
+        self._raw = json.dumps(payload, ensure_ascii=False)
+        self.headers = {"Content-Type": "application/json", "X-Forwarded-For": "203.0.113.10"}
+        self.args = {}
+
+    @property
+    def content_length(self):
+        return len(self._raw.encode("utf-8"))
+
+    def get_data(self, as_text=False):
+        return self._raw if as_text else self._raw.encode("utf-8")
+
+    def get_json(self, silent=False):
+        return self._payload
+
+
+def load_corpus(path=CORPUS_FILE):
+    """Returns request payloads from the corpus file."""
+    payloads = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.rstrip("\n")
+            if not line.strip() or line.startswith("#"):
+                continue
+            prompt, *context = line.split("\t")
+            payload = {"prompt": prompt, "productChoice": {}, "userData": {"talkToHuman": False}}
+            if context:
+                payload["productChoice"] = json.loads(context[0])
+            if len(context) > 1:
+                payload["userData"] = json.loads(context[1])
+            payloads.append(payload)
+    return payloads
+
+
+def load_handler(target):
+    """Imports the target's main.py under a unique module name and returns its handler."""
+    directory, handler_name = TARGETS[target]
+    sys.path.insert(0, directory)
+    spec = importlib.util.spec_from_file_location(f"bench_{target}_main", os.path.join(directory, "main.py"))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module, getattr(module, handler_name)
+
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, int(round(pct / 100.0 * len(sorted_values) + 0.5)) - 1))
+    return sorted_values[index]
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=BENCH_DIR,
+            capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def run_target(args):
+    os.environ.setdefault("GEMINI_API_KEY", "bench-fake-key")
+    os.environ.setdefault("REQUEST_LOG_ENABLED", "0")  # Keep per-request log lines out of the report
+    os.environ.setdefault("RATE_LIMIT_ENABLED", "0")  # One fixed client IP would otherwise time the 429 path
+    sys.path.insert(0, BENCH_DIR)
+    from fake_model import fake_model_factory
+
+    module, handler = load_handler(args.target)
+    if args.target == "endpoint":
+        import model_registry
+        model_registry.set_model_factory(fake_model_factory(
+            latency_ms=args.latency_ms,
+            latency_sigma=args.latency_sigma,
+            error_rate=args.error_rate,
+            output_chars=args.output_chars,
+            seed=args.seed,
+        ))
+
+    corpus = load_corpus(args.corpus)
+    requests = [corpus[i % len(corpus)] for i in range(args.requests)]
+
+    def reset_caches():
+        if args.cold_cache and hasattr(module, "_RESPONSE_CACHE"):
+            module._RESPONSE_CACHE.clear()
+
+    def timed_call(payload):
+        reset_caches()
+        start = time.perf_counter()
+        body, status, _ = handler(BenchRequest(payload))
+        if not isinstance(body, (str, bytes)):
+            body = "".join(body)  # Drain streamed responses
+        return time.perf_counter() - start, status
+
+    # Warm-up (KB load, template compile, client creation)
+    handler(BenchRequest(corpus[0]))
+    reset_caches()
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        results = list(pool.map(timed_call, requests))
+    wall = time.perf_counter() - start
+
+    latencies = sorted(latency * 1000.0 for latency, _ in results)
+    statuses = {}
+    for _, status in results:
+        statuses[str(status)] = statuses.get(str(status), 0) + 1
+
+    # Allocation pass: sequential so tracemalloc attributes memory to one request at a time
+    samples = min(args.alloc_samples, len(requests))
+    tracemalloc.start()
+    allocated = []
+    for payload in requests[:samples]:
+        reset_caches()
+        tracemalloc.reset_peak()
+        base, _ = tracemalloc.get_traced_memory()
+        handler(BenchRequest(payload))
+        _, peak = tracemalloc.get_traced_memory()
+        allocated.append(peak - base)
+    tracemalloc.stop()
+    allocated.sort()
+
+    metrics = {
+        "requests": len(results),
+        "wallSeconds": round(wall, 3),
+        "throughputRps": round(len(results) / wall, 1) if wall else 0.0,
+        "p50Ms": round(percentile(latencies, 50), 2),
+        "p95Ms": round(percentile(latencies, 95), 2),
+        "p99Ms": round(percentile(latencies, 99), 2),
+        "maxMs": round(latencies[-1], 2) if latencies else 0.0,
+        "allocP50Bytes": int(percentile(allocated, 50)),
+        "allocMeanBytes": int(sum(allocated) / len(allocated)) if allocated else 0,
+        "statuses": statuses,
+    }
+    if hasattr(module, "_RESPONSE_CACHE"):
+        metrics["responseCache"] = module._RESPONSE_CACHE.stats()
+    return metrics
+
+
+def config_of(args):
+    return {
+        "target": args.target,
+        "requests": args.requests,
+        "concurrency": args.concurrency,
+        "latencyMs": args.latency_ms,
+        "latencySigma": args.latency_sigma,
+        "errorRate": args.error_rate,
+        "outputChars": args.output_chars,
+        "coldCache": args.cold_cache,
+        "corpus": os.path.basename(args.corpus),
+    }
+
+
+def previous_run(config):
+    if not os.path.exists(RESULTS_FILE):
+        return None
+    match = None
+    with open(RESULTS_FILE, "r", encoding="utf-8") as f:
+        for line in f:
+            record = json.loads(line)
+            if record.get("config") == config:
+                match = record
+    return match
+
+
+def report(config, metrics, previous):
+    print(f"\n=== {config['target']} @ {git_commit()} "
+          f"({config['requests']} req, concurrency {config['concurrency']}, "
+          f"fake latency {config['latencyMs']} ms, errors {config['errorRate']:.0%}) ===")
+    rows = [
+        ("throughput (req/s)", "throughputRps"),
+        ("p50 latency (ms)", "p50Ms"),
+        ("p95 latency (ms)", "p95Ms"),
+        ("p99 latency (ms)", "p99Ms"),
+        ("alloc p50 (bytes)", "allocP50Bytes"),
+        ("alloc mean (bytes)", "allocMeanBytes"),
+    ]
+    for label, key in rows:
+        line = f"{label:<20} {metrics[key]:>12}"
+        if previous:
+            before = previous["metrics"].get(key)
+            if before:
+                line += f"   (was {before} @ {previous['commit']}, {(metrics[key] - before) / before:+.1%})"
+        print(line)
+    print(f"{'statuses':<20} {metrics['statuses']}")
+    if "responseCache" in metrics:
+        cache = metrics["responseCache"]
+        print(f"{'response cache':<20} hits {cache['hits']}, misses {cache['misses']}")
+
+
+def save(config, metrics):
+    os.makedirs(os.path.dirname(RESULTS_FILE), exist_ok=True)
+    record = {"timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"), "commit": git_commit(),
+              "config": config, "metrics": metrics}
+    with open(RESULTS_FILE, "a", encoding="utf-8") as f:
+        f.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--target", choices=["endpoint", "service", "both"], default="endpoint")
+    parser.add_argument("--requests", type=int, default=400)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--latency-ms", type=float, default=800.0, help="Median fake model latency")
+    parser.add_argument("--latency-sigma", type=float, default=0.35, help="Log-normal spread (0 = fixed)")
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--output-chars", type=int, default=160)
+    parser.add_argument("--seed", type=int, default=1234)
+    parser.add_argument("--cold-cache", action="store_true", help="Clear the response cache before every request")
+    parser.add_argument("--alloc-samples", type=int, default=50)
+    parser.add_argument("--corpus", default=CORPUS_FILE)
+    parser.add_argument("--no-save", action="store_true")
+    args = parser.parse_args()
+
+    if args.target == "both":
+        # Each service imports its own sibling modules, so run them in separate processes
+        failed = False
+        for target in ("endpoint", "service"):
+            argv = [sys.executable, __file__, "--target", target]
+            for name, value in vars(args).items():
+                flag = "--" + name.replace("_", "-")
+                if name == "target" or value is False:
+                    continue
+                argv += [flag] if value is True else [flag, str(value)]
+            failed |= subprocess.run(argv, check=False).returncode != 0
+        sys.exit(1 if failed else 0)
+
+    config = config_of(args)
+    previous = previous_run(config)
+    metrics = run_target(args)
+    report(config, metrics, previous)
+    if set(metrics["statuses"]) != {"200"}:
+        sys.exit(f"Non-200 responses {metrics['statuses']}: the latencies above do not measure the model path.")
+    if not args.no_save:
+        save(config, metrics)
+
+
+if __name__ == "__main__":
+    main()
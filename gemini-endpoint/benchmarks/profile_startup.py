@@ -0,0 +1,124 @@
+"""Cold-start profiler for gemini-endpoint/main.py.
+
+Imports `main` in a fresh interpreter under `python -X importtime`, reports
+the slowest modules by cumulative and self import time, then times a first
+preflight, fast-path answer and model call, listing which heavy modules
+(google.generativeai, yaml) each one loaded.
+
+Usage:
+    python gemini-endpoint/benchmarks/profile_startup.py [--top 15] [--no-warmup]
+"""
+import argparse
+import json
+import os
+import re
+import subprocess
+import sys
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+ENDPOINT_DIR = os.path.dirname(BENCH_DIR)
+
+HEAVY_MODULES = ["google.generativeai", "yaml", "flask"]
+
+PATTERN_IMPORTTIME = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+
+# Runs in the child interpreter; prints one JSON line with first-request timings
+_PROBE = r"""
+import json, sys, time
+HEAVY = %(heavy)r
+MARKER = %(marker)r
+def loaded():
+    return sorted(name for name in HEAVY if name in sys.modules)
+
+class Request:
+    def __init__(self, method, payload=None):
+        self.method, self.path, self.args, self._payload = method, "/", {}, payload
+        self.headers = {"Content-Type": "application/json"}
+    def get_json(self, silent=False):
+        return self._payload
+
+started = time.perf_counter()
+import main
+print(MARKER, file=sys.stderr, flush=True)
+report = {"importMs": (time.perf_counter() - started) * 1000.0, "afterImport": loaded()}
+for label, request in [
+    ("options", Request("OPTIONS")),
+    ("fastPath", Request("POST", {"prompt": "porta de correr", "productChoice": {}, "userData": {}})),
+    ("model", Request("POST", {"prompt": "qual a garantia?", "productChoice": {}, "userData": {}})),
+]:
+    started = time.perf_counter()
+    main.gemini_endpoint(request)
+    report[label + "Ms"] = (time.perf_counter() - started) * 1000.0
+    report["after" + label[0].upper() + label[1:]] = loaded()
+print("PROBE " + json.dumps(report))
+"""
+_MARKER = "-- main imported --"
+
+
+def parse_importtime(stderr):
+    """Returns [(module, self_us, cumulative_us, depth)] for imports made by `import main`."""
+    rows = []
+    for line in stderr.splitlines():
+        if line == _MARKER:
+            break  # Later imports belong to the first requests
+        match = PATTERN_IMPORTTIME.match(line)
+        if match:
+            self_us, cumulative_us, indent, module = match.groups()
+            rows.append((module, int(self_us), int(cumulative_us), (len(indent) - 1) // 2))
+    return rows
+
+
+def run_probe(no_warmup):
+    env = {**os.environ, "REQUEST_LOG_ENABLED": "0", "KB_RELOAD_INTERVAL_SECONDS": "0"}
+    env.setdefault("GEMINI_API_KEY", "profile-fake-key")
+    if no_warmup:
+        env["GEMINI_WARMUP_MODELS"] = ""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", _PROBE % {"heavy": HEAVY_MODULES, "marker": _MARKER}],
+        cwd=ENDPOINT_DIR, env=env, capture_output=True, text=True
+    )
+    probe = None
+    for line in result.stdout.splitlines():
+        if line.startswith("PROBE "):
+            probe = json.loads(line[len("PROBE "):])
+    if probe is None:
+        print(result.stderr[-2000:], file=sys.stderr)
+        sys.exit("Startup probe failed")
+    return parse_importtime(result.stderr), probe
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--top", type=int, default=15)
+    parser.add_argument("--no-warmup", action="store_true",
+                        help="Run with GEMINI_WARMUP_MODELS='' (SDK import deferred to the first model call)")
+    args = parser.parse_args()
+
+    rows, probe = run_probe(args.no_warmup)
+    main_index = next(i for i, row in enumerate(rows) if row[0] == "main" and row[3] == 0)
+    direct = []  # importtime prints a module's imports before the module itself
+    for row in reversed(rows[:main_index]):
+        if row[3] == 0:
+            break
+        if row[3] == 1:
+            direct.append(row)
+    print(f"=== import main: {probe['importMs']:.1f} ms wall, "
+          f"{rows[main_index][2] / 1000.0:.1f} ms cumulative import time ===")
+
+    print(f"\n{'cumulative ms':>14} {'self ms':>9}  module (imported by main)")
+    for module, self_us, cumulative_us, _ in sorted(direct, key=lambda row: -row[2])[:args.top]:
+        print(f"{cumulative_us / 1000.0:>14.1f} {self_us / 1000.0:>9.1f}  {module}")
+
+    print(f"\n{'self ms':>14}  module (any depth)")
+    for module, self_us, _, _ in sorted(rows, key=lambda row: -row[1])[:args.top]:
+        print(f"{self_us / 1000.0:>14.1f}  {module}")
+
+    print("\nfirst requests:")
+    print(f"  after import     {'':>10}  loaded: {', '.join(probe['afterImport']) or '-'}")
+    for label in ("options", "fastPath", "model"):
+        key = "after" + label[0].upper() + label[1:]
+        print(f"  {label:<16} {probe[label + 'Ms']:>8.1f} ms  loaded: {', '.join(probe[key]) or '-'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""Build step: extracts PRODUCT_CATALOG from scripts/productCatalog.js into catalog.json.
+
+The browser catalog stays the single source of truth; this script copies it
+into the endpoint folder (which deploys on its own) for `catalog.py`. Re-run
+it whenever productCatalog.js changes.
+
+Usage:
+    python gemini-endpoint/build_catalog.py [path/to/productCatalog.js] [--output catalog.json]
+"""
+import argparse
+import hashlib
+import json
+import os
+import re
+import sys
+
+ENDPOINT_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_SOURCE = os.path.join(os.path.dirname(ENDPOINT_DIR), "scripts", "productCatalog.js")
+DEFAULT_OUTPUT = os.path.join(ENDPOINT_DIR, "catalog.json")
+
+PATTERN_CATALOG = re.compile(r"export\s+const\s+PRODUCT_CATALOG\s*=\s*\[(.*?)\n\];", re.S)
+PATTERN_LINE_COMMENT = re.compile(r"^\s*//.*$", re.M)
+PATTERN_TRAILING_COMMA = re.compile(r",(\s*[\]}])")
+
+
+def extract_products(js_source):
+    """Returns the product list from the JS module's PRODUCT_CATALOG literal."""
+    match = PATTERN_CATALOG.search(js_source)
+    if not match:
+        raise ValueError("PRODUCT_CATALOG array not found")
+    body = PATTERN_LINE_COMMENT.sub("", match.group(1))
+    body = PATTERN_TRAILING_COMMA.sub(r"\1", "[" + body + "]")
+    return json.loads(body)
+
+
+def build(source, output):
+    with open(source, "rb") as f:
+        raw = f.read()
+    products = extract_products(raw.decode("utf-8"))
+    artifact = {
+        "source": os.path.relpath(source, os.path.dirname(ENDPOINT_DIR)).replace(os.sep, "/"),
+        "sourceHash": hashlib.sha256(raw).hexdigest(),
+        "products": products,
+    }
+    # One product per line keeps catalog diffs readable
+    lines = [json.dumps(product, ensure_ascii=False) for product in products]
+    header = json.dumps({key: value for key, value in artifact.items() if key != "products"}, ensure_ascii=False)
+    with open(output, "w", encoding="utf-8") as f:
+        f.write(header[:-1] + ', "products": [\n  ' + ",\n  ".join(lines) + "\n]}\n")
+    return len(products)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("source", nargs="?", default=DEFAULT_SOURCE)
+    parser.add_argument("--output", default=DEFAULT_OUTPUT)
+    args = parser.parse_args()
+    try:
+        count = build(args.source, args.output)
+    except (OSError, ValueError) as e:
+        print(f"Error building catalog: {e}", file=sys.stderr)
+        sys.exit(1)
+    print(f"Wrote {args.output} ({count} products)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+"""Build step: compiles kb.yaml into kb.compiled.json.
+
+The artifact holds the parsed KB plus the sha256 of the source bytes it was
+built from. `kb_manager.KnowledgeBase` loads it with the stdlib JSON parser
+instead of importing PyYAML at runtime, and ignores it if kb.yaml changed
+since the build.
+
+Usage:
+    python gemini-endpoint/build_kb.py [kb.yaml] [--output kb.compiled.json]
+"""
+import argparse
+import hashlib
+import json
+import os
+import sys
+
+import yaml
+
+from kb_manager import compiled_path_for
+
+
+DEFAULT_SOURCE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "kb.yaml")
+
+
+def compile_kb(source, output=None):
+    """Writes the compiled artifact for `source` and returns its path."""
+    output = output or compiled_path_for(source)
+    with open(source, "rb") as f:
+        raw = f.read()
+    artifact = {
+        "source": os.path.basename(source),
+        "sourceHash": hashlib.sha256(raw).hexdigest(),
+        "data": yaml.safe_load(raw.decode("utf-8")),
+    }
+    temp = output + ".tmp"
+    with open(temp, "w", encoding="utf-8") as f:
+        json.dump(artifact, f, ensure_ascii=False, separators=(",", ":"))
+    os.replace(temp, output)
+    return output
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("source", nargs="?", default=DEFAULT_SOURCE)
+    parser.add_argument("--output", help="Defaults to <source>.compiled.json")
+    args = parser.parse_args()
+    try:
+        output = compile_kb(args.source, args.output)
+    except (OSError, yaml.YAMLError) as e:
+        print(f"Error compiling KB: {e}", file=sys.stderr)
+        sys.exit(1)
+    print(f"Wrote {output} ({os.path.getsize(output)} bytes)")
+
+
+if __name__ == "__main__":
+    main()
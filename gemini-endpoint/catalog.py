@@ -0,0 +1,234 @@
+"""Product catalog facet index (mirror of the browser's filter logic).
+
+Loads catalog.json (built from scripts/productCatalog.js by build_catalog.py)
+and keeps one integer bitset per facet value, bit i set when product i has
+that value. Filtering a selection is an AND of a few ints, so resolving the
+remaining options and matching products needs no model call. Semantics follow
+`applyFilters` / `runFacetLoop` in scripts/logic.js: `persianaMotorizada` only
+applies when `persiana` is "sim".
+"""
+import json
+import os
+import threading
+
+from intents import parse_facets
+from schema import ATTRIBUTE_LABELS, TARGET_PRODUCT, VALID_ATTRIBUTES, make_response
+from textnorm import PATTERN_TOKEN, fold
+
+
+# Configuration
+CATALOG_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "catalog.json")
+CATALOG_MAX_SLUGS = int(os.environ.get("CATALOG_MAX_SLUGS", 10))
+
+FACET_ORDER = ["categoria", "sistema", "persiana", "persianaMotorizada", "material", "folhas"]
+
+FACET_NAMES = {
+    "categoria": "produto",
+    "sistema": "sistema de abertura",
+    "persiana": "persiana",
+    "persianaMotorizada": "acionamento da persiana",
+    "material": "material",
+    "folhas": "número de folhas",
+}
+
+# Words naming a facet in questions like "quais materiais vocês têm?"
+_FACET_WORDS = {
+    "produto": "categoria", "produtos": "categoria", "categoria": "categoria", "categorias": "categoria",
+    "sistema": "sistema", "sistemas": "sistema", "abertura": "sistema", "aberturas": "sistema",
+    "persianas": "persiana", "acionamento": "persianaMotorizada",
+    "material": "material", "materiais": "material", "preenchimento": "material",
+    "folhas": "folhas", "modulos": "folhas",
+}
+_OPTION_WORDS = frozenset("opcoes opcao modelos tipos disponiveis alternativas".split())
+_QUESTION_WORDS = frozenset("""
+    quais qual que sao as os de da do das dos para pra e com voces vcs tem temos tenho
+    existem ha oferecem disponivel me mostre mostra mostrar ver outras outros o a eu
+""".split())
+
+
+def _bits(bitset):
+    """Yields the index of every set bit, lowest first."""
+    while bitset:
+        low = bitset & -bitset
+        yield low.bit_length() - 1
+        bitset ^= low
+
+
+def popcount(bitset):
+    return bin(bitset).count("1")
+
+
+def apply_payload(product_choice, payload):
+    """The selection after applying a reply payload, as `calculateNextSelections` does.
+
+    Facets are applied in facet order; a facet whose value changes clears
+    every later facet, so a category switch drops the old system, material...
+    """
+    selections = {key: value for key, value in (product_choice or {}).items() if key in VALID_ATTRIBUTES}
+    for index, facet in enumerate(FACET_ORDER):
+        if facet not in payload:
+            continue
+        if selections.get(facet) != payload[facet]:
+            for later in FACET_ORDER[index + 1:]:
+                selections.pop(later, None)
+        selections[facet] = payload[facet]
+    return selections
+
+
+class CatalogIndex:
+    """Bitset posting lists per (facet, value) over an immutable product list."""
+
+    def __init__(self, products):
+        self.products = products
+        self.all = (1 << len(products)) - 1
+        self.postings = {facet: {} for facet in FACET_ORDER}
+        for i, product in enumerate(products):
+            for facet in FACET_ORDER:
+                value = product.get(facet)
+                if value is not None:
+                    self.postings[facet][value] = self.postings[facet].get(value, 0) | (1 << i)
+
+    @classmethod
+    def load(cls, path=CATALOG_FILE):
+        with open(path, "r", encoding="utf-8") as f:
+            return cls(json.load(f)["products"])
+
+    def match(self, selections):
+        """Bitset of products matching `selections` (None values are unselected)."""
+        bitset = self.all
+        for facet in FACET_ORDER:
+            value = selections.get(facet)
+            if value is None:
+                continue
+            if facet == "persianaMotorizada" and selections.get("persiana") != "sim":
+                continue
+            bitset &= self.postings[facet].get(value, 0)
+        return bitset
+
+    def options(self, facet, bitset):
+        """Values of `facet` present among `bitset`, in schema order."""
+        postings = self.postings[facet]
+        return [value for value in VALID_ATTRIBUTES[facet] if postings.get(value, 0) & bitset]
+
+    def slugs(self, bitset, limit=CATALOG_MAX_SLUGS):
+        result = []
+        for i in _bits(bitset):
+            if len(result) == limit:
+                break
+            result.append(self.products[i]["slug"])
+        return result
+
+    def _applicable(self, facet, selections):
+        return facet != "persianaMotorizada" or selections.get("persiana") == "sim"
+
+    def summary(self, selections):
+        """Matching count, first slugs and remaining options for unselected facets."""
+        bitset = self.match(selections)
+        remaining = {}
+        for facet in FACET_ORDER:
+            if selections.get(facet) is None and self._applicable(facet, selections):
+                values = self.options(facet, bitset)
+                if values:
+                    remaining[facet] = values
+        return {"matches": popcount(bitset), "slugs": self.slugs(bitset), "options": remaining}
+
+    def next_question(self, selections):
+        """First unselected facet with more than one option (single options auto-resolve)."""
+        selections = dict(selections)
+        for facet in FACET_ORDER:
+            if selections.get(facet) is not None or not self._applicable(facet, selections):
+                continue
+            values = self.options(facet, self.match(selections))
+            if len(values) > 1:
+                return facet, values
+            if len(values) == 1:
+                selections[facet] = values[0]
+        return None, []
+
+    def constrain(self, product_choice, payload):
+        """Drops payload facets that would leave no matching product.
+
+        A payload that changes an earlier choice is checked on its own (the
+        user switched products); otherwise facets are kept in facet order while
+        something still matches `product_choice` plus the kept facets. Returns
+        (payload, dropped facets).
+        """
+        selected = {key: value for key, value in (product_choice or {}).items() if key in VALID_ATTRIBUTES}
+        if self.match({**selected, **payload}):
+            return payload, []
+        if any(key in selected and selected[key] != value for key, value in payload.items()):
+            selected = {}
+            if self.match(payload):
+                return payload, []
+        result, dropped = {}, []
+        for facet in FACET_ORDER:
+            if facet not in payload:
+                continue
+            if self.match({**selected, **result, facet: payload[facet]}):
+                result[facet] = payload[facet]
+            else:
+                dropped.append(facet)
+        return result, dropped
+
+    def answer_options(self, prompt, product_choice):
+        """Answers "quais opções...?" questions from the index, or returns None."""
+        tokens = PATTERN_TOKEN.findall(fold(prompt))
+        if not tokens or len(tokens) > 12 or not (_OPTION_WORDS & set(tokens) or set(tokens) & set(_FACET_WORDS)):
+            return None
+        if not {"quais", "qual", "que", "opcoes", "opcao"} & set(tokens):
+            return None
+        asked = None
+        rest = []
+        for token in tokens:
+            if token in _FACET_WORDS:
+                asked = _FACET_WORDS[token]
+            elif token not in _OPTION_WORDS and token not in _QUESTION_WORDS:
+                rest.append(token)
+        stated = {}
+        if rest:
+            stated = parse_facets(rest, product_choice)
+            if not stated:
+                return None  # Something other than facets: let the model handle it
+
+        selections = {**(product_choice or {}), **stated}
+        selections = {key: value for key, value in selections.items() if key in VALID_ATTRIBUTES}
+        bitset = self.match(selections)
+        if not bitset:
+            return None
+        if asked is not None and selections.get(asked) is None and self._applicable(asked, selections):
+            values = self.options(asked, bitset)
+        else:
+            asked, values = self.next_question(selections)
+
+        chosen = [ATTRIBUTE_LABELS[facet][selections[facet]] for facet in FACET_ORDER
+                  if selections.get(facet) is not None and facet != "persiana"]
+        intro = f"Para {', '.join(chosen)}, " if chosen else ""
+        if asked is None:
+            count = popcount(bitset)
+            message = f"{intro}temos {count} produto{'s' if count != 1 else ''} disponíve{'is' if count != 1 else 'l'}."
+        elif len(values) == 1:
+            message = f"{intro}a opção de {FACET_NAMES[asked]} é: {ATTRIBUTE_LABELS[asked][values[0]]}."
+        else:
+            labels = [ATTRIBUTE_LABELS[asked][value] for value in values]
+            message = f"{intro}as opções de {FACET_NAMES[asked]} são: {', '.join(labels[:-1])} e {labels[-1]}."
+        message = message[0].upper() + message[1:]
+        return make_response(message, TARGET_PRODUCT, stated)
+
+
+_CATALOG = None
+_CATALOG_LOCK = threading.Lock()
+
+
+def get_catalog():
+    """Returns the process-wide index, loading catalog.json on first use (None if missing)."""
+    global _CATALOG
+    if _CATALOG is None:
+        with _CATALOG_LOCK:
+            if _CATALOG is None:
+                try:
+                    _CATALOG = CatalogIndex.load()
+                except (OSError, ValueError, KeyError) as e:
+                    import sys
+                    print(f"Error loading catalog: {e}", file=sys.stderr)
+                    _CATALOG = CatalogIndex([])
+    return _CATALOG if _CATALOG.products else None
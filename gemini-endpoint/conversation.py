@@ -0,0 +1,112 @@
+"""Token-budgeted conversation memory for the optional `history` input.
+
+Clients send prior turns as `[{"role": "user" | "assistant", "content": "...",
+"data": {...}}]` (oldest first; `data` is the assistant reply's `data` block).
+The most recent messages are kept verbatim; older ones are compacted into a
+short summary of what the user asked plus the configuration changes the
+assistant made. The rendered section never exceeds its token budget, so the
+prompt stays flat however long the session gets.
+"""
+import json
+import os
+
+from schema import TARGET_PRODUCT, USER_DATA_FIELDS
+from tokens import estimate_tokens
+
+
+# Configuration
+CONTEXT_TOKEN_BUDGET = int(os.environ.get("CONTEXT_TOKEN_BUDGET", 600))  # whole CONTEXT section
+HISTORY_RECENT_MESSAGES = int(os.environ.get("HISTORY_RECENT_MESSAGES", 6))
+HISTORY_MAX_MESSAGES = 100  # Anything older is ignored outright
+MESSAGE_MAX_CHARS = 400
+SUMMARY_ASK_WORDS = 12
+
+ROLE_LABELS = {"user": "User", "assistant": "Assistant"}
+_ROLE_ALIASES = {"user": "user", "assistant": "assistant", "model": "assistant", "bot": "assistant"}
+
+
+def _clip(text, limit):
+    text = " ".join(str(text).split())
+    return text if len(text) <= limit else text[:limit - 1].rstrip() + "…"
+
+
+def parse_history(history):
+    """Returns [(role, text, data)] from the request's `history`, or raises ValueError."""
+    if history is None:
+        return []
+    if not isinstance(history, list):
+        raise ValueError("'history' must be a list of {role, content} objects")
+    turns = []
+    for item in history[-HISTORY_MAX_MESSAGES:]:
+        if not isinstance(item, dict):
+            continue
+        role = _ROLE_ALIASES.get(str(item.get("role", "")).lower())
+        text = item.get("content", item.get("message"))
+        if role is None or not isinstance(text, str) or not text.strip():
+            continue
+        data = item.get("data") if role == "assistant" and isinstance(item.get("data"), dict) else None
+        turns.append((role, text, data))
+    return turns
+
+
+def summarize(turns):
+    """Compacts older turns into (user asks, state lines): what was asked and what changed."""
+    asks = []
+    product = {}
+    contact = set()
+    for role, text, data in turns:
+        if role == "user":
+            words = text.split()
+            asks.append(" ".join(words[:SUMMARY_ASK_WORDS]) + (" …" if len(words) > SUMMARY_ASK_WORDS else ""))
+        elif data and isinstance(data.get("payload"), dict):
+            if data.get("target") == TARGET_PRODUCT:
+                product.update(data["payload"])
+            else:
+                contact.update(field for field in data["payload"] if field in USER_DATA_FIELDS)
+    state = []
+    if product:
+        state.append("- Configuration set: " + json.dumps(product, ensure_ascii=False, sort_keys=True))
+    if contact:
+        state.append("- Contact fields exchanged: " + ", ".join(sorted(contact)))
+    return asks, state
+
+
+def _render(asks, state, recent):
+    body = ""
+    if asks or state:
+        body += "Earlier turns (summarized):\n"
+        if asks:
+            body += "- User asked: " + "; ".join(f'"{ask}"' for ask in asks) + "\n"
+        body += "".join(line + "\n" for line in state)
+    if recent:
+        body += "Recent messages:\n" + "\n".join(recent) + "\n"
+    return f"**CONVERSATION SO FAR** (oldest first)\n{body}\n" if body else ""
+
+
+def render_history(history, reserved_tokens=0, token_budget=CONTEXT_TOKEN_BUDGET,
+                   recent_messages=HISTORY_RECENT_MESSAGES):
+    """Renders the conversation section within `token_budget - reserved_tokens` tokens.
+
+    `reserved_tokens` is what the rest of the context section already costs.
+    Returns "" when there is no history or no room for it.
+    """
+    turns = parse_history(history)
+    budget = token_budget - reserved_tokens
+    if not turns or budget <= 0:
+        return ""
+
+    split = max(0, len(turns) - recent_messages)
+    asks, state = summarize(turns[:split])
+    recent = [f"- {ROLE_LABELS[role]}: {_clip(text, MESSAGE_MAX_CHARS)}" for role, text, _ in turns[split:]]
+
+    # Over budget: drop the oldest asks, then the state lines, then the oldest verbatim messages
+    while True:
+        section = _render(asks, state, recent)
+        if not section or estimate_tokens(section) <= budget:
+            return section
+        if asks:
+            asks.pop(0)
+        elif state:
+            state.pop()
+        else:
+            recent.pop(0)
@@ -0,0 +1,197 @@
+"""Rule-based fast path for unambiguous turns.
+
+Mirrors the mission priorities of `build_system_prompt` for messages that do
+not need the model: explicit handoff requests, contact details while
+`talkToHuman` is set, and short answers made only of facet values. Anything
+the rules cannot account for returns None and falls through to Gemini.
+"""
+import re
+
+from schema import ATTRIBUTE_LABELS, TARGET_PRODUCT, TARGET_USER, make_response
+from textnorm import PATTERN_TOKEN, fold
+
+
+# Configuration
+HANDOFF_MAX_TOKENS = 8  # Longer messages may carry a KB question for the model
+
+# Precompiled Patterns (matched against accent-folded, lower-case text)
+PATTERN_HANDOFF = re.compile(
+    r"\b(?:precos?|quanto (?:custa|sai|fica)|comprar|negociar|desconto|orcamentos?"
+    r"|atendente|especialista|vendedor|falar com (?:um |uma |alguem|humano|pessoa)"
+    r"|(?:um|uma) (?:humano|pessoa))\b"
+)
+NEGATORS = frozenset(["nao", "nem", "sem", "nunca"])
+NEGATION_LOOKBACK = 4  # Tokens before a trigger searched for a negator (filler words are skipped)
+PATTERN_EMAIL = re.compile(r"[\w.+-]+@[\w-]+(?:\.[\w-]+)+")
+PATTERN_PHONE = re.compile(r"(?<!\w)(?:\+?55[\s.-]?)?\(?\d{2}\)?[\s.-]?9?\d{4}[\s.-]?\d{4}(?!\w)")
+
+# Phrase table: token sequence -> list of (attribute, value).
+# "correr" is resolved against `categoria` once the whole message is parsed.
+_FACET_PHRASES = {
+    ("janela",): [("categoria", "janela")],
+    ("janelas",): [("categoria", "janela")],
+    ("porta",): [("categoria", "porta")],
+    ("portas",): [("categoria", "porta")],
+    ("correr",): [("sistema", "correr")],
+    ("de", "correr"): [("sistema", "correr")],
+    ("deslizante",): [("sistema", "correr")],
+    ("maxim", "ar"): [("sistema", "maxim-ar")],
+    ("maximar",): [("sistema", "maxim-ar")],
+    ("basculante",): [("sistema", "maxim-ar")],
+    ("giro",): [("sistema", "giro")],
+    ("de", "giro"): [("sistema", "giro")],
+    ("com", "persiana"): [("persiana", "sim")],
+    ("sem", "persiana"): [("persiana", "nao")],
+    ("motorizada",): [("persiana", "sim"), ("persianaMotorizada", "motorizada")],
+    ("com", "motor"): [("persiana", "sim"), ("persianaMotorizada", "motorizada")],
+    ("automatica",): [("persiana", "sim"), ("persianaMotorizada", "motorizada")],
+    ("manual",): [("persiana", "sim"), ("persianaMotorizada", "manual")],
+    ("sem", "motor"): [("persiana", "sim"), ("persianaMotorizada", "manual")],
+    ("vidro",): [("material", "vidro")],
+    ("de", "vidro"): [("material", "vidro")],
+    ("veneziana",): [("material", "veneziana")],
+    ("lambri",): [("material", "lambri")],
+    ("lambris",): [("material", "lambri")],
+    ("vidro", "veneziana"): [("material", "vidro + veneziana")],
+    ("vidro", "e", "veneziana"): [("material", "vidro + veneziana")],
+    ("vidro", "com", "veneziana"): [("material", "vidro + veneziana")],
+    ("metade", "veneziana"): [("material", "vidro + veneziana")],
+    ("vidro", "lambri"): [("material", "vidro + lambri")],
+    ("vidro", "e", "lambri"): [("material", "vidro + lambri")],
+    ("vidro", "com", "lambri"): [("material", "vidro + lambri")],
+    ("metade", "lambri"): [("material", "vidro + lambri")],
+}
+
+_NUMBER_WORDS = {"1": 1, "um": 1, "uma": 1, "2": 2, "duas": 2, "dois": 2, "3": 3, "tres": 3,
+                 "4": 4, "quatro": 4, "6": 6, "seis": 6}
+for _word, _count in _NUMBER_WORDS.items():
+    _FACET_PHRASES[(_word, "folha")] = [("folhas", _count)]
+    _FACET_PHRASES[(_word, "folhas")] = [("folhas", _count)]
+    _FACET_PHRASES[(_word, "modulo")] = [("folhas", _count)]
+    _FACET_PHRASES[(_word, "modulos")] = [("folhas", _count)]
+
+_MAX_PHRASE_LEN = max(len(phrase) for phrase in _FACET_PHRASES)
+
+# Words that carry no facet information and may surround a facet answer
+_FILLER_WORDS = frozenset("""
+    quero queria gostaria preciso procuro busco seria sera
+    um uma uns umas o a os as de da do das dos e com para pra
+    eu me minha meu ok certo isso essa esse pode ser por favor
+""".split())
+
+# Words that may surround contact details ("meu e-mail é ...", "segue meu whats: ...")
+_CONTACT_WORDS = _FILLER_WORDS | frozenset("""
+    e mail email telefone fone celular whatsapp whats zap numero contato
+    segue aqui esta ta la no na meus minhas ou tambem obrigado obrigada valeu
+""".split())
+
+
+def match_intent(prompt, product_choice, user_data):
+    """Returns a response dict for unambiguous messages, or None to use the model."""
+    user_data = user_data or {}
+    product_choice = product_choice or {}
+    folded = fold(prompt)
+    tokens = PATTERN_TOKEN.findall(folded)
+    if not tokens:
+        return None
+
+    # Priority 2: data collection while a handoff is in progress
+    if user_data.get("talkToHuman"):
+        return _match_contact(prompt, user_data)
+
+    # Priority 1: explicit handoff
+    if len(tokens) <= HANDOFF_MAX_TOKENS and _asks_handoff(folded):
+        return make_response(
+            "Claro! Vou te conectar com um de nossos especialistas. "
+            "Para isso, pode me informar seu nome e um telefone ou e-mail para contato?",
+            TARGET_USER,
+            {"talkToHuman": True},
+        )
+
+    # Priority 3: short answers made only of facet values
+    return _match_facets(tokens, product_choice)
+
+
+def _asks_handoff(folded):
+    """True if a handoff trigger appears that is not negated ("nao quero comprar", "sem desconto")."""
+    for m in PATTERN_HANDOFF.finditer(folded):
+        before = [token for token in PATTERN_TOKEN.findall(folded[:m.start()])[-NEGATION_LOOKBACK:]
+                  if token not in _FILLER_WORDS]
+        if not before or before[-1] not in NEGATORS:
+            return True
+    return False
+
+
+def _match_contact(prompt, user_data):
+    payload = {}
+    email = PATTERN_EMAIL.search(prompt)
+    if email:
+        payload["userEmail"] = email.group(0)
+    rest = PATTERN_EMAIL.sub(" ", prompt)
+    phone = PATTERN_PHONE.search(rest)
+    if phone:
+        payload["userPhone"] = re.sub(r"\D", "", phone.group(0))
+        rest = rest[:phone.start()] + " " + rest[phone.end():]
+    if not payload:
+        return None  # Names and free text need the model
+    if any(token not in _CONTACT_WORDS for token in PATTERN_TOKEN.findall(fold(rest))):
+        return None  # Something besides the contact details (a name, a question): the model reads it all
+
+    if not {**user_data, **payload}.get("userName"):
+        message = "Obrigado, anotei! Pode me informar também seu nome?"
+    else:
+        message = "Obrigado! Já tenho seus dados e um especialista entrará em contato em breve."
+    return make_response(message, TARGET_USER, payload)
+
+
+def _match_facets(tokens, product_choice):
+    payload = parse_facets(tokens, product_choice)
+    return _facet_response(payload) if payload else None
+
+
+def parse_facets(tokens, product_choice=None):
+    """Maps folded tokens made only of facet phrases and filler words to a payload.
+
+    Returns None when a token is unexplained or two phrases conflict. Also used
+    by validation.py to normalize the model's near-miss facet values.
+    """
+    product_choice = product_choice or {}
+
+    # A lone number is read as an answer to "Quantas folhas?"
+    if len(tokens) == 1 and tokens[0].isdigit():
+        count = _NUMBER_WORDS.get(tokens[0])
+        return {"folhas": count} if count is not None else None
+
+    payload = {}
+    i = 0
+    while i < len(tokens):
+        for size in range(min(_MAX_PHRASE_LEN, len(tokens) - i), 0, -1):
+            matches = _FACET_PHRASES.get(tuple(tokens[i:i + size]))
+            if matches:
+                for attribute, value in matches:
+                    if payload.get(attribute, value) != value:
+                        return None  # Conflicting values for one facet
+                    payload[attribute] = value
+                i += size
+                break
+        else:
+            if tokens[i] not in _FILLER_WORDS:
+                return None  # Unexplained word: let the model interpret it
+            i += 1
+
+    if not payload:
+        return None
+
+    if payload.get("sistema") == "correr":
+        categoria = payload.get("categoria") or product_choice.get("categoria")
+        if categoria not in ("janela", "porta"):
+            return None
+        payload["sistema"] = f"{categoria}-correr"
+
+    return payload
+
+
+def _facet_response(payload):
+    labels = [ATTRIBUTE_LABELS[attribute][value] for attribute, value in payload.items()
+              if attribute != "persiana" or "persianaMotorizada" not in payload]
+    return make_response(f"Perfeito! Anotei: {', '.join(labels)}.", TARGET_PRODUCT, payload)
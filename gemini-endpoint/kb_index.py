@@ -0,0 +1,122 @@
+"""In-memory BM25 index over knowledge base snippets.
+
+Built once per KB snapshot. In retrieval mode the prompt carries only the
+top-k snippets relevant to the user's message, within a token budget, so the
+prompt size stays flat as kb.yaml grows.
+"""
+import math
+import re
+from collections import Counter, defaultdict
+
+from textnorm import tokenize
+from tokens import estimate_tokens
+
+
+# BM25 parameters
+K1 = 1.5
+B = 0.75
+
+_STOPWORDS = frozenset("""
+    a o as os um uma uns umas de da do das dos em na no nas nos por para pra
+    com sem e ou que se ao aos como mais mas muito ja sim nao eu voce voces
+    me meu minha seu sua ele ela isso esse essa este esta qual quais quando
+    onde tem ter ser sao foi vai vou tambem so pelo pela pelos pelas
+""".split())
+
+# Common Portuguese inflectional/derivational endings (accent-folded), longest first
+_SUFFIXES = sorted("""
+    amentos imentos amento imento acoes acao mente ante ente aram eram iram amos emos imos
+    ando endo indo ados idos adas idas ado ido ada ida cao oes ais eis al el
+    am em ar er ir as es os s a o e
+""".split(), key=len, reverse=True)
+_MIN_STEM = 4
+
+_SENTENCE_SPLIT = re.compile(r"(?<=[.!?])\s+|\n+")
+
+
+def stem(token):
+    """Strips the longest known suffix, keeping at least _MIN_STEM characters."""
+    for suffix in _SUFFIXES:
+        if token.endswith(suffix) and len(token) - len(suffix) >= _MIN_STEM:
+            return token[:-len(suffix)]
+    return token
+
+
+def analyze(text):
+    """Tokenizes, drops stopwords and applies light Portuguese stemming."""
+    return [stem(token) for token in tokenize(text) if token not in _STOPWORDS]
+
+
+def extract_snippets(kb_data, path=""):
+    """Flattens parsed KB data into short, self-contained text snippets."""
+    snippets = []
+    if isinstance(kb_data, dict):
+        for key, value in kb_data.items():
+            snippets.extend(extract_snippets(value, f"{path}.{key}" if path else str(key)))
+    elif isinstance(kb_data, list):
+        if kb_data and all(not isinstance(item, (dict, list)) for item in kb_data) and len(kb_data) <= 8 \
+                and all(len(str(item)) <= 24 for item in kb_data):
+            # Short enum-like lists stay together ("folhas: 1, 2, 3")
+            snippets.append(_label(path, ", ".join(str(item) for item in kb_data)))
+        else:
+            for item in kb_data:
+                snippets.extend(extract_snippets(item, path))
+    elif kb_data is not None:
+        for sentence in _SENTENCE_SPLIT.split(str(kb_data)):
+            if sentence.strip():
+                snippets.append(_label(path, sentence.strip()))
+    return snippets
+
+
+def _label(path, text):
+    return f"{path}: {text}" if path else text
+
+
+class KBIndex:
+    """Inverted index with BM25 scoring."""
+
+    def __init__(self, snippets):
+        self.snippets = snippets
+        self.snippet_tokens = [estimate_tokens(s) for s in snippets]
+        self.postings = defaultdict(list)  # term -> [(doc_id, term frequency)]
+        self.doc_lengths = []
+        for doc_id, snippet in enumerate(snippets):
+            terms = analyze(snippet)
+            self.doc_lengths.append(len(terms))
+            for term, tf in Counter(terms).items():
+                self.postings[term].append((doc_id, tf))
+        count = len(snippets)
+        self.avg_length = (sum(self.doc_lengths) / count) if count else 0.0
+        self.idf = {
+            term: math.log(1 + (count - len(docs) + 0.5) / (len(docs) + 0.5))
+            for term, docs in self.postings.items()
+        }
+
+    @classmethod
+    def from_kb_data(cls, kb_data):
+        return cls(extract_snippets(kb_data))
+
+    def search(self, query, top_k=5):
+        """Returns [(score, doc_id)] for the best matching snippets."""
+        scores = defaultdict(float)
+        for term in set(analyze(query)):
+            idf = self.idf.get(term)
+            if idf is None:
+                continue
+            for doc_id, tf in self.postings[term]:
+                norm = 1 - B + B * (self.doc_lengths[doc_id] / self.avg_length if self.avg_length else 0)
+                scores[doc_id] += idf * tf * (K1 + 1) / (tf + K1 * norm)
+        ranked = sorted(scores.items(), key=lambda item: (-item[1], item[0]))
+        return [(score, doc_id) for doc_id, score in ranked[:top_k]]
+
+    def select(self, query, top_k=5, token_budget=400):
+        """Returns the top-k snippets for `query` that fit within `token_budget`."""
+        selected = []
+        used = 0
+        for _, doc_id in self.search(query, top_k):
+            cost = self.snippet_tokens[doc_id]
+            if used + cost > token_budget:
+                continue
+            selected.append(self.snippets[doc_id])
+            used += cost
+        return selected
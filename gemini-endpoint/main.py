@@ -10,164 +10,583 @@ except ImportError:
 import json
 import os
 import sys
-try:
-    import yaml
-except ImportError:
-    # Mock for local testing
-    class yaml:
-        @staticmethod
-        def safe_load(f):
-            return {"mock": "data"}
 
-try:
-    import google.generativeai as genai
-except ImportError:
-    # Mock for local testing
-    class genai:
-        @staticmethod
-        def configure(api_key): pass
-        class GenerativeModel:
-            def __init__(self, model_name): pass
-            def generate_content(self, prompt, generation_config=None):
-                # Return a mock response object
-                class Response:
-                    text = '{"status": "success", "message": "Mock response", "data": {"target": "product-choice", "payload": {}}}'
-                return Response()
+import model_registry
+from admission import Admission, Rejected
+from catalog import apply_payload, get_catalog
+from conversation import render_history
+from intents import match_intent
+from kb_format import get_serializer
+from kb_index import KBIndex
+from kb_manager import KnowledgeBase, compiled_path_for
+from prompt_template import get_prompt_template
+from resilience import Deadline, ModelConfigError, ModelPolicy, ModelUnavailable, degraded_reply
+from response_cache import ResponseCache, canonical_json, make_cache_key
+from schema import TARGET_PRODUCT
+from single_flight import SingleFlight
+from streaming import sse_response, stream_complete_reply, stream_model_reply, wants_stream
+from timing import HISTOGRAMS, RequestTimer
+from tokens import TOKEN_STATS, add_usage, estimate_sections, estimate_tokens, usage_counts
+from validation import InvalidReply, reask_prompt, repair_reply
 
 
 # Configuration
-MODEL_NAME = "gemini-2.5-flash"
+MODEL_NAME = model_registry.DEFAULT_MODEL
 KB_FILE = "kb.yaml"
+KB_FORMAT = os.environ.get("KB_FORMAT", "json-pretty")  # see kb_format.py
+KB_INJECTION_MODE = os.environ.get("KB_INJECTION_MODE", "full")  # "full" | "retrieval"
+KB_TOP_K = int(os.environ.get("KB_TOP_K", 5))
+KB_TOKEN_BUDGET = int(os.environ.get("KB_TOKEN_BUDGET", 400))
+GENERATION_CONFIG = {"temperature": 0.0, "response_mime_type": "application/json"}
+TIMINGS_ENDPOINT_ENABLED = os.environ.get("TIMINGS_ENDPOINT_ENABLED", "0") == "1"  # GET /_timings
+
+def _parse_yaml(text):
+    """Parses kb.yaml. PyYAML is only imported when there is no up-to-date kb.compiled.json."""
+    try:
+        import yaml
+    except ImportError:
+        return {"mock": "data"}  # Mock for local testing
+    return yaml.safe_load(text)
 
 # Global Cache
-_KB_CONTENT = None
+_KB_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), KB_FILE)
+_KB = KnowledgeBase(
+    _KB_PATH,
+    parse=_parse_yaml,
+    compiled_path=compiled_path_for(_KB_PATH),
+    serialize=get_serializer(KB_FORMAT),
+    build_index=KBIndex.from_kb_data if KB_INJECTION_MODE == "retrieval" else None
+)
+_RESPONSE_CACHE = ResponseCache()
+_SINGLE_FLIGHT = SingleFlight()
+_MODEL_POLICY = ModelPolicy()
+_ADMISSION = Admission()
 
 def load_knowledge_base():
-    """Loads and caches the knowledge base from disk."""
-    global _KB_CONTENT
-    if _KB_CONTENT:
-        return _KB_CONTENT
-    
-    try:
-        with open(KB_FILE, 'r', encoding='utf-8') as f:
-            kb_data = yaml.safe_load(f)
-        _KB_CONTENT = json.dumps(kb_data, indent=2, ensure_ascii=False)
-    except Exception as e:
-        print(f"Error loading KB: {e}", file=sys.stderr)
-        _KB_CONTENT = "{}"
-    
-    return _KB_CONTENT
+    """Returns the serialized KB from the current snapshot (see kb_manager.py)."""
+    return _KB.snapshot().content
 
-def build_system_prompt(user_prompt, product_choice, user_data, kb_content):
-    """Constructs the system prompt based on the 3-priority mission architecture."""
-    
-    # Context Serialization
-    ctx_product = json.dumps(product_choice, ensure_ascii=False) if product_choice else "None"
-    ctx_user = json.dumps(user_data, ensure_ascii=False) if user_data else "{}"
-
-    return f"""
-    You are a specialized Window & Door Configurator Agent.
-    Your goal is to process the user's request and return a SINGLE JSON object.
-
-    **CONTEXT**
-    - User Prompt: "{user_prompt}"
-    - Current Product: {ctx_product}
-    - User Data: {ctx_user}
-
-    **KNOWLEDGE BASE**
-    {kb_content}
-
-    **MISSIONS (IN ORDER OF PRIORITY)**
-
-    1. **PRIORITY 1: HUMAN HANDOFF (EXIT)**
-       - CHECK: Does the user explicitly ask for a human, price, buying, or negotiation?
-       - ACTION: Stop configuration. Set `target: "user-data"` and `payload: {{ "talkToHuman": true }}`.
-       - MESSAGE: Friendly acknowledgment and handoff.
-
-    2. **PRIORITY 2: DATA COLLECTION (LEAD)**
-       - CHECK: Is `talkToHuman` TRUE in User Data?
-       - ACTION: Extract `userName`, `userPhone`, or `userEmail` from the prompt.
-       - OUTPUT: Set `target: "user-data"` with extracted fields.
-       - MESSAGE: Confirm receipt or ask for missing info.
-
-    3. **PRIORITY 3: PRODUCT CONFIGURATION (CORE)**
-       - CHECK: Default if P1 and P2 are not met.
-       - ACTION: Map user intent to valid product attributes.
-       - VALID ATTRIBUTES:
-         - categoria: "janela" | "porta"
-         - sistema: "janela-correr" | "porta-correr" | "maxim-ar" | "giro"
-         - persiana: "sim" | "nao"
-         - persianaMotorizada: "motorizada" | "manual" (only if persiana="sim")
-         - material: "vidro" | "vidro + veneziana" | "lambri" | "veneziana" | "vidro + lambri"
-         - folhas: 1 | 2 | 3 | 4 | 6
-       - OUTPUT: Set `target: "product-choice"` with identified attributes.
-       - MESSAGE: Helpful guidance or confirmation based on the KB.
-
-    **OUTPUT SCHEMA (STRICT JSON)**
-    {{
-      "status": "success",
-      "message": "User-facing message in Portuguese",
-      "data": {{
-        "target": "product-choice" | "user-data",
-        "payload": {{ ...values... }}
-      }}
-    }}
+def kb_version():
+    """Returns the content hash identifying the current KB snapshot."""
+    return _KB.snapshot().version
+
+def build_prompt_sections(user_prompt, product_choice, user_data, kb_content, kb_index=None, history=""):
+    """Constructs the system prompt based on the 3-priority mission architecture, as [(section, text)].
+
+    Static content is compiled once per KB version (see prompt_template.py);
+    only the request context is rendered here. When `kb_index` is given, only
+    the KB snippets relevant to `user_prompt` are injected (see kb_index.py).
+    `history` is the rendered conversation section (see conversation.py).
     """
+    if kb_index is not None:
+        snippets = kb_index.select(user_prompt, KB_TOP_K, KB_TOKEN_BUDGET)
+        return get_prompt_template(None).render_sections(user_prompt, product_choice, user_data, snippets, history)
+    return get_prompt_template(kb_content).render_sections(user_prompt, product_choice, user_data, history=history)
 
-@functions_framework.http
-def gemini_endpoint(request):
-    """HTTP Cloud Function entry point."""
-    
+def build_system_prompt(user_prompt, product_choice, user_data, kb_content, kb_index=None, history=""):
+    """The system prompt as one string (see build_prompt_sections)."""
+    sections = build_prompt_sections(user_prompt, product_choice, user_data, kb_content, kb_index, history)
+    return "".join(text for _, text in sections)
+
+def render_conversation(req_json):
+    """Renders `history` within what the context budget leaves after prompt and state."""
+    reserved = (
+        estimate_tokens(str(req_json["prompt"]))
+        + estimate_tokens(canonical_json(req_json.get("productChoice")))
+        + estimate_tokens(canonical_json(req_json.get("userData")))
+        + 20  # Section labels
+    )
+    return render_history(req_json.get("history"), reserved_tokens=reserved)
+
+# Instance Start
+model_registry.warm_up()
+
+def _error(message, status, headers):
+    return (json.dumps({"status": "error", "message": message}), status, headers)
+
+def _rejected(error, headers, timer):
+    timer.fields["outcome"] = "rejected"
+    if error.retry_after is not None:
+        headers = {**headers, "Retry-After": str(error.retry_after)}
+    return _error(str(error), error.status, headers)
+
+def _timings_report(limiter=None):
+    """In-process stage histograms plus cache, coalescing and limiter counters."""
+    report = {
+        "stages": HISTOGRAMS.dump(),
+        "responseCache": _RESPONSE_CACHE.stats(),
+        "singleFlight": _SINGLE_FLIGHT.stats(),
+        "models": _MODEL_POLICY.stats(),
+        "admission": _ADMISSION.stats(),
+        "tokens": TOKEN_STATS.dump(),
+    }
+    if limiter is not None:
+        report["limiter"] = limiter.stats()
+    return report
+
+def _timed_events(events, timer, method):
+    """Times a streamed body and writes the request's log line once it ends."""
+    try:
+        with timer.span("stream"):
+            yield from events
+    finally:
+        timer.log(method, 200)
+
+def _sse(events, headers, timer, method):
+    timer.fields["stream"] = True
+    return sse_response(_timed_events(events, timer, method), {**headers, "Server-Timing": timer.server_timing()})
+
+def _observe(request, response, timer):
+    """Adds the Server-Timing header and logs buffered responses (streams log when they end)."""
+    if timer.fields.get("stream"):
+        return response
+    body, status, headers = response
+    headers = {**headers, "Server-Timing": timer.server_timing()}
+    timer.log(request.method, status)
+    return (body, status, headers)
+
+def _prepare_turn(request, timer, limiter=None):
+    """Runs every stage that precedes the model call.
+
+    Returns (response, None) when the request is answered without the model
+    (preflight, bad input, fast path, cache hit), otherwise (None, turn) where
+    `turn` carries what the model call and `_finish_turn` need. Each stage is
+    timed on `timer` (see timing.py).
+    """
     # CORS Headers
-    headers = {"Access-Control-Allow-Origin": "*"}
+    headers = {
+        "Access-Control-Allow-Origin": "*",
+        "Access-Control-Expose-Headers": "Server-Timing, X-Cache, X-Fast-Path, X-Coalesced, X-Degraded, Retry-After",
+        "Timing-Allow-Origin": "*",
+    }
     if request.method == "OPTIONS":
         headers.update({
             "Access-Control-Allow-Methods": "POST, OPTIONS",
-            "Access-Control-Allow-Headers": "Content-Type",
+            "Access-Control-Allow-Headers": "Content-Type, X-Session-Id",
             "Access-Control-Max-Age": "3600",
         })
-        return ("", 204, headers)
+        return ("", 204, headers), None
+
+    if TIMINGS_ENDPOINT_ENABLED and request.method == "GET" \
+            and getattr(request, "path", "").rstrip("/").endswith("/_timings"):
+        report = json.dumps(_timings_report(limiter), default=str)
+        return (report, 200, {**headers, "Content-Type": "application/json", "Cache-Control": "no-store"}), None
+
+    # Admission (size caps and per-client rate limits, see admission.py)
+    try:
+        _ADMISSION.check_request(request)
+    except Rejected as e:
+        return _rejected(e, headers, timer), None
 
     # Input Validation
+    with timer.span("parse"):
+        try:
+            req_json = request.get_json(silent=True)
+            if req_json is not None and not isinstance(req_json, dict):
+                return _error("Invalid JSON", 400, headers), None
+            if not req_json or "prompt" not in req_json:
+                return _error("Missing 'prompt'", 400, headers), None
+        except Exception:
+            return _error("Invalid JSON", 400, headers), None
+        try:
+            _ADMISSION.check_payload(req_json)
+        except Rejected as e:
+            return _rejected(e, headers, timer), None
+        for field in ("productChoice", "userData"):
+            if req_json.get(field) is not None and not isinstance(req_json[field], dict):
+                return _error(f"'{field}' must be an object", 400, headers), None
+
+        # Streaming is opt-in: {"stream": true} or "Accept: text/event-stream"
+        stream = wants_stream(request, req_json)
+    timer.fields["promptChars"] = len(str(req_json["prompt"]))
+
+    # Fast Path (rule-based answers that need no model call)
     try:
-        req_json = request.get_json(silent=True)
-        if not req_json or "prompt" not in req_json:
-            return (json.dumps({"status": "error", "message": "Missing 'prompt'"}), 400, headers)
-    except Exception:
-        return (json.dumps({"status": "error", "message": "Invalid JSON"}), 400, headers)
+        with timer.span("fast_path"):
+            fast_reply = match_intent(req_json["prompt"], req_json.get("productChoice"), req_json.get("userData"))
+            source = "rules"
+            catalog = get_catalog()
+            if fast_reply is None and catalog is not None:
+                fast_reply = catalog.answer_options(str(req_json["prompt"]), req_json.get("productChoice"))
+                source = "catalog"
+        if fast_reply is not None:
+            timer.fields["outcome"] = "fast_path"
+            body = json.dumps(_with_catalog(fast_reply, req_json.get("productChoice")), ensure_ascii=False)
+            fast_headers = {**headers, "X-Fast-Path": source}
+            if stream:
+                return _sse(stream_complete_reply(body), fast_headers, timer, request.method), None
+            return (body, 200, fast_headers), None
+    except Exception as e:
+        print(f"Fast path error: {e}", file=sys.stderr)
 
-    # Execution
     try:
         api_key = os.environ.get("GEMINI_API_KEY")
         if not api_key:
             raise RuntimeError("GEMINI_API_KEY not set")
 
-        kb_content = load_knowledge_base()
-        system_prompt = build_system_prompt(
-            req_json["prompt"],
-            req_json.get("productChoice"),
-            req_json.get("userData"),
-            kb_content
-        )
+        model_name = req_json.get("model", MODEL_NAME)
+        if not model_registry.is_allowed(model_name):
+            return _error(f"Model '{model_name}' is not allowed", 400, headers), None
+        timer.fields["model"] = model_name
+
+        # Conversation memory (optional `history`), compacted to the context budget
+        with timer.span("history"):
+            try:
+                history = render_conversation(req_json)
+            except ValueError as e:
+                return _error(str(e), 400, headers), None
+
+        with timer.span("kb"):
+            kb = _KB.snapshot()
+
+        # Response Cache (temperature 0.0 makes replies deterministic per state)
+        with timer.span("cache"):
+            cache_key = make_cache_key(
+                req_json["prompt"],
+                req_json.get("productChoice"),
+                req_json.get("userData"),
+                model_name,
+                kb.version,
+                history
+            )
+            cached = _RESPONSE_CACHE.get(cache_key)
+        if cached is not None:
+            timer.fields["outcome"] = "cache_hit"
+            if stream:
+                return _sse(stream_complete_reply(cached), {**headers, "X-Cache": "HIT"}, timer, request.method), None
+            return (cached, 200, {**headers, "X-Cache": "HIT"}), None
 
-        genai.configure(api_key=api_key)
-        model = genai.GenerativeModel(req_json.get("model", MODEL_NAME))
-        
-        response = model.generate_content(
-            system_prompt,
-            generation_config={"temperature": 0.0, "response_mime_type": "application/json"}
+        with timer.span("prompt"):
+            sections = build_prompt_sections(
+                req_json["prompt"],
+                req_json.get("productChoice"),
+                req_json.get("userData"),
+                kb.content,
+                kb.index,
+                history
+            )
+            system_prompt = "".join(text for _, text in sections)
+            prompt_tokens = estimate_sections(sections)
+        timer.fields["promptBytes"] = len(system_prompt.encode("utf-8"))
+        timer.fields["tokens"] = {"prompt": prompt_tokens}
+
+        with timer.span("client"):
+            model_registry.configure(api_key)
+
+    except Exception as e:
+        print(f"Internal Error: {e}", file=sys.stderr)
+        return _error(str(e), 500, headers), None
+
+    return None, {
+        "headers": headers,
+        "stream": stream,
+        "cache_key": cache_key,
+        "product_choice": req_json.get("productChoice"),
+        "system_prompt": system_prompt,
+        "prompt_tokens": prompt_tokens,
+        "usage": {},
+        "output_estimate": 0,
+        "model_name": model_name,
+        "deadline": Deadline(),
+        "timer": timer,
+    }
+
+def _stream_events(turn):
+    """SSE events for a streamed model call, under the first-chunk deadline and breakers (see resilience.py)."""
+    def open_stream(name):
+        return model_registry.get_model(name).generate_content(
+            turn["system_prompt"], generation_config=GENERATION_CONFIG, stream=True,
+            request_options={"timeout": max(0.1, turn["deadline"].remaining())}
         )
 
-        # Validate JSON response
+    def validate(text):
+        turn["output_estimate"] += estimate_tokens(text)
+        return _validate(turn, text)
+
+    def on_complete(text):
+        _RESPONSE_CACHE.put(turn["cache_key"], text)
+        _account_tokens(turn, turn["served_by"])
+
+    return stream_model_reply(
+        _MODEL_POLICY.stream(turn["model_name"], open_stream, turn["deadline"],
+                             on_model=lambda name: _served_by(turn, name)),
+        on_complete=on_complete,
+        validate=validate,
+        on_usage=lambda chunk: _record_usage(turn, chunk)
+    )
+
+def _record_usage(turn, response):
+    """Adds the exact token counts of a response (or final stream chunk) to the turn's usage."""
+    counts = usage_counts(response)
+    if counts:
+        add_usage(turn["usage"], counts)
+
+def _account_tokens(turn, model_name):
+    """Puts the turn's token counts in its log line and the rolling per-model/target totals."""
+    fields = turn["timer"].fields["tokens"]
+    fields["outputEstimate"] = turn["output_estimate"]
+    fields.update(turn["usage"])
+    TOKEN_STATS.record(model_name, turn.get("target"), turn["prompt_tokens"], turn["usage"], turn["output_estimate"])
+
+def _validate(turn, response_text):
+    """Repairs the model output against the output contract (see validation.py)."""
+    with turn["timer"].span("validate"):
+        reply, repairs = repair_reply(response_text, turn["product_choice"])
+        catalog = get_catalog()
+        if catalog is not None and reply["data"]["target"] == TARGET_PRODUCT:
+            reply["data"]["payload"], dropped = catalog.constrain(turn["product_choice"], reply["data"]["payload"])
+            repairs += [f"{facet}: no matching product" for facet in dropped]
+            reply = _with_catalog(reply, turn["product_choice"])
+    turn["target"] = reply["data"]["target"]
+    if repairs:
+        turn["timer"].fields["repairs"] = repairs
+    return reply
+
+def _with_catalog(reply, product_choice):
+    """Adds `data.catalog` (matches, slugs, remaining options) to product-choice replies."""
+    catalog = get_catalog()
+    data = reply.get("data") or {}
+    if catalog is None or data.get("target") != TARGET_PRODUCT:
+        return reply
+    data["catalog"] = catalog.summary(apply_payload(product_choice, data["payload"]))
+    return reply
+
+def _served_by(turn, model_name):
+    turn["served_by"] = model_name
+    if model_name != turn["model_name"]:
+        turn["timer"].fields["fallbackModel"] = model_name
+
+def _request_options(turn):
+    """SDK timeout of one attempt, so an attempt the policy gave up on ends instead of holding a worker."""
+    return {"timeout": max(0.1, min(_MODEL_POLICY.attempt_timeout, turn["deadline"].remaining()))}
+
+def _call_model(turn, prompt):
+    """One model call under the request deadline, with hedging and fallback (see resilience.py)."""
+    response, served = _MODEL_POLICY.run(
+        turn["model_name"],
+        lambda name: model_registry.get_model(name).generate_content(
+            prompt, generation_config=GENERATION_CONFIG, request_options=_request_options(turn)
+        ),
+        turn["deadline"]
+    )
+    _served_by(turn, served)
+    _record_usage(turn, response)
+    turn["output_estimate"] += estimate_tokens(response.text)
+    return response.text
+
+async def _call_model_async(turn, prompt):
+    async def call(name):
+        return await _generate_async(model_registry.get_model(name), prompt, _request_options(turn))
+
+    response, served = await _MODEL_POLICY.run_async(turn["model_name"], call, turn["deadline"])
+    _served_by(turn, served)
+    _record_usage(turn, response)
+    turn["output_estimate"] += estimate_tokens(response.text)
+    return response.text
+
+def _generate_reply(turn):
+    """Calls the model and returns the validated reply JSON.
+
+    Output that cannot be repaired locally is re-asked once; InvalidReply
+    propagates if the second answer is unusable too.
+    """
+    timer = turn["timer"]
+    text = _call_model(turn, turn["system_prompt"])
+    try:
+        reply = _validate(turn, text)
+    except InvalidReply as e:
+        print(f"Re-asking model: {e}", file=sys.stderr)
+        timer.fields["reask"] = str(e)
+        with timer.span("reask"):
+            text = _call_model(turn, reask_prompt(turn["system_prompt"], str(e)))
+        reply = _validate(turn, text)
+    response_text = json.dumps(reply, ensure_ascii=False)
+    _account_tokens(turn, turn["served_by"])
+    return response_text
+
+async def _generate_reply_async(turn):
+    """Async twin of `_generate_reply`."""
+    timer = turn["timer"]
+    text = await _call_model_async(turn, turn["system_prompt"])
+    try:
+        reply = _validate(turn, text)
+    except InvalidReply as e:
+        print(f"Re-asking model: {e}", file=sys.stderr)
+        timer.fields["reask"] = str(e)
+        with timer.span("reask"):
+            text = await _call_model_async(turn, reask_prompt(turn["system_prompt"], str(e)))
+        reply = _validate(turn, text)
+    response_text = json.dumps(reply, ensure_ascii=False)
+    _account_tokens(turn, turn["served_by"])
+    return response_text
+
+def _degraded(turn, error):
+    """Canned reply while no model can answer; never cached."""
+    print(f"Model unavailable: {error}", file=sys.stderr)
+    turn["timer"].fields["outcome"] = "degraded"
+    return (json.dumps(degraded_reply(), ensure_ascii=False), 200, {**turn["headers"], "X-Degraded": "1"})
+
+def _finish_turn(turn, response_text, shared=False):
+    """Caches the validated model output and builds the HTTP response."""
+    headers = turn["headers"]
+    turn["timer"].fields["outcome"] = "coalesced" if shared else "model"
+    _RESPONSE_CACHE.put(turn["cache_key"], response_text)
+    headers = {**headers, "X-Cache": "MISS"}
+    if shared:
+        headers["X-Coalesced"] = "1"
+    return (response_text, 200, headers)
+
+@functions_framework.http
+def gemini_endpoint(request):
+    """HTTP Cloud Function entry point."""
+    timer = RequestTimer()
+    response, turn = _prepare_turn(request, timer)
+    if response is None:
+        response = _run_turn(request, turn)
+    return _observe(request, response, timer)
+
+class _Releasing:
+    """Iterates `events`, calling `release` once when they end, fail, or are closed or collected.
+
+    A plain generator's `finally` never runs if it is closed before its first
+    `next()` (a client that disconnects before the body starts), which would
+    leak the shedder slot; `close()` and `__del__` cover that case.
+    """
+
+    def __init__(self, events, release):
+        self._events = events
+        self._release = release
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
         try:
-            json.loads(response.text) # Check validity
-            return (response.text, 200, headers)
-        except json.JSONDecodeError:
-            return (json.dumps({"status": "error", "message": "Model returned invalid JSON"}), 500, headers)
+            return next(self._events)
+        except BaseException:
+            self.close()
+            raise
+
+    def close(self):
+        release, self._release = self._release, None
+        if release is not None:
+            try:
+                self._events.close()
+            finally:
+                release()
+
+    def __del__(self):
+        self.close()
+
+def _run_turn(request, turn):
+    timer = turn["timer"]
+    try:
+        if turn["stream"]:
+            if _MODEL_POLICY.pick(turn["model_name"]) is None:
+                degraded = _degraded(turn, "all model circuit breakers are open")
+                return _sse(stream_complete_reply(degraded[0]), degraded[2], timer, request.method)
+            _ADMISSION.shedder.acquire()
+            timer.fields["outcome"] = "model"
+            events = _Releasing(_stream_events(turn), _ADMISSION.shedder.release)
+            return _sse(events, {**turn["headers"], "X-Cache": "MISS"}, timer, request.method)
+
+        def shed_call():
+            with _ADMISSION.shedder.slot():
+                return _generate_reply(turn)
+
+        # Identical concurrent requests share one model call (and one shedder slot)
+        with timer.span("model"):
+            response_text, shared = _SINGLE_FLIGHT.do(turn["cache_key"], shed_call)
+        return _finish_turn(turn, response_text, shared)
+
+    except Rejected as e:
+        return _rejected(e, turn["headers"], timer)
+    except ModelConfigError as e:
+        print(f"Model configuration error: {e}", file=sys.stderr)
+        return _error("Model configuration error", 500, turn["headers"])
+    except ModelUnavailable as e:
+        return _degraded(turn, e)
+    except InvalidReply as e:
+        print(f"Invalid model reply: {e}", file=sys.stderr)
+        return _error("Model returned invalid JSON", 500, turn["headers"])
+    except Exception as e:
+        print(f"Internal Error: {e}", file=sys.stderr)
+        return _error(str(e), 500, turn["headers"])
+
+async def _generate_async(model, system_prompt, request_options=None):
+    """Awaits the model call, using the SDK's native coroutine when available."""
+    import asyncio  # Deferred like every asyncio use here: the sync entry point never needs it
+    if hasattr(model, "generate_content_async"):
+        return await model.generate_content_async(system_prompt, generation_config=GENERATION_CONFIG,
+                                                  request_options=request_options)
+    return await asyncio.to_thread(model.generate_content, system_prompt, generation_config=GENERATION_CONFIG,
+                                   request_options=request_options)
+
+async def _aiter_in_thread(events, limiter):
+    """Drives a blocking event generator from a worker thread, holding a limiter slot."""
+    import asyncio
+    done = object()
+    async with limiter.slot():
+        iterator = iter(events)
+        while True:
+            event = await asyncio.to_thread(next, iterator, done)
+            if event is done:
+                break
+            yield event
+
+async def gemini_endpoint_async(request, limiter):
+    """Async entry point (see asgi.py); same contract as `gemini_endpoint`.
+
+    Model calls are awaited under `limiter`, so one instance can hold many
+    waiting conversations; requests beyond its queue limits get a 429.
+    """
+    timer = RequestTimer()
+    response, turn = _prepare_turn(request, timer, limiter)
+    if response is None:
+        response = await _run_turn_async(request, turn, limiter)
+    return _observe(request, response, timer)
+
+ASYNC_HANDLER = gemini_endpoint_async  # What asgi.py serves
+
+async def _run_turn_async(request, turn, limiter):
+    from concurrency import Overloaded
+
+    timer = turn["timer"]
+    try:
+        if turn["stream"]:
+            if _MODEL_POLICY.pick(turn["model_name"]) is None:
+                degraded = _degraded(turn, "all model circuit breakers are open")
+                return _sse(stream_complete_reply(degraded[0]), degraded[2], timer, request.method)
+            timer.fields["outcome"] = "model"
+            timer.fields["stream"] = True
+            events = _timed_events(_stream_events(turn), timer, request.method)
+            return sse_response(
+                _aiter_in_thread(events, limiter),
+                {**turn["headers"], "X-Cache": "MISS", "Server-Timing": timer.server_timing()}
+            )
+
+        async def limited_call():
+            async with limiter.slot():
+                return await _generate_reply_async(turn)
+
+        # Identical concurrent requests share one model call (and one limiter slot)
+        with timer.span("model"):
+            response_text, shared = await _SINGLE_FLIGHT.do_async(turn["cache_key"], limited_call)
+        return _finish_turn(turn, response_text, shared)
 
+    except Overloaded as e:
+        return _error(str(e), 429, {**turn["headers"], "Retry-After": str(e.retry_after)})
+    except ModelConfigError as e:
+        print(f"Model configuration error: {e}", file=sys.stderr)
+        return _error("Model configuration error", 500, turn["headers"])
+    except ModelUnavailable as e:
+        return _degraded(turn, e)
+    except InvalidReply as e:
+        print(f"Invalid model reply: {e}", file=sys.stderr)
+        return _error("Model returned invalid JSON", 500, turn["headers"])
     except Exception as e:
         print(f"Internal Error: {e}", file=sys.stderr)
-        return (json.dumps({"status": "error", "message": str(e)}), 500, headers)
+        return _error(str(e), 500, turn["headers"])
 
 # Local Testing
 if __name__ == "__main__":
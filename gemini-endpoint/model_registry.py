@@ -0,0 +1,131 @@
+"""Process-wide Gemini client registry.
+
+The SDK is configured once per API key and one `GenerativeModel` is kept per
+allowed model name, so requests reuse the same client (and its transport)
+instead of rebuilding it on every call. The SDK itself is imported on first
+use. By default that is `warm_up()` at instance start, which builds the
+DEFAULT_MODEL client; with GEMINI_WARMUP_MODELS="" the import waits for the
+first model call, so preflights, fast-path answers and cache hits never load it.
+"""
+import os
+import sys
+import threading
+
+
+# Mock for local testing
+class _MockGenai:
+    @staticmethod
+    def configure(api_key): pass
+    class GenerativeModel:
+        def __init__(self, model_name): pass
+        def generate_content(self, prompt, generation_config=None, stream=False, request_options=None):
+            # Return a mock response object (or its chunks when streaming)
+            class Response:
+                text = '{"status": "success", "message": "Mock response", "data": {"target": "product-choice", "payload": {}}}'
+            if stream:
+                class Chunk:
+                    def __init__(self, text): self.text = text
+                return [Chunk(Response.text[i:i + 16]) for i in range(0, len(Response.text), 16)]
+            return Response()
+        def count_tokens(self, contents): return None
+
+
+# Configuration
+DEFAULT_MODEL = "gemini-2.5-flash"
+ALLOWED_MODELS = [
+    name.strip()
+    for name in os.environ.get("GEMINI_ALLOWED_MODELS", "gemini-2.5-flash,gemini-2.5-flash-lite").split(",")
+    if name.strip()
+]
+WARMUP_MODELS = [
+    name.strip()
+    for name in os.environ.get("GEMINI_WARMUP_MODELS", DEFAULT_MODEL).split(",")
+    if name.strip()
+]
+WARMUP_PING = os.environ.get("GEMINI_WARMUP_PING", "0") == "1"
+
+# Global State
+_GENAI = None
+_CONFIGURED_KEY = None
+_MODELS = {}
+_MODEL_FACTORY = None  # Overrides genai.GenerativeModel (benchmarks, local stand-ins)
+_LOCK = threading.Lock()
+
+
+class ModelNotAllowedError(ValueError):
+    """Raised when a caller asks for a model outside ALLOWED_MODELS."""
+
+
+def _sdk():
+    """Imports the Gemini SDK on first use (the mock when it is not installed)."""
+    global _GENAI
+    if _GENAI is None:
+        try:
+            import google.generativeai as genai
+        except ImportError:
+            genai = _MockGenai
+        _GENAI = genai
+    return _GENAI
+
+
+def is_allowed(model_name):
+    return model_name in ALLOWED_MODELS
+
+
+def configure(api_key):
+    """Configures the SDK once; reconfigures (and drops clients) only if the key changes."""
+    global _CONFIGURED_KEY
+    if _CONFIGURED_KEY == api_key:
+        return
+    with _LOCK:
+        if _CONFIGURED_KEY != api_key:
+            _sdk().configure(api_key=api_key)
+            _MODELS.clear()
+            _CONFIGURED_KEY = api_key
+
+
+def get_model(model_name=DEFAULT_MODEL):
+    """Returns the shared client for an allowed model name."""
+    if not is_allowed(model_name):
+        raise ModelNotAllowedError(
+            f"Model '{model_name}' is not allowed. Use one of: {', '.join(ALLOWED_MODELS)}"
+        )
+    model = _MODELS.get(model_name)
+    if model is None:
+        with _LOCK:
+            model = _MODELS.get(model_name)
+            if model is None:
+                factory = _MODEL_FACTORY or _sdk().GenerativeModel
+                model = factory(model_name)
+                _MODELS[model_name] = model
+    return model
+
+
+def set_model_factory(factory):
+    """Builds clients with `factory(model_name)` instead of the SDK; None restores the SDK."""
+    global _MODEL_FACTORY
+    with _LOCK:
+        _MODEL_FACTORY = factory
+        _MODELS.clear()
+
+
+def warm_up(api_key=None):
+    """Instance start hook: configures the SDK and builds the warm-up clients.
+
+    With GEMINI_WARMUP_PING=1 each client also issues a `count_tokens` call so
+    the connection is established before the first user request arrives. With
+    no warm-up models the SDK import is deferred to the first model call.
+    """
+    api_key = api_key or os.environ.get("GEMINI_API_KEY")
+    if not api_key or not WARMUP_MODELS:
+        return  # GEMINI_WARMUP_MODELS="" keeps the SDK out of instance start
+    try:
+        configure(api_key)
+        for model_name in WARMUP_MODELS:
+            if not is_allowed(model_name):
+                continue
+            model = get_model(model_name)
+            if WARMUP_PING:
+                model.count_tokens("ping")
+    except Exception as e:
+        print(f"Model warm-up failed: {e}", file=sys.stderr)
@@ -0,0 +1,140 @@
+"""Compiled system prompt for the configurator agent.
+
+All static content (role, missions, valid attributes, output schema and the
+KB) is rendered once per KB version into `prefix`. Each request only renders
+the small context `suffix`, so the prefix is byte-identical across requests
+and eligible for provider-side prefix caching. In retrieval mode the template
+is compiled without the KB and the relevant snippets go into the suffix.
+"""
+import hashlib
+import json
+import threading
+import textwrap
+
+from schema import VALID_ATTRIBUTES
+
+
+_ATTRIBUTE_NOTES = {
+    "persianaMotorizada": ' (only if persiana="sim")',
+}
+
+_PREFIX_TEMPLATE = textwrap.dedent("""\
+    You are a specialized Window & Door Configurator Agent.
+    Your goal is to process the user's request and return a SINGLE JSON object.
+
+    **MISSIONS (IN ORDER OF PRIORITY)**
+
+    1. **PRIORITY 1: HUMAN HANDOFF (EXIT)**
+       - CHECK: Does the user explicitly ask for a human, price, buying, or negotiation?
+       - ACTION: Stop configuration. Set `target: "user-data"` and `payload: {{ "talkToHuman": true }}`.
+       - MESSAGE: Friendly acknowledgment and handoff.
+
+    2. **PRIORITY 2: DATA COLLECTION (LEAD)**
+       - CHECK: Is `talkToHuman` TRUE in User Data?
+       - ACTION: Extract `userName`, `userPhone`, or `userEmail` from the prompt.
+       - OUTPUT: Set `target: "user-data"` with extracted fields.
+       - MESSAGE: Confirm receipt or ask for missing info.
+
+    3. **PRIORITY 3: PRODUCT CONFIGURATION (CORE)**
+       - CHECK: Default if P1 and P2 are not met.
+       - ACTION: Map user intent to valid product attributes.
+       - VALID ATTRIBUTES:
+    {valid_attributes}
+       - OUTPUT: Set `target: "product-choice"` with identified attributes.
+       - MESSAGE: Helpful guidance or confirmation based on the KB.
+
+    **OUTPUT SCHEMA (STRICT JSON)**
+    {{
+      "status": "success",
+      "message": "User-facing message in Portuguese",
+      "data": {{
+        "target": "product-choice" | "user-data",
+        "payload": {{ ...values... }}
+      }}
+    }}
+
+    """)
+
+_KB_SECTION = "**KNOWLEDGE BASE**\n{kb_content}\n\n"
+
+
+def render_valid_attributes():
+    """Renders the VALID ATTRIBUTES block from the shared schema."""
+    lines = []
+    for attribute, values in VALID_ATTRIBUTES.items():
+        options = " | ".join(json.dumps(v, ensure_ascii=False) for v in values)
+        lines.append(f"     - {attribute}: {options}{_ATTRIBUTE_NOTES.get(attribute, '')}")
+    return "\n".join(lines)
+
+
+def render_kb_snippets(snippets):
+    """Renders retrieved KB snippets as the suffix's knowledge base section."""
+    lines = "\n".join(f"- {snippet}" for snippet in snippets) if snippets else "- (no relevant entries)"
+    return f"**KNOWLEDGE BASE (relevant excerpts)**\n{lines}\n\n"
+
+
+class PromptTemplate:
+    """System prompt compiled for one KB version (or without a KB for retrieval mode)."""
+
+    def __init__(self, kb_content):
+        self.kb_content = kb_content
+        self.version = hashlib.sha256(kb_content.encode("utf-8")).hexdigest()[:12] if kb_content is not None else "no-kb"
+        self.missions = _PREFIX_TEMPLATE.format(valid_attributes=render_valid_attributes())
+        self.kb_section = _KB_SECTION.format(kb_content=kb_content) if kb_content is not None else ""
+        self.prefix = self.missions + self.kb_section
+
+    def _render_context(self, user_prompt, product_choice, user_data):
+        ctx_product = json.dumps(product_choice, ensure_ascii=False) if product_choice else "None"
+        ctx_user = json.dumps(user_data, ensure_ascii=False) if user_data else "{}"
+        return (
+            "**CONTEXT**\n"
+            f'- User Prompt: "{user_prompt}"\n'
+            f"- Current Product: {ctx_product}\n"
+            f"- User Data: {ctx_user}\n"
+        )
+
+    def render_suffix(self, user_prompt, product_choice, user_data, kb_snippets=None, history=""):
+        """Renders the per-request context section.
+
+        Retrieved KB snippets and the rendered conversation section
+        (conversation.py), when given, precede it.
+        """
+        kb_section = render_kb_snippets(kb_snippets) if kb_snippets is not None else ""
+        return kb_section + history + self._render_context(user_prompt, product_choice, user_data)
+
+    def render_sections(self, user_prompt, product_choice, user_data, kb_snippets=None, history=""):
+        """Returns the prompt as [(section, text)]: missions, kb, history, context.
+
+        Joined, the texts equal `render()`; the names are what token
+        accounting reports (see tokens.py).
+        """
+        kb_section = self.kb_section + (render_kb_snippets(kb_snippets) if kb_snippets is not None else "")
+        return [
+            ("missions", self.missions),
+            ("kb", kb_section),
+            ("history", history),
+            ("context", self._render_context(user_prompt, product_choice, user_data)),
+        ]
+
+    def render_parts(self, user_prompt, product_choice, user_data, kb_snippets=None, history=""):
+        """Returns (static prefix, dynamic suffix) for callers that send them separately."""
+        return self.prefix, self.render_suffix(user_prompt, product_choice, user_data, kb_snippets, history)
+
+    def render(self, user_prompt, product_choice, user_data, kb_snippets=None, history=""):
+        return self.prefix + self.render_suffix(user_prompt, product_choice, user_data, kb_snippets, history)
+
+
+_TEMPLATE = None
+_TEMPLATE_LOCK = threading.Lock()
+
+
+def get_prompt_template(kb_content):
+    """Returns the compiled template for `kb_content`, compiling it on KB change."""
+    global _TEMPLATE
+    template = _TEMPLATE
+    if template is not None and template.kb_content == kb_content:
+        return template
+    with _TEMPLATE_LOCK:
+        if _TEMPLATE is None or _TEMPLATE.kb_content != kb_content:
+            _TEMPLATE = PromptTemplate(kb_content)
+        return _TEMPLATE
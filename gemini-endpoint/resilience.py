@@ -0,0 +1,428 @@
+"""Deadlines, hedging, fallback models and circuit breakers for model calls.
+
+`ModelPolicy.run` (threads) and `ModelPolicy.run_async` (coroutines) call the
+requested model under a per-attempt timeout and an overall request deadline.
+If an attempt is still running after the model's recent latency percentile, a
+hedged duplicate is started and the first success wins. A failed or timed-out
+model falls back to the next one in `GEMINI_FALLBACK_MODELS`. Each model has a
+`CircuitBreaker`; while every candidate's breaker is open, calls fail fast
+with `ModelUnavailable` and the handler serves `degraded_reply()`.
+`ModelPolicy.stream` applies the same chain to streamed calls until the first
+chunk arrives. Errors no retry can fix (an invalid API key, a missing
+permission) raise `ModelConfigError` at once instead.
+"""
+import os
+import threading
+import time
+from collections import deque
+
+import model_registry
+from schema import TARGET_PRODUCT, make_response
+
+
+# Configuration
+DEADLINE_SECONDS = float(os.environ.get("MODEL_DEADLINE_SECONDS", 20))
+ATTEMPT_TIMEOUT_SECONDS = float(os.environ.get("MODEL_ATTEMPT_TIMEOUT_SECONDS", 8))
+FALLBACK_MODELS = [
+    name.strip()
+    for name in os.environ.get("GEMINI_FALLBACK_MODELS", "gemini-2.5-flash-lite").split(",")
+    if name.strip()
+]
+HEDGE_ENABLED = os.environ.get("HEDGE_ENABLED", "0") == "1"
+HEDGE_PERCENTILE = float(os.environ.get("HEDGE_PERCENTILE", 95))
+HEDGE_MIN_SAMPLES = int(os.environ.get("HEDGE_MIN_SAMPLES", 20))
+HEDGE_MIN_DELAY_SECONDS = float(os.environ.get("HEDGE_MIN_DELAY_SECONDS", 0.5))
+BREAKER_FAILURE_THRESHOLD = int(os.environ.get("BREAKER_FAILURE_THRESHOLD", 5))
+BREAKER_RESET_SECONDS = float(os.environ.get("BREAKER_RESET_SECONDS", 30))
+MODEL_CALL_WORKERS = int(os.environ.get("MODEL_CALL_WORKERS", 32))
+MODEL_RESERVE_WORKERS = int(os.environ.get("MODEL_RESERVE_WORKERS", 8))  # Fallback and half-open trial calls
+
+DEGRADED_MESSAGE = (
+    "Estamos com uma instabilidade momentânea no nosso assistente. "
+    "Pode repetir sua mensagem em instantes? Se preferir, posso te conectar com um especialista."
+)
+
+
+class DeadlineExceeded(TimeoutError):
+    """The request's model budget ran out."""
+
+
+class ModelUnavailable(RuntimeError):
+    """No model could answer: every candidate failed, timed out or has an open breaker."""
+
+
+class ModelConfigError(RuntimeError):
+    """The model rejected our credentials or configuration; fallbacks would fail the same way."""
+
+
+# google.api_core / google.auth exception names, matched by name so neither needs importing
+_CONFIG_ERROR_TYPES = frozenset({"Unauthenticated", "PermissionDenied", "DefaultCredentialsError", "RefreshError"})
+_CONFIG_ERROR_MESSAGES = ("API_KEY_INVALID", "API key not valid")
+
+
+def is_config_error(error):
+    """True for auth/configuration errors, which say nothing about the model's health."""
+    if {cls.__name__ for cls in type(error).__mro__} & _CONFIG_ERROR_TYPES:
+        return True
+    return any(message in str(error) for message in _CONFIG_ERROR_MESSAGES)
+
+
+def degraded_reply():
+    """Canned reply served while the model is unavailable (never cached)."""
+    return make_response(DEGRADED_MESSAGE, TARGET_PRODUCT, {})
+
+
+class Deadline:
+    """Absolute time budget for one request."""
+
+    def __init__(self, seconds=DEADLINE_SECONDS, clock=time.monotonic):
+        self._clock = clock
+        self.expires_at = clock() + seconds
+
+    def remaining(self):
+        return max(0.0, self.expires_at - self._clock())
+
+
+class CircuitBreaker:
+    """Opens after consecutive failures; after `reset_timeout` lets one trial call through."""
+
+    CLOSED, OPEN, HALF_OPEN = "closed", "open", "half-open"
+
+    def __init__(self, failure_threshold=BREAKER_FAILURE_THRESHOLD, reset_timeout=BREAKER_RESET_SECONDS,
+                 clock=time.monotonic):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._clock = clock
+        self._lock = threading.Lock()
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.trips = 0
+
+    def allow(self):
+        """Whether a call may proceed; moves an expired open breaker to half-open."""
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+            now = self._clock()
+            if now - self.opened_at >= self.reset_timeout:
+                # One trial call per reset period (a lost trial cannot wedge the breaker)
+                self.state = self.HALF_OPEN
+                self.opened_at = now
+                return True
+            return False
+
+    def is_open(self):
+        """Read-only check: open and still inside the reset timeout."""
+        with self._lock:
+            return self.state == self.OPEN and self._clock() - self.opened_at < self.reset_timeout
+
+    def record_success(self):
+        with self._lock:
+            self.state = self.CLOSED
+            self.failures = 0
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                if self.state != self.OPEN:
+                    self.trips += 1
+                self.state = self.OPEN
+                self.opened_at = self._clock()
+
+
+class LatencyWindow:
+    """Recent successful call latencies (seconds) for one model."""
+
+    def __init__(self, size=200):
+        self._samples = deque(maxlen=size)
+        self._lock = threading.Lock()
+
+    def add(self, seconds):
+        with self._lock:
+            self._samples.append(seconds)
+
+    def percentile(self, pct):
+        with self._lock:
+            samples = sorted(self._samples)
+        if not samples:
+            return None
+        return samples[min(len(samples) - 1, int(len(samples) * pct / 100.0))]
+
+    def __len__(self):
+        return len(self._samples)
+
+
+class ModelPolicy:
+    """Runs model calls with deadlines, hedging, fallback and per-model breakers."""
+
+    def __init__(self, fallback_models=FALLBACK_MODELS, attempt_timeout=ATTEMPT_TIMEOUT_SECONDS,
+                 hedge_enabled=HEDGE_ENABLED, clock=time.monotonic):
+        self.fallback_models = fallback_models
+        self.attempt_timeout = attempt_timeout
+        self.hedge_enabled = hedge_enabled
+        self._clock = clock
+        self._breakers = {}
+        self._latency = {}
+        self._lock = threading.Lock()
+        self._pools = {}
+        self.hedges = 0
+        self.hedge_wins = 0
+        self.fallbacks = 0
+        self.timeouts = 0
+
+    def breaker(self, model_name):
+        with self._lock:
+            breaker = self._breakers.get(model_name)
+            if breaker is None:
+                breaker = self._breakers[model_name] = CircuitBreaker(clock=self._clock)
+                self._latency[model_name] = LatencyWindow()
+            return breaker
+
+    def _chain(self, model_name):
+        return [model_name] + [name for name in self.fallback_models
+                               if name != model_name and model_registry.is_allowed(name)]
+
+    def candidates(self, model_name):
+        """Yields the requested model, then allowed fallbacks, skipping open breakers.
+
+        Lazy, so a half-open breaker's trial is only claimed when it is used.
+        """
+        for name in self._chain(model_name):
+            if self.breaker(name).allow():
+                yield name
+
+    def pick(self, model_name):
+        """First model in the chain whose breaker is not open, or None (read-only check before a stream)."""
+        for name in self._chain(model_name):
+            if not self.breaker(name).is_open():
+                return name
+        return None
+
+    def hedge_delay(self, model_name):
+        """Seconds to wait before hedging, or None when hedging does not apply yet."""
+        if not self.hedge_enabled:
+            return None
+        window = self._latency[model_name]
+        if len(window) < HEDGE_MIN_SAMPLES:
+            return None
+        return max(HEDGE_MIN_DELAY_SECONDS, window.percentile(HEDGE_PERCENTILE))
+
+    def _executor(self, reserve=False):
+        """The shared call pool, or the reserve pool that stuck primary calls cannot fill."""
+        pool = self._pools.get(reserve)
+        if pool is None:
+            from concurrent.futures import ThreadPoolExecutor  # Deferred to the first model call
+
+            with self._lock:
+                pool = self._pools.get(reserve)
+                if pool is None:
+                    pool = self._pools[reserve] = ThreadPoolExecutor(
+                        max_workers=MODEL_RESERVE_WORKERS if reserve else MODEL_CALL_WORKERS,
+                        thread_name_prefix="model-reserve" if reserve else "model-call"
+                    )
+        return pool
+
+    def _reserved(self, model_name, requested):
+        """Fallbacks and half-open trials run in the reserve pool: they are what recovers a stalled model."""
+        return model_name != requested or self.breaker(model_name).state == CircuitBreaker.HALF_OPEN
+
+    def _record(self, model_name, started, error):
+        if error is None:
+            self.breaker(model_name).record_success()
+            self._latency[model_name].add(self._clock() - started)
+        else:
+            self.breaker(model_name).record_failure()
+            if isinstance(error, TimeoutError):
+                self.timeouts += 1
+
+    def _failed(self, model_name, started, error):
+        """Records a failed attempt; configuration errors end the call instead of falling back."""
+        if is_config_error(error):
+            raise ModelConfigError(f"{type(error).__name__}: {error}") from error
+        self._record(model_name, started, error)
+
+    def run(self, model_name, call, deadline):
+        """Returns (call(model) result, model that answered). Raises ModelUnavailable."""
+        errors = []
+        for name in self.candidates(model_name):
+            if deadline.remaining() <= 0:
+                errors.append(DeadlineExceeded("request deadline exceeded"))
+                break
+            if name != model_name:
+                self.fallbacks += 1
+            started = self._clock()
+            try:
+                result = self._attempt(name, call, min(self.attempt_timeout, deadline.remaining()),
+                                       self._reserved(name, model_name))
+            except Exception as e:
+                self._failed(name, started, e)
+                errors.append(e)
+                continue
+            self._record(name, started, None)
+            return result, name
+        raise ModelUnavailable(_describe(errors))
+
+    def _attempt(self, model_name, call, timeout, reserve=False):
+        """One model, with an optional hedged duplicate. Stragglers finish in the pool."""
+        from concurrent.futures import FIRST_COMPLETED, wait
+
+        pool = self._executor(reserve)
+        started = self._clock()
+        futures = [pool.submit(call, model_name)]
+        pending = set(futures)
+        hedge_at = self.hedge_delay(model_name)
+        error = None
+        while pending:
+            elapsed = self._clock() - started
+            if elapsed >= timeout:
+                raise DeadlineExceeded(f"{model_name} did not answer within {timeout:g}s")
+            wait_for = timeout - elapsed
+            if hedge_at is not None and len(futures) == 1:
+                wait_for = min(wait_for, max(0.0, hedge_at - elapsed))
+            done, pending = wait(pending, timeout=wait_for, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    if future is not futures[0]:
+                        self.hedge_wins += 1
+                    return future.result()
+                error = future.exception()
+            if hedge_at is not None and len(futures) == 1 and pending and self._clock() - started >= hedge_at:
+                self.hedges += 1
+                futures.append(pool.submit(call, model_name))
+                pending.add(futures[-1])
+        raise error
+
+    async def run_async(self, model_name, call, deadline):
+        """Async twin of `run`; `call(model)` returns an awaitable."""
+        errors = []
+        for name in self.candidates(model_name):
+            if deadline.remaining() <= 0:
+                errors.append(DeadlineExceeded("request deadline exceeded"))
+                break
+            if name != model_name:
+                self.fallbacks += 1
+            started = self._clock()
+            try:
+                result = await self._attempt_async(name, call, min(self.attempt_timeout, deadline.remaining()))
+            except Exception as e:
+                self._failed(name, started, e)
+                errors.append(e)
+                continue
+            self._record(name, started, None)
+            return result, name
+        raise ModelUnavailable(_describe(errors))
+
+    async def _attempt_async(self, model_name, call, timeout):
+        import asyncio  # Only the async entry point gets here
+
+        started = self._clock()
+        tasks = [asyncio.ensure_future(call(model_name))]
+        pending = set(tasks)
+        hedge_at = self.hedge_delay(model_name)
+        error = None
+        try:
+            while pending:
+                elapsed = self._clock() - started
+                if elapsed >= timeout:
+                    raise DeadlineExceeded(f"{model_name} did not answer within {timeout:g}s")
+                wait_for = timeout - elapsed
+                if hedge_at is not None and len(tasks) == 1:
+                    wait_for = min(wait_for, max(0.0, hedge_at - elapsed))
+                done, pending = await asyncio.wait(pending, timeout=wait_for, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is not tasks[0]:
+                            self.hedge_wins += 1
+                        return task.result()
+                    error = task.exception()
+                if hedge_at is not None and len(tasks) == 1 and pending and self._clock() - started >= hedge_at:
+                    self.hedges += 1
+                    tasks.append(asyncio.ensure_future(call(model_name)))
+                    pending.add(tasks[-1])
+            raise error
+        finally:
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+
+    def stream(self, model_name, open_stream, deadline, on_model=None):
+        """Yields the chunks of `open_stream(model)`, falling back as in `run` until one sends its first chunk.
+
+        The first chunk must arrive within the attempt timeout; `on_model(name)`
+        is then called and the stream is committed to that model. Its breaker
+        records a success when the stream ends and a failure if it raises.
+        Raises ModelUnavailable when no model sends a first chunk.
+        """
+        errors = []
+        for name in self.candidates(model_name):
+            if deadline.remaining() <= 0:
+                errors.append(DeadlineExceeded("request deadline exceeded"))
+                break
+            if name != model_name:
+                self.fallbacks += 1
+            started = self._clock()
+            try:
+                chunks, first = self._first_chunk(name, open_stream, min(self.attempt_timeout, deadline.remaining()),
+                                                  self._reserved(name, model_name))
+            except Exception as e:
+                self._failed(name, started, e)
+                errors.append(e)
+                continue
+            if on_model is not None:
+                on_model(name)
+            try:
+                if first is not _END:
+                    yield first
+                    yield from chunks
+            except Exception as e:
+                self._failed(name, started, e)
+                raise
+            # No latency sample: a whole stream is not comparable with the calls hedging is tuned on
+            self.breaker(name).record_success()
+            return
+        raise ModelUnavailable(_describe(errors))
+
+    def _first_chunk(self, model_name, open_stream, timeout, reserve=False):
+        """Opens a stream and waits up to `timeout` for its first chunk. A straggler finishes in the pool."""
+        from concurrent.futures import TimeoutError as FutureTimeout
+
+        def start():
+            chunks = iter(open_stream(model_name))
+            return chunks, next(chunks, _END)
+
+        future = self._executor(reserve).submit(start)
+        try:
+            return future.result(timeout=timeout)
+        except FutureTimeout:
+            raise DeadlineExceeded(f"{model_name} sent no chunk within {timeout:g}s") from None
+
+    def stats(self):
+        with self._lock:
+            breakers = dict(self._breakers)
+        return {
+            "hedges": self.hedges,
+            "hedgeWins": self.hedge_wins,
+            "fallbacks": self.fallbacks,
+            "timeouts": self.timeouts,
+            "models": {
+                name: {
+                    "breaker": breaker.state,
+                    "consecutiveFailures": breaker.failures,
+                    "trips": breaker.trips,
+                    "p50Seconds": self._latency[name].percentile(50),
+                    "p95Seconds": self._latency[name].percentile(95),
+                }
+                for name, breaker in breakers.items()
+            },
+        }
+
+
+_END = object()  # Sentinel: the stream ended before its first chunk
+
+
+def _describe(errors):
+    if not errors:
+        return "all model circuit breakers are open"
+    return "; ".join(f"{type(e).__name__}: {e}" for e in errors)
@@ -0,0 +1,115 @@
+"""In-process response cache for the Gemini endpoint.
+
+Model calls run at temperature 0.0, so identical request state yields the same
+reply. Entries are keyed on a normalized view of that state and evicted by
+LRU order (bounded by total bytes) or TTL, whichever comes first.
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+
+
+# Configuration
+CACHE_MAX_BYTES = int(os.environ.get("RESPONSE_CACHE_MAX_BYTES", 8 * 1024 * 1024))
+CACHE_TTL_SECONDS = float(os.environ.get("RESPONSE_CACHE_TTL_SECONDS", 15 * 60))
+
+
+def normalize_prompt(prompt):
+    """Case-folds the prompt and collapses runs of whitespace."""
+    return " ".join(str(prompt).casefold().split())
+
+
+def canonical_json(value):
+    """Serializes a context dict with sorted keys and no insignificant whitespace."""
+    if not value:
+        return ""
+    return json.dumps(value, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+
+
+def make_cache_key(prompt, product_choice, user_data, model_name, kb_version, history=""):
+    """Builds the cache key for a request from its normalized state.
+
+    `history` is the rendered conversation section, so histories that compact
+    to the same section share an entry.
+    """
+    raw = "\x1f".join([
+        normalize_prompt(prompt),
+        canonical_json(product_choice),
+        canonical_json(user_data),
+        str(model_name),
+        str(kb_version),
+        history,
+    ])
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """Thread-safe LRU cache bounded by total body bytes, with per-entry TTL."""
+
+    def __init__(self, max_bytes=CACHE_MAX_BYTES, ttl_seconds=CACHE_TTL_SECONDS, clock=time.monotonic):
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self._clock = clock
+        self._entries = OrderedDict()  # key -> (body, size, expires_at)
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key):
+        """Returns the cached body for `key`, or None on a miss or expired entry."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            body, size, expires_at = entry
+            if expires_at <= self._clock():
+                self._remove(key)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return body
+
+    def put(self, key, body):
+        """Stores `body` under `key`, evicting least recently used entries as needed."""
+        size = len(body.encode("utf-8"))
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (body, size, self._clock() + self.ttl_seconds)
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self):
+        """Returns hit/miss counters and current occupancy."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hitRate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "maxBytes": self.max_bytes,
+            }
+
+    def _remove(self, key):
+        _, size, _ = self._entries.pop(key)
+        self._bytes -= size
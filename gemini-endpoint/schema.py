@@ -0,0 +1,41 @@
+"""Output contract shared by the prompt, the rule engine and response handling."""
+
+TARGET_PRODUCT = "product-choice"
+TARGET_USER = "user-data"
+
+# Valid product attributes (mirrors FACET_DEFINITIONS in scripts/constants.js)
+VALID_ATTRIBUTES = {
+    "categoria": ["janela", "porta"],
+    "sistema": ["janela-correr", "porta-correr", "maxim-ar", "giro"],
+    "persiana": ["sim", "nao"],
+    "persianaMotorizada": ["motorizada", "manual"],
+    "material": ["vidro", "vidro + veneziana", "lambri", "veneziana", "vidro + lambri"],
+    "folhas": [1, 2, 3, 4, 6],
+}
+
+USER_DATA_FIELDS = ["userName", "userPhone", "userEmail", "talkToHuman"]
+
+# User-facing labels (Portuguese), used when replying without the model
+ATTRIBUTE_LABELS = {
+    "categoria": {"janela": "Janela", "porta": "Porta"},
+    "sistema": {"janela-correr": "De Correr", "porta-correr": "De Correr", "maxim-ar": "Maxim-ar", "giro": "De Giro"},
+    "persiana": {"sim": "Com Persiana", "nao": "Sem Persiana"},
+    "persianaMotorizada": {"motorizada": "Motorizada", "manual": "Manual"},
+    "material": {
+        "vidro": "Vidro",
+        "vidro + veneziana": "Vidro + Veneziana",
+        "lambri": "Lambri",
+        "veneziana": "Veneziana",
+        "vidro + lambri": "Vidro + Lambri",
+    },
+    "folhas": {1: "1 Folha", 2: "2 Folhas", 3: "3 Folhas", 4: "4 Folhas", 6: "6 Folhas"},
+}
+
+
+def make_response(message, target, payload):
+    """Builds a reply in the endpoint's `{status, message, data}` contract."""
+    return {
+        "status": "success",
+        "message": message,
+        "data": {"target": target, "payload": payload},
+    }
@@ -0,0 +1,101 @@
+"""Single-flight coalescing of identical in-flight model calls.
+
+Concurrent requests with the same key share one call: the first caller (the
+leader) runs it and every caller that arrives while it is in flight waits for
+and receives the same result or exception. Nothing is stored after the call
+completes, so coalescing adds no staleness.
+"""
+import threading
+
+
+class _Call:
+    __slots__ = ("event", "result", "error", "waiters")
+
+    def __init__(self, event):
+        self.event = event
+        self.result = None
+        self.error = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    """Coalesces concurrent calls by key, for threads (`do`) and coroutines (`do_async`)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+        self._async_calls = {}
+        self.leaders = 0
+        self.coalesced = 0
+        self.max_waiters = 0
+
+    def do(self, key, fn):
+        """Runs `fn()` once per in-flight key. Returns (result, shared)."""
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None:
+                self._join(call)
+                leader = False
+            else:
+                call = self._calls[key] = _Call(threading.Event())
+                self.leaders += 1
+                leader = True
+
+        if not leader:
+            call.event.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result, True
+
+        try:
+            call.result = fn()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.event.set()
+        return call.result, False
+
+    async def do_async(self, key, coro_fn):
+        """Awaits `coro_fn()` once per in-flight key. Returns (result, shared)."""
+        import asyncio  # Deferred so the sync entry point does not load asyncio
+        call = self._async_calls.get(key)
+        if call is not None:
+            with self._lock:
+                self._join(call)
+            await call.event.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result, True
+
+        call = self._async_calls[key] = _Call(asyncio.Event())
+        with self._lock:
+            self.leaders += 1
+        try:
+            call.result = await coro_fn()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            del self._async_calls[key]
+            call.event.set()
+        return call.result, False
+
+    def _join(self, call):
+        call.waiters += 1
+        self.coalesced += 1
+        self.max_waiters = max(self.max_waiters, call.waiters)
+
+    def stats(self):
+        """Returns totals plus the waiter count of every key currently in flight."""
+        with self._lock:
+            in_flight = {key: call.waiters for key, call in self._calls.items()}
+            in_flight.update({key: call.waiters for key, call in self._async_calls.items()})
+            return {
+                "leaders": self.leaders,
+                "coalesced": self.coalesced,
+                "maxWaiters": self.max_waiters,
+                "inFlight": in_flight,
+            }
@@ -0,0 +1,168 @@
+"""Server-Sent Events streaming for the Gemini endpoint.
+
+The model emits the whole `{status, message, data}` envelope as JSON. While
+the chunks arrive, `MessageStreamParser` decodes the top-level `message`
+string incrementally so its text can be forwarded immediately; the complete
+envelope is validated and sent as the final `done` event.
+
+Event stream:
+    event: message   data: {"delta": "..."}       (zero or more)
+    event: done      data: {full JSON reply}      (on success)
+    event: error     data: {"status": "error", "message": "..."}
+"""
+import json
+import sys
+
+try:
+    from flask import Response
+except ImportError:
+    Response = None
+
+
+SSE_HEADERS = {
+    "Content-Type": "text/event-stream; charset=utf-8",
+    "Cache-Control": "no-cache",
+    "X-Accel-Buffering": "no",
+}
+
+_ESCAPES = {'"': '"', "\\": "\\", "/": "/", "b": "\b", "f": "\f", "n": "\n", "r": "\r", "t": "\t"}
+
+
+def wants_stream(request, req_json):
+    """True if the caller opted in via `"stream": true` or an SSE Accept header."""
+    if req_json.get("stream") is True:
+        return True
+    request_headers = getattr(request, "headers", None) or {}
+    return "text/event-stream" in (request_headers.get("Accept") or "")
+
+
+def sse_event(event, data):
+    return f"event: {event}\ndata: {data}\n\n"
+
+
+class MessageStreamParser:
+    """Incrementally extracts the top-level "message" string from a JSON stream."""
+
+    def __init__(self):
+        self.depth = 0
+        self.in_string = False
+        self.escape = None      # None, "" right after a backslash, or "u" + hex digits so far
+        self.high_surrogate = None
+        self.string_buf = []
+        self.last_string = None
+        self.awaiting_value_for = None
+        self.capturing = False
+        self.done = False
+
+    def feed(self, chunk):
+        """Consumes a chunk of model output and returns newly decoded message text."""
+        out = []
+        for ch in chunk:
+            if self.in_string:
+                self._string_char(ch, out)
+                continue
+            if ch == '"':
+                self.in_string = True
+                self.string_buf = []
+                self.capturing = (self.awaiting_value_for == "message" and self.depth == 1 and not self.done)
+                self.awaiting_value_for = None
+            elif ch == ":":
+                self.awaiting_value_for = self.last_string if self.depth == 1 else None
+            elif ch in "{[":
+                self.depth += 1
+                self.awaiting_value_for = None
+            elif ch in "}]":
+                self.depth -= 1
+            elif ch == ",":
+                self.awaiting_value_for = None
+                self.last_string = None
+        return "".join(out)
+
+    def _string_char(self, ch, out):
+        target = out if self.capturing else self.string_buf
+        if self.escape is not None:
+            if self.escape == "" and ch != "u":
+                target.append(_ESCAPES.get(ch, ch))
+                self.escape = None
+            elif self.escape == "" and ch == "u":
+                self.escape = "u"
+            else:
+                self.escape += ch
+                if len(self.escape) == 5:
+                    self._append_code_point(int(self.escape[1:], 16), target)
+                    self.escape = None
+            return
+        if ch == "\\":
+            self.escape = ""
+        elif ch == '"':
+            self.in_string = False
+            if self.capturing:
+                self.capturing = False
+                self.done = True
+            self.last_string = "".join(self.string_buf)
+        else:
+            target.append(ch)
+
+    def _append_code_point(self, code, target):
+        if 0xD800 <= code <= 0xDBFF:
+            self.high_surrogate = code
+            return
+        if 0xDC00 <= code <= 0xDFFF and self.high_surrogate is not None:
+            code = 0x10000 + ((self.high_surrogate - 0xD800) << 10) + (code - 0xDC00)
+        self.high_surrogate = None
+        target.append(chr(code))
+
+
+def stream_model_reply(chunks, on_complete=None, validate=None, on_usage=None):
+    """Yields SSE events for the chunks of a streamed `generate_content` call.
+
+    `validate(text)` turns the full reply into the final reply dict, raising
+    ValueError when it is unusable (default: `json.loads`). `on_complete(text)`
+    is called with the final reply's JSON once it validates. `on_usage(chunk)`
+    gets the last chunk carrying `usage_metadata` (its counts are cumulative).
+    """
+    parser = MessageStreamParser()
+    parts = []
+    usage_chunk = None
+    try:
+        for chunk in chunks:
+            if getattr(chunk, "usage_metadata", None) is not None:
+                usage_chunk = chunk
+            text = chunk.text
+            parts.append(text)
+            delta = parser.feed(text)
+            if delta:
+                yield sse_event("message", json.dumps({"delta": delta}, ensure_ascii=False))
+    except Exception as e:
+        print(f"Streaming Error: {e}", file=sys.stderr)
+        yield sse_event("error", json.dumps({"status": "error", "message": str(e)}))
+        return
+
+    if on_usage is not None and usage_chunk is not None:
+        on_usage(usage_chunk)
+    full_text = "".join(parts)
+    try:
+        reply = validate(full_text) if validate is not None else json.loads(full_text)
+    except ValueError:
+        yield sse_event("error", json.dumps({"status": "error", "message": "Model returned invalid JSON"}))
+        return
+    body = json.dumps(reply, ensure_ascii=False)
+    if on_complete is not None:
+        on_complete(body)
+    yield sse_event("done", body)
+
+
+def stream_complete_reply(body):
+    """Yields SSE events for a reply that is already complete (fast path, cache hit)."""
+    reply = json.loads(body)
+    if reply.get("message"):
+        yield sse_event("message", json.dumps({"delta": reply["message"]}, ensure_ascii=False))
+    yield sse_event("done", json.dumps(reply, ensure_ascii=False))
+
+
+def sse_response(events, headers):
+    """Wraps an event generator in the handler's `(body, status, headers)` result."""
+    headers = {**headers, **SSE_HEADERS}
+    if Response is not None:
+        return Response(events, status=200, headers=headers)
+    return (events, 200, headers)
@@ -0,0 +1,48 @@
+"""Test setup: endpoint modules import by bare name, with logging and SDK warm-up off; shared fakes."""
+import os
+import sys
+
+import pytest
+
+os.environ.setdefault("REQUEST_LOG_ENABLED", "0")
+os.environ.setdefault("GEMINI_WARMUP_MODELS", "")
+os.environ.setdefault("KB_RELOAD_INTERVAL_SECONDS", "0")
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+class FakeRequest:
+    """The subset of the Flask request interface the handlers use."""
+
+    def __init__(self, payload=None, headers=None, remote_addr="192.0.2.1", method="POST", path="/",
+                 content_length=64):
+        self.payload = payload
+        self.headers = headers or {}
+        self.remote_addr = remote_addr
+        self.method = method
+        self.path = path
+        self.content_length = content_length
+
+    def get_json(self, silent=True):
+        return self.payload
+
+
+class FakeClock:
+    """Settable clock for the components that take a `clock` argument."""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def make_request():
+    """Builds a FakeRequest: make_request(payload, headers=..., remote_addr=...)."""
+    return FakeRequest
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
@@ -0,0 +1,107 @@
+import asyncio
+import threading
+
+import pytest
+
+import admission
+import asgi
+import main
+from admission import LoadShedder, Rejected, TokenBucketLimiter, client_ip, measure
+
+
+def _post(client_ip, body=b"{}"):
+    """Drives asgi.app with one POST from `client_ip`; returns the status."""
+    sent = []
+    messages = [{"type": "http.request", "body": body}]
+
+    async def receive():
+        return messages.pop(0)
+
+    async def send(message):
+        sent.append(message)
+
+    scope = {"type": "http", "method": "POST", "path": "/", "client": (client_ip, 50000),
+             "headers": [(b"content-type", b"application/json")]}
+    asyncio.run(asgi.app(scope, receive, send))
+    return sent[0]["status"]
+
+
+def test_asgi_clients_get_distinct_buckets():
+    ips = [f"198.51.100.{i}" for i in range(45)]
+    statuses = [_post(ip) for ip in ips]
+    assert 429 not in statuses  # 400 (missing prompt) comes after admission
+    assert list(main._ADMISSION.ips._buckets)[-45:] == ips
+
+
+def test_bucket_allows_a_burst_then_refills_at_the_rate(clock):
+    limiter = TokenBucketLimiter(per_minute=60, burst=3, clock=clock)
+    assert [limiter.acquire("a") for _ in range(3)] == [0.0, 0.0, 0.0]
+    assert limiter.acquire("a") == pytest.approx(1.0)
+    assert limiter.acquire("b") == 0.0  # Buckets are per key
+    clock.now = 1.0
+    assert limiter.acquire("a") == 0.0
+    clock.now = 100.0
+    assert [limiter.acquire("a") for _ in range(4)][-1] > 0  # Refill is capped at the burst
+    assert limiter.limited == 2
+
+
+def test_bucket_evicts_the_least_recently_seen_key(clock):
+    limiter = TokenBucketLimiter(per_minute=60, burst=1, max_keys=2, clock=clock)
+    limiter.acquire("a")
+    limiter.acquire("b")
+    limiter.acquire("a")  # Refreshes "a"
+    limiter.acquire("c")
+    assert list(limiter._buckets) == ["a", "c"]
+    assert limiter.acquire("b") == 0.0  # An evicted client starts with a full bucket
+
+
+def test_shedder_rejects_when_the_queue_is_full_or_the_wait_times_out():
+    shedder = LoadShedder(max_in_flight=1, max_queue=0, queue_timeout=0.05)
+    with shedder.slot():
+        with pytest.raises(Rejected, match="queue full"):
+            shedder.acquire()
+    shedder = LoadShedder(max_in_flight=1, max_queue=1, queue_timeout=0.05)
+    with shedder.slot():
+        with pytest.raises(Rejected, match="timed out"):
+            shedder.acquire()
+    assert shedder.stats()["inFlight"] == 0 and shedder.shed == 1
+
+
+def test_shedder_hands_a_released_slot_to_a_waiter():
+    shedder = LoadShedder(max_in_flight=1, max_queue=1, queue_timeout=5)
+    shedder.acquire()
+    got = threading.Event()
+
+    def wait_for_slot():
+        with shedder.slot():
+            got.set()
+
+    waiter = threading.Thread(target=wait_for_slot)
+    waiter.start()
+    assert not got.wait(0.05)
+    shedder.release()
+    waiter.join(5)
+    assert got.is_set() and shedder.in_flight == 0 and shedder.shed == 0
+
+
+def test_client_ip_is_the_socket_peer_unless_proxy_hops_are_configured(make_request):
+    # What Google's external HTTP(S) load balancer sends: spoofed entry, client, load balancer
+    request = make_request(headers={"X-Forwarded-For": "1.2.3.4, 203.0.113.7, 34.120.0.1"}, remote_addr="169.254.1.1")
+    assert client_ip(request) == "169.254.1.1"
+    assert client_ip(make_request(remote_addr=None)) == "unknown"
+
+
+def test_client_ip_behind_a_load_balancer_is_the_address_it_saw(monkeypatch, make_request):
+    monkeypatch.setattr(admission, "FORWARDED_HOPS", 2)
+    limiter = admission.Admission(enabled=True)
+    for client in ("203.0.113.7", "203.0.113.8"):
+        request = make_request(headers={"X-Forwarded-For": f"1.2.3.4, {client}, 34.120.0.1"}, remote_addr="169.254.1.1")
+        assert client_ip(request) == client
+        limiter.check_request(request)
+    assert sorted(limiter.ips._buckets) == ["203.0.113.7", "203.0.113.8"]
+
+
+def test_measure_stops_counting_past_the_limit():
+    assert measure({"a": "xy"}, 100) >= len('{"a":"xy"}')
+    big = ["x" * 50] * 1000
+    assert 100 < measure(big, 100) < measure(big, 10 ** 6)
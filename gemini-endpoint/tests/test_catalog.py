@@ -0,0 +1,24 @@
+import json
+
+import main
+from catalog import apply_payload
+
+
+def test_changed_facet_clears_later_facets():
+    choice = {"categoria": "janela", "sistema": "janela-correr", "material": "vidro"}
+    assert apply_payload(choice, {"categoria": "porta"}) == {"categoria": "porta"}
+    assert apply_payload(choice, {"categoria": "janela", "persiana": "sim"}) == {
+        "categoria": "janela", "sistema": "janela-correr", "persiana": "sim"}
+
+
+def test_fast_path_category_switch_has_matches(monkeypatch, make_request):
+    monkeypatch.setenv("GEMINI_API_KEY", "test-key")
+    main._RESPONSE_CACHE.clear()
+    body, status, headers = main.gemini_endpoint(make_request({
+        "prompt": "porta",
+        "productChoice": {"categoria": "janela", "sistema": "janela-correr"},
+    }))
+    reply = json.loads(body)
+    assert status == 200 and "X-Fast-Path" in headers
+    assert reply["data"]["payload"] == {"categoria": "porta"}
+    assert reply["data"]["catalog"]["matches"] > 0
@@ -0,0 +1,71 @@
+import json
+
+import pytest
+
+import main
+import model_registry
+from conversation import parse_history, render_history
+from tokens import estimate_tokens
+
+
+def _session(exchanges):
+    history = []
+    for i in range(exchanges):
+        history.append({"role": "user", "content": f"pergunta numero {i} sobre o tamanho da porta de vidro"})
+        history.append({"role": "assistant", "content": f"resposta {i}",
+                        "data": {"target": "product-choice", "payload": {"largura": i}}})
+    return history
+
+
+def test_parse_history_keeps_valid_turns_and_maps_role_aliases():
+    history = [
+        {"role": "user", "content": "oi"},
+        {"role": "model", "content": "olá", "data": {"target": "user-data"}},
+        {"role": "system", "content": "ignored"},
+        {"role": "user", "content": "   "},
+        "not a message",
+    ]
+    assert parse_history(history) == [("user", "oi", None), ("assistant", "olá", {"target": "user-data"})]
+    with pytest.raises(ValueError):
+        parse_history("oi")
+
+
+def test_recent_messages_are_verbatim_and_older_ones_summarized():
+    section = render_history(_session(5), token_budget=10_000, recent_messages=2)
+    assert '- User: pergunta numero 4 sobre o tamanho da porta de vidro' in section
+    assert '- Assistant: resposta 4' in section
+    assert 'resposta 3' not in section
+    assert '- User asked: "pergunta numero 0 sobre o tamanho' in section
+    assert '- Configuration set: {"largura": 3}' in section  # The latest change wins
+
+
+@pytest.mark.parametrize("reserved", [0, 100, 180])
+def test_rendered_history_stays_within_the_budget(reserved):
+    section = render_history(_session(50), reserved_tokens=reserved, token_budget=200)
+    assert section and estimate_tokens(section) <= 200 - reserved
+    assert "resposta 49" in section  # The newest message is the last to go
+
+
+def test_no_history_or_no_room_renders_nothing():
+    assert render_history(None) == ""
+    assert render_history(_session(1), reserved_tokens=600, token_budget=600) == ""
+
+
+def test_endpoint_puts_the_history_in_the_prompt_and_rejects_a_bad_one(monkeypatch, make_request):
+    prompts = []
+
+    class Model:
+        def generate_content(self, prompt, generation_config=None, stream=False, request_options=None):
+            prompts.append(prompt)
+            return model_registry._MockGenai.GenerativeModel("mock").generate_content(prompt, stream=stream)
+
+    monkeypatch.setenv("GEMINI_API_KEY", "test-key")
+    monkeypatch.setattr(model_registry, "get_model", lambda name: Model())
+    main._RESPONSE_CACHE.clear()
+    payload = {"prompt": "me conte sobre a empresa", "history": _session(1)}
+    _, status, _ = main.gemini_endpoint(make_request(payload, remote_addr="192.0.2.20"))
+    assert status == 200
+    assert "**CONVERSATION SO FAR**" in prompts[0] and "resposta 0" in prompts[0]
+
+    body, status, _ = main.gemini_endpoint(make_request({**payload, "history": "oi"}, remote_addr="192.0.2.20"))
+    assert status == 400 and "history" in json.loads(body)["message"]
@@ -0,0 +1,47 @@
+import pytest
+
+from intents import match_intent
+from schema import TARGET_USER
+
+HANDOFF = {"talkToHuman": True}
+
+
+@pytest.mark.parametrize("prompt", [
+    "Quero falar com um atendente",
+    "quanto custa?",
+    "Queria um orçamento",
+])
+def test_handoff_requests_go_to_a_human(prompt):
+    reply = match_intent(prompt, {}, {})
+    assert reply["data"] == {"target": TARGET_USER, "payload": {"talkToHuman": True}}
+
+
+@pytest.mark.parametrize("prompt", [
+    "Não quero comprar agora, só olhando",
+    "sem desconto?",
+    "nem preciso de vendedor",
+    "não preciso de atendente",
+])
+def test_negated_triggers_do_not_hand_off(prompt):
+    assert match_intent(prompt, {}, {}) is None
+
+
+def test_contact_with_a_name_falls_through_to_the_model():
+    assert match_intent("Meu nome é João Silva, joao@x.com", {}, HANDOFF) is None
+
+
+def test_bare_email_asks_only_for_the_missing_name():
+    reply = match_intent("meu e-mail é joao@x.com", {}, HANDOFF)
+    assert reply["data"]["payload"] == {"userEmail": "joao@x.com"}
+    assert "nome" in reply["message"] and "telefone" not in reply["message"]
+
+
+def test_phone_completes_the_contact_when_the_name_is_known():
+    reply = match_intent("(11) 98765-4321", {}, {**HANDOFF, "userName": "João"})
+    assert reply["data"]["payload"] == {"userPhone": "11987654321"}
+    assert "?" not in reply["message"]
+
+
+def test_facet_answer_is_parsed():
+    reply = match_intent("janela de correr", {}, {})
+    assert reply["data"]["payload"] == {"categoria": "janela", "sistema": "janela-correr"}
@@ -0,0 +1,59 @@
+import pytest
+
+from kb_index import KBIndex, analyze, extract_snippets, stem
+from tokens import estimate_tokens
+
+KB = {
+    "empresa": {"nome": "Vidraçaria Exemplo", "historia": "Fundada em 1990. Atendemos toda a região."},
+    "instalacao": ["A instalação leva um dia.", "Oferecemos garantia de cinco anos na instalação."],
+    "pagamento": "Aceitamos pix e cartão em até 10 vezes.",
+    "folhas": [1, 2, 3, 4, 6],
+}
+
+
+def test_snippets_are_labelled_sentences_and_short_lists_stay_together():
+    snippets = extract_snippets(KB)
+    assert "empresa.historia: Fundada em 1990." in snippets
+    assert "empresa.historia: Atendemos toda a região." in snippets
+    assert "instalacao: A instalação leva um dia." in snippets
+    assert "folhas: 1, 2, 3, 4, 6" in snippets
+
+
+def test_analysis_folds_accents_drops_stopwords_and_stems():
+    assert analyze("As instalações da janela") == analyze("instalacao janelas")
+    assert stem("casa") == "casa"  # Never shorter than the minimum stem
+
+
+def test_search_ranks_the_matching_snippet_first():
+    index = KBIndex.from_kb_data(KB)
+    score, doc_id = index.search("quanto tempo leva a instalação?")[0]
+    assert index.snippets[doc_id] == "instalacao: A instalação leva um dia."
+    assert score > 0
+
+
+def test_rare_terms_outweigh_common_ones():
+    index = KBIndex(["janela vidro", "janela lambri", "janela veneziana", "porta vidro"])
+    ranked = [index.snippets[doc_id] for _, doc_id in index.search("janela porta")]
+    assert ranked[0] == "porta vidro"
+
+
+def test_shorter_snippets_win_ties_on_term_frequency():
+    index = KBIndex(["garantia", "garantia de cinco anos para portas e janelas"])
+    assert [doc_id for _, doc_id in index.search("garantia")] == [0, 1]
+
+
+@pytest.mark.parametrize("query", ["", "de a o", "xyzzy"])
+def test_queries_without_indexed_terms_match_nothing(query):
+    assert KBIndex.from_kb_data(KB).search(query) == []
+
+
+def test_select_keeps_the_top_k_within_the_token_budget():
+    snippets = ["garantia " + "longa " * 40, "garantia curta", "garantia media de cinco anos"]
+    index = KBIndex(snippets)
+    budget = estimate_tokens(snippets[1]) + estimate_tokens(snippets[2])
+    assert set(index.select("garantia", top_k=3, token_budget=budget)) == {snippets[1], snippets[2]}
+    assert len(index.select("garantia", top_k=1, token_budget=1000)) == 1
+
+
+def test_empty_index_searches_safely():
+    assert KBIndex([]).search("janela") == []
@@ -0,0 +1,32 @@
+import json
+
+import pytest
+
+import main
+
+
+@pytest.mark.parametrize("field, value", [
+    ("productChoice", "x"),
+    ("productChoice", ["a"]),
+    ("userData", "yes"),
+    ("userData", 1),
+])
+def test_non_object_context_is_rejected_before_the_model(monkeypatch, field, value, make_request):
+    monkeypatch.setenv("GEMINI_API_KEY", "test-key")
+    body, status, _ = main.gemini_endpoint(make_request({"prompt": "me fale da empresa", field: value}))
+    assert status == 400
+    assert json.loads(body)["message"] == f"'{field}' must be an object"
+
+
+@pytest.mark.parametrize("payload", [["prompt"], "prompt"])
+def test_non_object_body_is_invalid_json(monkeypatch, payload, make_request):
+    monkeypatch.setenv("GEMINI_API_KEY", "test-key")
+    body, status, _ = main.gemini_endpoint(make_request(payload))
+    assert status == 400
+    assert json.loads(body)["message"] == "Invalid JSON"
+
+
+def test_null_context_is_accepted(monkeypatch, make_request):
+    monkeypatch.setenv("GEMINI_API_KEY", "test-key")
+    _, status, _ = main.gemini_endpoint(make_request({"prompt": "janela", "productChoice": None, "userData": None}))
+    assert status == 200
@@ -0,0 +1,192 @@
+import json
+import threading
+import time
+
+import pytest
+
+import main
+import model_registry
+import resilience
+from resilience import CircuitBreaker, Deadline, ModelConfigError, ModelPolicy, ModelUnavailable
+
+
+class Unauthenticated(Exception):
+    """Stands in for google.api_core.exceptions.Unauthenticated."""
+
+
+def _policy(**kwargs):
+    return ModelPolicy(fallback_models=["gemini-2.5-flash-lite"], **kwargs)
+
+
+def test_breaker_opens_after_consecutive_failures_and_half_opens_after_the_reset(clock):
+    breaker = CircuitBreaker(failure_threshold=3, reset_timeout=10, clock=clock)
+    for _ in range(2):
+        breaker.record_failure()
+    breaker.record_success()
+    for _ in range(3):
+        assert breaker.allow()
+        breaker.record_failure()
+    assert breaker.state == breaker.OPEN and breaker.trips == 1
+    assert not breaker.allow() and breaker.is_open()
+
+    clock.now = 10
+    assert breaker.allow() and breaker.state == breaker.HALF_OPEN
+    assert not breaker.allow()  # One trial per reset period
+    breaker.record_failure()  # A failed trial reopens it
+    assert breaker.state == breaker.OPEN and breaker.trips == 2
+
+    clock.now = 20
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.state == breaker.CLOSED and breaker.allow()
+
+
+def test_run_falls_back_and_skips_open_breakers():
+    calls = []
+
+    def call(name):
+        calls.append(name)
+        if name == "gemini-2.5-flash":
+            raise ConnectionError("down")
+        return "ok"
+
+    policy = _policy()
+    for _ in range(6):
+        assert policy.run("gemini-2.5-flash", call, Deadline(5)) == ("ok", "gemini-2.5-flash-lite")
+    # BREAKER_FAILURE_THRESHOLD (5) failures open the primary; later calls go straight to the fallback
+    assert calls.count("gemini-2.5-flash") == 5
+    assert policy.stats()["models"]["gemini-2.5-flash"]["breaker"] == "open"
+
+
+def test_run_without_any_answer_is_unavailable():
+    def call(name):
+        raise ConnectionError(f"{name} down")
+
+    with pytest.raises(ModelUnavailable, match="gemini-2.5-flash down; ConnectionError: gemini-2.5-flash-lite down"):
+        _policy().run("gemini-2.5-flash", call, Deadline(5))
+
+
+def test_slow_attempt_is_hedged_and_the_duplicate_wins():
+    policy = _policy(hedge_enabled=True, attempt_timeout=5)
+    for _ in range(20):  # HEDGE_MIN_SAMPLES fast calls set the latency percentile
+        policy.run("gemini-2.5-flash", lambda name: "warm", Deadline(5))
+    calls = []
+
+    def call(name):
+        calls.append(name)
+        if len(calls) == 1:
+            time.sleep(2)
+            return "slow"
+        return "hedged"
+
+    assert policy.run("gemini-2.5-flash", call, Deadline(5)) == ("hedged", "gemini-2.5-flash")
+    assert policy.hedges == 1 and policy.hedge_wins == 1
+
+
+def test_hedging_waits_for_enough_latency_samples():
+    policy = _policy(hedge_enabled=True)
+    policy.breaker("gemini-2.5-flash")
+    assert policy.hedge_delay("gemini-2.5-flash") is None
+    assert _policy().hedge_delay("gemini-2.5-flash") is None
+
+
+def test_stream_falls_back_when_the_first_chunk_is_late():
+    def open_stream(name):
+        if name == "gemini-2.5-flash":
+            time.sleep(0.5)
+        return iter(["a", "b"])
+
+    policy = _policy(attempt_timeout=0.1)
+    served = []
+    chunks = list(policy.stream("gemini-2.5-flash", open_stream, Deadline(5), on_model=served.append))
+    assert chunks == ["a", "b"] and served == ["gemini-2.5-flash-lite"]
+    assert policy.breaker("gemini-2.5-flash").failures == 1
+    assert policy.timeouts == 1
+
+
+def test_stream_records_the_breaker_outcome_when_it_ends():
+    def broken(name):
+        yield "a"
+        raise ConnectionError("reset")
+
+    policy = _policy()
+    with pytest.raises(ConnectionError):
+        list(policy.stream("gemini-2.5-flash", broken, Deadline(5)))
+    assert policy.breaker("gemini-2.5-flash").failures == 1
+
+    assert list(policy.stream("gemini-2.5-flash", lambda name: ["a"], Deadline(5))) == ["a"]
+    assert policy.breaker("gemini-2.5-flash").failures == 0
+
+
+def test_stream_without_any_first_chunk_is_unavailable():
+    def failing(name):
+        raise ConnectionError("down")
+
+    with pytest.raises(ModelUnavailable):
+        list(_policy().stream("gemini-2.5-flash", failing, Deadline(5)))
+
+
+@pytest.mark.parametrize("error", [Unauthenticated("bad key"), ValueError("400 API key not valid. Please pass a valid API key.")])
+def test_config_errors_fail_hard_without_fallback(error):
+    calls = []
+
+    def call(name):
+        calls.append(name)
+        raise error
+
+    policy = _policy()
+    with pytest.raises(ModelConfigError):
+        policy.run("gemini-2.5-flash", call, Deadline(5))
+    with pytest.raises(ModelConfigError):
+        list(policy.stream("gemini-2.5-flash", call, Deadline(5)))
+    assert calls == ["gemini-2.5-flash", "gemini-2.5-flash"]
+    assert policy.breaker("gemini-2.5-flash").failures == 0
+
+
+def test_endpoint_reports_a_bad_api_key_instead_of_degrading(monkeypatch, make_request):
+    class Model:
+        def generate_content(self, prompt, generation_config=None, stream=False, request_options=None):
+            raise Unauthenticated("API key not valid")
+
+    monkeypatch.setenv("GEMINI_API_KEY", "bad-key")
+    monkeypatch.setattr(model_registry, "get_model", lambda name: Model())
+    main._RESPONSE_CACHE.clear()
+    body, status, headers = main.gemini_endpoint(make_request({"prompt": "me conte sobre a empresa"}))
+    assert status == 500 and "X-Degraded" not in headers
+    assert json.loads(body)["message"] == "Model configuration error"
+
+
+def test_fallback_answers_while_hung_primary_calls_fill_the_pool(monkeypatch):
+    monkeypatch.setattr(resilience, "MODEL_CALL_WORKERS", 1)
+    hang = threading.Event()
+
+    def call(name):
+        if name == "gemini-2.5-flash":
+            hang.wait(5)  # An upstream stall
+            return "late"
+        return "ok"
+
+    policy = _policy(attempt_timeout=0.1)
+    try:
+        for _ in range(3):
+            started = time.monotonic()
+            assert policy.run("gemini-2.5-flash", call, Deadline(1)) == ("ok", "gemini-2.5-flash-lite")
+            assert time.monotonic() - started < 0.5
+    finally:
+        hang.set()
+
+
+def test_model_calls_carry_the_attempt_timeout(monkeypatch, make_request):
+    seen = []
+
+    class Model:
+        def generate_content(self, prompt, generation_config=None, stream=False, request_options=None):
+            seen.append(request_options)
+            return model_registry._MockGenai.GenerativeModel("mock").generate_content(prompt, stream=stream)
+
+    monkeypatch.setenv("GEMINI_API_KEY", "test-key")
+    monkeypatch.setattr(model_registry, "get_model", lambda name: Model())
+    main._RESPONSE_CACHE.clear()
+    _, status, _ = main.gemini_endpoint(make_request({"prompt": "me conte sobre a empresa"}))
+    assert status == 200
+    assert 0 < seen[0]["timeout"] <= main._MODEL_POLICY.attempt_timeout
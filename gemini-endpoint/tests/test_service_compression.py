@@ -0,0 +1,69 @@
+import gzip
+import importlib.util
+import json
+import os
+
+import pytest
+
+SERVICE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), "gemini-service")
+
+# gemini-service/main.py needs functions_framework; its compression module stands alone
+_spec = importlib.util.spec_from_file_location("service_compression", os.path.join(SERVICE_DIR, "compression.py"))
+compression = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(compression)
+
+
+@pytest.mark.parametrize("header, expected", [
+    (None, None),
+    ("", None),
+    ("gzip", "gzip"),
+    ("deflate, gzip;q=0.5", "gzip"),
+    ("gzip;q=0", None),
+    ("identity", None),
+    ("*", compression.SUPPORTED_ENCODINGS[0]),
+    ("*;q=0.1, gzip;q=0", "br" if compression.brotli else None),
+    ("gzip;q=bad", None),
+])
+def test_negotiate_encoding(header, expected):
+    assert compression.negotiate_encoding(header) == expected
+
+
+def test_etag_changes_with_the_kb_version_and_context_and_matches_any_coding():
+    etag = compression.make_etag("kb-1", {"a": 1}, None)
+    assert etag == compression.make_etag("kb-1", {"a": 1}, None)
+    assert etag != compression.make_etag("kb-2", {"a": 1}, None)
+    assert etag != compression.make_etag("kb-1", {"a": 2}, None)
+
+    assert compression.representation_etag(etag, "gzip") == f'"{etag}-gzip"'
+    assert compression.etag_matches(compression.representation_etag(etag, "gzip"), etag)
+    assert compression.etag_matches(f'"other", W/"{etag}"', etag)
+    assert compression.etag_matches("*", etag)
+    assert not compression.etag_matches('"other-gzip"', etag)
+    assert not compression.etag_matches(None, etag)
+
+
+def test_prefix_body_gzip_round_trips_to_the_json_body():
+    prefix = 'Missões "KB"\n' * 200
+    body = compression.PrefixBody("Prompt generated", prefix)
+    for suffix in ["", "Pergunta: oi\n", "ção \\ \"aspas\"\t"]:
+        expected = {"message": "Prompt generated", "debug_prompt": prefix + suffix}
+        assert json.loads(body.body(suffix)) == expected
+        compressed = compression.encode_body(body, suffix, "gzip", "etag", compression.BodyCache())
+        assert json.loads(gzip.decompress(compressed)) == expected
+        assert len(compressed) < len(body.body(suffix)) / 5
+    assert compression.encode_body(body, "x", None, "etag", compression.BodyCache()) == body.body("x")
+
+
+def test_body_cache_builds_once_per_key_and_evicts_the_least_recent():
+    cache = compression.BodyCache(max_entries=2)
+    built = []
+
+    def build(value):
+        return lambda: built.append(value) or value
+
+    assert cache.get_or_build("a", build(b"a")) == b"a"
+    assert cache.get_or_build("b", build(b"b")) == b"b"
+    assert cache.get_or_build("a", build(b"a2")) == b"a"
+    cache.get_or_build("c", build(b"c"))  # Evicts "b"
+    assert cache.get_or_build("b", build(b"b2")) == b"b2"
+    assert built == [b"a", b"b", b"c", b"b2"] and (cache.hits, cache.misses) == (1, 4)
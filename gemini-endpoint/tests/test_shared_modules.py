@@ -0,0 +1,18 @@
+import os
+
+import pytest
+
+ENDPOINT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SERVICE_DIR = os.path.join(os.path.dirname(ENDPOINT_DIR), "gemini-service")
+
+# Modules both deployments ship; each folder deploys on its own, so they are copies
+SHARED_MODULES = ["asgi.py", "concurrency.py", "kb_format.py", "kb_manager.py"]
+
+
+@pytest.mark.parametrize("name", SHARED_MODULES)
+def test_service_copy_matches_the_endpoint(name):
+    with open(os.path.join(ENDPOINT_DIR, name), encoding="utf-8") as f:
+        endpoint = f.read()
+    with open(os.path.join(SERVICE_DIR, name), encoding="utf-8") as f:
+        service = f.read()
+    assert service == endpoint, f"gemini-service/{name} differs from gemini-endpoint/{name}; copy the edited one over"
@@ -0,0 +1,125 @@
+import asyncio
+import threading
+import time
+
+import main
+import model_registry
+from single_flight import SingleFlight
+
+
+def _wait_for_waiters(flight, key, count):
+    """Waits until `key` is in flight with `count` callers waiting on its leader."""
+    deadline = time.monotonic() + 5
+    while flight.stats()["inFlight"].get(key, -1) < count:
+        assert time.monotonic() < deadline, "the callers never joined the call"
+        time.sleep(0.005)
+
+
+def test_concurrent_callers_share_one_call():
+    flight = SingleFlight()
+    release = threading.Event()
+    calls = []
+    results = []
+
+    def fn():
+        calls.append(1)
+        release.wait(5)
+        return "answer"
+
+    threads = [threading.Thread(target=lambda: results.append(flight.do("key", fn))) for _ in range(4)]
+    threads[0].start()
+    _wait_for_waiters(flight, "key", 0)
+    for thread in threads[1:]:
+        thread.start()
+    _wait_for_waiters(flight, "key", 3)
+    release.set()
+    for thread in threads:
+        thread.join(5)
+
+    assert len(calls) == 1
+    assert sorted(results) == [("answer", False)] + [("answer", True)] * 3
+    stats = flight.stats()
+    assert (stats["leaders"], stats["coalesced"], stats["maxWaiters"], stats["inFlight"]) == (1, 3, 3, {})
+    assert flight.do("key", lambda: "again") == ("again", False)  # Nothing is kept after the call
+
+
+def test_followers_receive_the_leaders_exception():
+    flight = SingleFlight()
+    release = threading.Event()
+    errors = []
+
+    def fn():
+        release.wait(5)
+        raise ConnectionError("down")
+
+    def caller():
+        try:
+            flight.do("key", fn)
+        except ConnectionError as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=caller) for _ in range(2)]
+    threads[0].start()
+    _wait_for_waiters(flight, "key", 0)
+    threads[1].start()
+    _wait_for_waiters(flight, "key", 1)
+    release.set()
+    for thread in threads:
+        thread.join(5)
+    assert len(errors) == 2 and errors[0] is errors[1]
+
+
+def test_concurrent_coroutines_share_one_call():
+    flight = SingleFlight()
+    calls = []
+
+    async def fn():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return "answer"
+
+    async def run():
+        return await asyncio.gather(*(flight.do_async("key", fn) for _ in range(3)))
+
+    assert asyncio.run(run()) == [("answer", False), ("answer", True), ("answer", True)]
+    assert len(calls) == 1 and flight.stats()["coalesced"] == 2
+
+
+def test_identical_concurrent_requests_make_one_model_call(monkeypatch, make_request):
+    release = threading.Event()
+    calls = []
+
+    class Model:
+        def generate_content(self, prompt, generation_config=None, stream=False, request_options=None):
+            calls.append(prompt)
+            release.wait(5)
+            return model_registry._MockGenai.GenerativeModel("mock").generate_content(prompt, stream=stream)
+
+    monkeypatch.setenv("GEMINI_API_KEY", "test-key")
+    monkeypatch.setattr(model_registry, "get_model", lambda name: Model())
+    monkeypatch.setattr(main, "_SINGLE_FLIGHT", SingleFlight())
+    main._RESPONSE_CACHE.clear()
+    responses = []
+
+    def post():
+        payload = {"prompt": "me conte sobre a empresa"}
+        responses.append(main.gemini_endpoint(make_request(payload, remote_addr="192.0.2.10")))
+
+    threads = [threading.Thread(target=post) for _ in range(2)]
+    threads[0].start()
+    deadline = time.monotonic() + 5
+    while not calls:
+        assert time.monotonic() < deadline, "the model was never called"
+        time.sleep(0.005)
+    threads[1].start()
+    [key] = main._SINGLE_FLIGHT.stats()["inFlight"]
+    _wait_for_waiters(main._SINGLE_FLIGHT, key, 1)
+    release.set()
+    for thread in threads:
+        thread.join(5)
+
+    assert len(calls) == 1
+    assert [status for _, status, _ in responses] == [200, 200]
+    assert responses[0][0] == responses[1][0]
+    assert sorted(headers.get("X-Coalesced", "0") for _, _, headers in responses) == ["0", "1"]
+
@@ -0,0 +1,78 @@
+import gc
+import json
+
+import pytest
+
+import main
+from streaming import MessageStreamParser, sse_event, stream_model_reply
+
+
+class Chunk:
+    def __init__(self, text):
+        self.text = text
+
+
+def _stream_request(monkeypatch, make_request, prompt):
+    monkeypatch.setenv("GEMINI_API_KEY", "test-key")
+    main._RESPONSE_CACHE.clear()
+    body, status, headers = main.gemini_endpoint(make_request({"prompt": prompt, "stream": True}))
+    assert status == 200 and headers["Content-Type"].startswith("text/event-stream")
+    return body
+
+
+def test_unstarted_stream_releases_its_shedder_slot(monkeypatch, make_request):
+    body = _stream_request(monkeypatch, make_request, "me conte sobre a empresa")
+    assert main._ADMISSION.shedder.in_flight == 1
+    body.close()
+    del body
+    gc.collect()
+    assert main._ADMISSION.shedder.in_flight == 0
+
+
+def test_finished_stream_releases_its_shedder_slot(monkeypatch, make_request):
+    body = _stream_request(monkeypatch, make_request, "como funciona a instalação")
+    events = "".join(body)
+    assert "event: done" in events
+    assert main._ADMISSION.shedder.in_flight == 0
+
+
+def _feed_all(text, size):
+    parser = MessageStreamParser()
+    return "".join(parser.feed(text[i:i + size]) for i in range(0, len(text), size))
+
+
+@pytest.mark.parametrize("size", [1, 2, 3, 7, 1000])
+def test_parser_decodes_the_message_across_any_chunking(size):
+    message = 'Olá, "janela" \\ de correr\n\tçã 😀 é'
+    text = json.dumps({"status": "success", "message": message, "data": {"target": "product-choice"}})
+    assert _feed_all(text, size) == message
+    assert _feed_all(json.dumps({"message": message}, ensure_ascii=False), size) == message
+
+
+def test_parser_ignores_nested_and_value_strings_named_message():
+    text = json.dumps({
+        "status": "message",
+        "data": {"message": "nested", "payload": {"a": ["message", {"message": "deep"}]}},
+        "message": "top",
+    })
+    assert _feed_all(text, 5) == "top"
+
+
+def test_parser_stops_after_the_first_top_level_message():
+    parser = MessageStreamParser()
+    assert parser.feed('{"message": "one", ') == "one"
+    assert parser.feed('"message": "two"}') == ""
+
+
+def test_stream_events_end_with_the_validated_reply():
+    reply = {"status": "success", "message": "Oi", "data": {"target": "product-choice", "payload": {}}}
+    text = json.dumps(reply)
+    events = list(stream_model_reply(Chunk(text[i:i + 4]) for i in range(0, len(text), 4)))
+    assert "".join(json.loads(e.split("data: ", 1)[1])["delta"] for e in events if e.startswith("event: message")) == "Oi"
+    assert events[-1] == sse_event("done", json.dumps(reply))
+
+
+def test_stream_reports_invalid_json_as_an_error_event():
+    events = list(stream_model_reply([Chunk('{"message": "Oi", "data": ')]))
+    assert events[0].startswith("event: message")
+    assert events[-1].startswith("event: error") and "Model returned invalid JSON" in events[-1]
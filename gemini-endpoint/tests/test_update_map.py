@@ -0,0 +1,186 @@
+import json
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), "code_control"))
+
+import update_map  # noqa: E402
+
+
+@pytest.fixture
+def project(tmp_path, monkeypatch):
+    """A throwaway project root with an empty scripts/ tree; every update_map output goes under it."""
+    scripts = tmp_path / "scripts"
+    (scripts / "utils").mkdir(parents=True)
+    (tmp_path / "code_control").mkdir()
+    for name, path in {
+        "PROJECT_ROOT": tmp_path,
+        "SCRIPTS_DIR": scripts,
+        "MAP_FILE": tmp_path / "code_control" / "codebase-map.json",
+        "INDEX_FILE": tmp_path / "code_control" / "codebase-index.json",
+        "CACHE_FILE": tmp_path / "code_control" / ".update_map_cache.json",
+        "JS_MAP_FILE": scripts / "utils" / "codebaseMap.js",
+        "JS_MAP_DIR": scripts / "utils" / "codebaseMap",
+    }.items():
+        monkeypatch.setattr(update_map, name, str(path))
+    monkeypatch.setattr(update_map.scan_files, "__defaults__", (None, None, str(scripts)))  # Bound at import
+    return tmp_path
+
+
+def _write(path, text):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(text, encoding="utf-8")
+
+
+def _scan(cache):
+    return update_map.scan_files(cache, workers=1, scripts_dir=update_map.SCRIPTS_DIR)
+
+
+def test_rescan_extracts_only_changed_files(project, monkeypatch):
+    scripts = project / "scripts"
+    _write(scripts / "ui" / "a.js", "export function render(state) {}\n")
+    _write(scripts / "data" / "b.js", "export const TABLE = [];\n")
+    cache = update_map.load_cache()
+    assert [el["name"] for el in _scan(cache)] == ["TABLE", "render"]
+
+    extracted = []
+    extract_file = update_map.extract_file
+
+    def counting(job):
+        digest, result = extract_file(job)
+        extracted.append((job[1], result is not None))
+        return digest, result
+
+    monkeypatch.setattr(update_map, "extract_file", counting)
+
+    assert [el["name"] for el in _scan(cache)] == ["TABLE", "render"]
+    assert extracted == []  # Same mtime and size: not even read
+
+    _write(scripts / "data" / "b.js", "export const TABLE = [];\nexport const ROWS = 3;\n")
+    os.utime(scripts / "ui" / "a.js", ns=(1, 1))  # Touched, same bytes
+    assert [el["name"] for el in _scan(cache)] == ["TABLE", "ROWS", "render"]
+    assert sorted(extracted) == [("scripts/data/b.js", True), ("scripts/ui/a.js", False)]
+
+    (scripts / "data" / "b.js").unlink()
+    assert [el["name"] for el in _scan(cache)] == ["render"]
+    assert set(cache["files"]) == {"scripts/ui/a.js"}
+
+
+def test_outdated_cache_version_starts_empty(project):
+    _write(project / "code_control" / ".update_map_cache.json",
+           '{"version": 0, "files": {"scripts/x.js": {}}}')
+    assert update_map.load_cache() == {"version": update_map.CACHE_VERSION, "files": {}}
+
+
+def test_unchanged_outputs_are_not_rewritten(project):
+    _write(project / "scripts" / "ui" / "a.js", "export function render(state) {}\n")
+    cache = update_map.load_cache()
+    data = update_map.merge_maps({}, _scan(cache))
+    update_map.write_outputs(data, cache)
+    outputs = [update_map.MAP_FILE, update_map.INDEX_FILE, os.path.join(update_map.JS_MAP_DIR, "index.js")]
+    for path in outputs:
+        os.utime(path, ns=(1, 1))
+
+    update_map.write_outputs(update_map.merge_maps(data, _scan(cache)), cache)
+    assert [os.stat(path).st_mtime_ns for path in outputs] == [1, 1, 1]
+
+
+def test_write_if_changed_replaces_the_file_atomically(project, monkeypatch):
+    path = project / "code_control" / "out.json"
+    _write(path, "old")
+    os.chmod(path, 0o640)
+    assert update_map.write_if_changed(str(path), "new")
+    assert path.read_text() == "new" and os.stat(path).st_mode & 0o777 == 0o640
+    assert not update_map.write_if_changed(str(path), "new")
+
+    def fail(src, dst):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(update_map.os, "replace", fail)
+    with pytest.raises(OSError):
+        update_map.write_if_changed(str(path), "newer")
+    assert path.read_text() == "new"
+    assert sorted(os.listdir(path.parent)) == ["out.json"]  # No temp file left behind
+
+
+def test_polling_watcher_reports_created_changed_and_deleted_scripts(project):
+    scripts = project / "scripts"
+    _write(scripts / "ui" / "a.js", "export const A = 1;\n")
+    watcher = update_map.PollingWatcher(str(scripts), interval=0.01)
+    assert watcher.wait(0.03) == set()
+
+    _write(scripts / "ui" / "a.js", "export const A = 10;\n")
+    _write(scripts / "ui" / "b.js", "export const B = 2;\n")
+    _write(scripts / "ui" / "notes.txt", "not a script")
+    assert watcher.wait(1) == {"scripts/ui/a.js", "scripts/ui/b.js"}
+    (scripts / "ui" / "b.js").unlink()
+    assert watcher.wait(1) == {"scripts/ui/b.js"}
+
+
+def test_watch_regenerates_the_map_after_a_burst_of_saves(project, monkeypatch):
+    scripts = project / "scripts"
+    _write(scripts / "ui" / "a.js", "export const A = 1;\n")
+    _write(scripts / "ui" / "b.js", "export const B = 2;\n")
+
+    class Watcher:
+        def __init__(self):
+            self.events = [{"scripts/ui/a.js"}, {"scripts/ui/b.js"}, set()]  # Two saves, then quiet
+
+        def wait(self, timeout=None):
+            if not self.events:
+                raise KeyboardInterrupt
+            if len(self.events) == 3:
+                _write(scripts / "ui" / "a.js", "export const A = 1;\nexport const A2 = 3;\n")
+                (scripts / "ui" / "b.js").unlink()
+            return self.events.pop(0)
+
+        def close(self):
+            pass
+
+    rescanned = []
+    rescan_paths = update_map.rescan_paths
+    monkeypatch.setattr(update_map, "make_watcher", lambda root, interval, polling=False: Watcher())
+    monkeypatch.setattr(update_map, "rescan_paths",
+                        lambda cache, paths: rescanned.append(paths) or rescan_paths(cache, paths))
+    update_map.watch(debounce=0)
+
+    assert rescanned == [{"scripts/ui/a.js", "scripts/ui/b.js"}]  # One regeneration for the burst
+    data = json.loads((project / "code_control" / "codebase-map.json").read_text())
+    assert [el["name"] for el in data["elements"]] == ["A", "A2"]
+
+
+def _elements(*pairs):
+    return {"elements": [{"name": name, "categories": [category], "file": "scripts/x.js"} for name, category in pairs]}
+
+
+def test_split_map_writes_hashed_chunks_per_category_and_drops_stale_ones(project):
+    js_dir = project / "scripts" / "utils" / "codebaseMap"
+    assert update_map.generate_split_js_map(_elements(("render", "UI"), ("TABLE", "Data Layer")))
+    first = sorted(os.listdir(js_dir))
+    assert len(first) == 3 and "index.js" in first
+    [ui_chunk] = [name for name in first if name.startswith("ui.")]
+    assert (js_dir / ui_chunk).read_text().endswith('export const ELEMENTS=[{"name":"render","categories":["UI"],"file":"scripts/x.js"}];\n')
+    index = (js_dir / "index.js").read_text()
+    assert f'"UI":"./{ui_chunk}"' in index and '"TABLE":"Data Layer"' in index
+    assert any(name.startswith("data-layer.") for name in first)
+
+    assert not update_map.generate_split_js_map(_elements(("render", "UI"), ("TABLE", "Data Layer")))
+    assert update_map.generate_split_js_map(_elements(("render", "UI"), ("paint", "UI")))
+    second = sorted(os.listdir(js_dir))
+    assert len(second) == 2 and ui_chunk not in second  # New content, new name; the old chunks are gone
+
+
+def test_each_js_map_mode_removes_the_others_output(project, capsys):
+    data = _elements(("render", "UI"))
+    full_file = project / "scripts" / "utils" / "codebaseMap.js"
+    js_dir = project / "scripts" / "utils" / "codebaseMap"
+    update_map.generate_js_map(data)
+    assert full_file.exists() and not js_dir.exists()
+    update_map.generate_split_js_map(data)
+    assert not full_file.exists() and (js_dir / "index.js").exists()
+    importer = {"imports": [{"module": "scripts/utils/codebaseMap/index.js", "kind": "import", "names": ["findElement"]}]}
+    assert update_map.generate_js_map(data, {"files": {"scripts/utils/logger.js": importer}})
+    assert full_file.exists() and not js_dir.exists()
+    assert "scripts/utils/logger.js imports scripts/utils/codebaseMap/index.js; point it at './codebaseMap.js'" in capsys.readouterr().err
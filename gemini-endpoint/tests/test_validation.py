@@ -0,0 +1,93 @@
+import json
+
+import pytest
+
+from validation import InvalidReply, parse_model_json, reask_prompt, repair_reply
+
+VALID = {"status": "success", "message": "Ok", "data": {"target": "product-choice", "payload": {"categoria": "janela"}}}
+
+
+def test_valid_reply_needs_no_repair():
+    reply, repairs = repair_reply(json.dumps(VALID))
+    assert reply == VALID and repairs == []
+
+
+def test_fenced_reply_is_unwrapped():
+    reply, repairs = repair_reply("```json\n" + json.dumps(VALID) + "\n```")
+    assert reply == VALID and repairs == ["json unwrapped"]
+
+
+def test_truncated_reply_is_closed():
+    text = json.dumps(VALID)
+    reply, repairs = repair_reply(text[:text.index('"categoria"') + len('"categoria": "jan')])
+    assert reply["message"] == "Ok" and "json truncated" in repairs
+
+
+@pytest.mark.parametrize("attribute, value, expected", [
+    ("material", "Vidro", "vidro"),
+    ("folhas", "3", 3),
+    ("persiana", True, "sim"),
+    ("persiana", "não", "nao"),
+    ("sistema", "De Correr", "janela-correr"),
+    ("sistema", "maxim ar", "maxim-ar"),
+])
+def test_near_miss_facet_values_are_normalized(attribute, value, expected):
+    text = json.dumps({**VALID, "data": {"target": "product-choice", "payload": {"categoria": "janela", attribute: value}}})
+    reply, repairs = repair_reply(text)
+    assert reply["data"]["payload"][attribute] == expected
+    assert repairs == [f"{attribute}: {value!r} -> {expected!r}"]
+
+
+def test_shared_label_is_resolved_by_the_category():
+    text = json.dumps({**VALID, "data": {"target": "product-choice", "payload": {"sistema": "De Correr"}}})
+    reply, _ = repair_reply(text, {"categoria": "porta"})
+    assert reply["data"]["payload"] == {"sistema": "porta-correr"}
+
+
+def test_unknown_keys_and_values_are_dropped():
+    text = json.dumps({**VALID, "extra": 1, "data": {"target": "product-choice",
+                                                      "payload": {"categoria": "janela", "cor": "azul", "folhas": 5}}})
+    reply, repairs = repair_reply(text)
+    assert reply["data"]["payload"] == {"categoria": "janela"}
+    assert set(repairs) == {"dropped cor", "dropped folhas=5", "dropped extra"}
+
+
+def test_motorized_without_blind_implies_a_blind():
+    text = json.dumps({**VALID, "data": {"target": "product-choice", "payload": {"persianaMotorizada": "motorizada"}}})
+    reply, _ = repair_reply(text)
+    assert reply["data"]["payload"] == {"persianaMotorizada": "motorizada", "persiana": "sim"}
+
+
+def test_missing_target_is_inferred_from_the_payload():
+    text = json.dumps({"status": "success", "message": "Anotado", "data": {"payload": {"userName": " Ana ", "talkToHuman": "sim"}}})
+    reply, repairs = repair_reply(text)
+    assert reply["data"] == {"target": "user-data", "payload": {"userName": "Ana", "talkToHuman": True}}
+    assert "target: None -> 'user-data'" in repairs
+
+
+def test_invalid_email_is_dropped():
+    text = json.dumps({"status": "success", "message": "Ok",
+                       "data": {"target": "user-data", "payload": {"userEmail": "ana@"}}})
+    reply, repairs = repair_reply(text)
+    assert reply["data"]["payload"] == {} and repairs == ["dropped userEmail='ana@'"]
+
+
+@pytest.mark.parametrize("text, reason", [
+    ("Desculpe, não entendi.", "reply is not JSON"),
+    ("[1, 2]", "reply is not a JSON object"),
+    (json.dumps({"status": "success", "data": VALID["data"]}), "missing 'message'"),
+    (json.dumps({"message": "Ok", "data": {"target": "x", "payload": {"cor": "azul"}}}), "invalid target 'x'"),
+])
+def test_unrepairable_replies_raise(text, reason):
+    with pytest.raises(InvalidReply, match=reason):
+        repair_reply(text)
+
+
+def test_parse_model_json_reports_the_recovery():
+    assert parse_model_json('{"a": 1}') == ({"a": 1}, None)
+    assert parse_model_json('Resposta: {"a": 1} fim') == ({"a": 1}, "unwrapped")
+
+
+def test_reask_prompt_names_the_reason():
+    prompt = reask_prompt("SYSTEM", "missing 'message'")
+    assert prompt.startswith("SYSTEM\n\n**CORRECTION**") and "missing 'message'" in prompt
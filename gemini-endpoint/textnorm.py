@@ -0,0 +1,16 @@
+"""Portuguese-aware text normalization shared by the rule engine and KB search."""
+import re
+import unicodedata
+
+PATTERN_TOKEN = re.compile(r"[a-z0-9]+")
+
+
+def fold(text):
+    """Lower-cases and strips accents so patterns can be written in plain ASCII."""
+    decomposed = unicodedata.normalize("NFKD", str(text).casefold())
+    return "".join(ch for ch in decomposed if not unicodedata.combining(ch))
+
+
+def tokenize(text):
+    """Splits accent-folded text into alphanumeric tokens."""
+    return PATTERN_TOKEN.findall(fold(text))
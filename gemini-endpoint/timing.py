@@ -0,0 +1,125 @@
+"""Per-stage request timing.
+
+Each request gets a `RequestTimer`; handler stages run inside `timer.span()`.
+The spans are emitted as a `Server-Timing` response header and as one
+structured JSON log line per request (stdout, Cloud Logging format), and are
+aggregated into in-process histograms that can be dumped for inspection.
+"""
+import json
+import os
+import sys
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+
+
+# Configuration
+REQUEST_LOG_ENABLED = os.environ.get("REQUEST_LOG_ENABLED", "1") == "1"
+
+# Histogram bucket upper bounds (ms); the last bucket is open-ended
+BUCKETS_MS = [1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000]
+
+
+class RequestTimer:
+    """Collects named stage durations and log fields for one request."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.spans = []  # [(name, duration_ms)]
+        self.fields = {}
+
+    @contextmanager
+    def span(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.spans.append((name, (time.perf_counter() - start) * 1000.0))
+
+    def total_ms(self):
+        return (time.perf_counter() - self.started) * 1000.0
+
+    def server_timing(self):
+        """Renders the spans as a Server-Timing header value."""
+        parts = [f"{name};dur={duration:.2f}" for name, duration in self.spans]
+        parts.append(f"total;dur={self.total_ms():.2f}")
+        return ", ".join(parts)
+
+    def log(self, method, status, **fields):
+        """Writes the request's structured log line and records it in the histograms."""
+        total = self.total_ms()
+        stages = {name: round(duration, 2) for name, duration in self.spans}
+        HISTOGRAMS.record("total", total)
+        for name, duration in self.spans:
+            HISTOGRAMS.record(name, duration)
+        if not REQUEST_LOG_ENABLED:
+            return
+        entry = {
+            "severity": "ERROR" if status >= 500 else ("WARNING" if status >= 400 else "INFO"),
+            "message": f"{method} {status} in {total:.1f} ms",
+            "httpRequest": {
+                "requestMethod": method,
+                "status": status,
+                "latency": f"{total / 1000.0:.6f}s",
+            },
+            "stagesMs": stages,
+            **self.fields,
+            **fields,
+        }
+        print(json.dumps(entry, ensure_ascii=False, default=str), file=sys.stdout, flush=True)
+
+
+class StageHistograms:
+    """Thread-safe fixed-bucket latency histograms keyed by stage name."""
+
+    def __init__(self, buckets=BUCKETS_MS):
+        self.buckets = buckets
+        self._counts = {}
+        self._sums = {}
+        self._lock = threading.Lock()
+
+    def record(self, stage, duration_ms):
+        index = bisect_left(self.buckets, duration_ms)
+        with self._lock:
+            counts = self._counts.get(stage)
+            if counts is None:
+                counts = self._counts[stage] = [0] * (len(self.buckets) + 1)
+                self._sums[stage] = 0.0
+            counts[index] += 1
+            self._sums[stage] += duration_ms
+
+    def _quantile(self, counts, total, q):
+        threshold = q * total
+        running = 0
+        for index, count in enumerate(counts):
+            running += count
+            if running >= threshold:
+                return self.buckets[index] if index < len(self.buckets) else float("inf")
+        return float("inf")
+
+    def dump(self):
+        """Returns counts, mean and bucket-resolution p50/p95/p99 per stage."""
+        with self._lock:
+            snapshot = {stage: (list(counts), self._sums[stage]) for stage, counts in self._counts.items()}
+        result = {}
+        for stage, (counts, total_ms) in snapshot.items():
+            total = sum(counts)
+            labels = [f"le{bound}" for bound in self.buckets] + ["inf"]
+            result[stage] = {
+                "count": total,
+                "meanMs": round(total_ms / total, 2) if total else 0.0,
+                "p50Ms": self._quantile(counts, total, 0.50),
+                "p95Ms": self._quantile(counts, total, 0.95),
+                "p99Ms": self._quantile(counts, total, 0.99),
+                "buckets": {label: count for label, count in zip(labels, counts) if count},
+            }
+        return result
+
+    def reset(self):
+        with self._lock:
+            self._counts.clear()
+            self._sums.clear()
+
+
+HISTOGRAMS = StageHistograms()
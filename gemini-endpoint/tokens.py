@@ -0,0 +1,135 @@
+"""Offline token estimates and per-request token accounting.
+
+Estimates need no tokenizer download or API call. When the model response
+carries `usage_metadata`, its exact counts are recorded next to the
+estimates, and `TokenStats` keeps rolling totals per (model, reply target)
+so prompt changes can be compared by what they actually cost.
+"""
+import os
+import threading
+import time
+from collections import deque
+
+
+# Configuration
+TOKEN_STATS_WINDOW_SECONDS = int(os.environ.get("TOKEN_STATS_WINDOW_SECONDS", 3600))
+TOKEN_STATS_SLOT_SECONDS = 60
+
+# Gemini tokenizers average roughly 4 characters per token on mixed
+# Portuguese/English prose; JSON punctuation tends to cost a little more.
+CHARS_PER_TOKEN = 4.0
+
+# usage_metadata attribute -> field name in logs and aggregates
+USAGE_FIELDS = {
+    "prompt_token_count": "input",
+    "candidates_token_count": "output",
+    "cached_content_token_count": "cached",
+}
+
+
+def estimate_tokens(text):
+    """Returns an approximate token count for `text`."""
+    if not text:
+        return 0
+    return max(1, int(round(len(text) / CHARS_PER_TOKEN)))
+
+
+def estimate_sections(sections):
+    """Estimated tokens per prompt section from [(name, text)], plus their "total"."""
+    counts = {}
+    for name, text in sections:
+        counts[name] = counts.get(name, 0) + estimate_tokens(text)
+    counts["total"] = sum(counts.values())
+    return counts
+
+
+def usage_counts(response):
+    """Exact counts from a response's (or last stream chunk's) `usage_metadata`, or None."""
+    usage = getattr(response, "usage_metadata", None)
+    if usage is None:
+        return None
+    counts = {}
+    for attribute, field in USAGE_FIELDS.items():
+        value = usage.get(attribute) if isinstance(usage, dict) else getattr(usage, attribute, None)
+        if isinstance(value, int):
+            counts[field] = value
+    return counts or None
+
+
+def add_usage(total, counts):
+    """Adds `counts` into `total` (a dict, updated in place) and returns it."""
+    for field, value in (counts or {}).items():
+        total[field] = total.get(field, 0) + value
+    return total
+
+
+class TokenStats:
+    """Token totals per (model, target): lifetime, and a rolling window in fixed time slots."""
+
+    def __init__(self, window_seconds=TOKEN_STATS_WINDOW_SECONDS, slot_seconds=TOKEN_STATS_SLOT_SECONDS,
+                 clock=time.time):
+        self.window_seconds = window_seconds
+        self.slot_seconds = slot_seconds
+        self.clock = clock
+        self._lifetime = {}
+        self._slots = deque()  # (slot start, {key: totals}), oldest first
+        self._lock = threading.Lock()
+
+    def record(self, model, target, sections, usage=None, output_estimate=0):
+        """Adds one model reply: estimated prompt sections, and exact usage when the model sent it."""
+        totals = {"requests": 1, "outputEstimate": output_estimate}
+        for name, count in sections.items():
+            totals["prompt." + name] = count
+        if usage:
+            add_usage(totals, usage)
+            totals["withUsage"] = 1
+            totals["estimateWithUsage"] = sections.get("total", 0)
+        key = f"{model}/{target or 'none'}"
+        now = self.clock()
+        slot = now - now % self.slot_seconds
+        with self._lock:
+            if not self._slots or self._slots[-1][0] != slot:
+                self._slots.append((slot, {}))
+            self._expire(now)
+            for bucket in (self._lifetime, self._slots[-1][1]):
+                add_usage(bucket.setdefault(key, {}), totals)
+
+    def _expire(self, now):
+        while self._slots and self._slots[0][0] <= now - self.window_seconds:
+            self._slots.popleft()
+
+    @staticmethod
+    def _summarize(totals):
+        result = dict(sorted(totals.items()))
+        requests = totals.get("requests", 0)
+        if requests:
+            result["meanPromptEstimate"] = round(totals.get("prompt.total", 0) / requests, 1)
+        if totals.get("estimateWithUsage"):
+            # Exact over estimated input tokens: how far CHARS_PER_TOKEN is off for this traffic
+            result["inputPerEstimate"] = round(totals.get("input", 0) / totals["estimateWithUsage"], 3)
+        return result
+
+    def dump(self):
+        """Returns the window length and {"model/target": {"lifetime", "window"}} sums with derived ratios."""
+        with self._lock:
+            self._expire(self.clock())
+            window = {}
+            for _, bucket in self._slots:
+                for key, totals in bucket.items():
+                    add_usage(window.setdefault(key, {}), totals)
+            lifetime = {key: dict(totals) for key, totals in self._lifetime.items()}
+        return {
+            "windowSeconds": self.window_seconds,
+            "byModelTarget": {
+                key: {"lifetime": self._summarize(lifetime[key]), "window": self._summarize(window.get(key, {}))}
+                for key in sorted(lifetime)
+            },
+        }
+
+    def reset(self):
+        with self._lock:
+            self._lifetime.clear()
+            self._slots.clear()
+
+
+TOKEN_STATS = TokenStats()
@@ -0,0 +1,278 @@
+"""Output contract validation and local repair of model replies.
+
+`repair_reply` accepts the raw model text and returns a reply that satisfies
+the `{status, message, data: {target, payload}}` contract: fenced or truncated
+JSON is recovered, near-miss facet values are normalized against schema.py
+("Vidro", "3", "com motor"), and unknown keys are dropped. Only replies that
+cannot be repaired locally raise `InvalidReply`, in which case the caller may
+re-ask the model once with `reask_prompt`.
+"""
+import json
+import re
+
+from intents import PATTERN_EMAIL, parse_facets
+from schema import ATTRIBUTE_LABELS, TARGET_PRODUCT, TARGET_USER, USER_DATA_FIELDS, VALID_ATTRIBUTES
+from textnorm import PATTERN_TOKEN, fold
+
+
+class InvalidReply(ValueError):
+    """The model reply violates the output contract and cannot be repaired locally."""
+
+
+PATTERN_FENCE = re.compile(r"^\s*```[\w-]*\s*|\s*```\s*$")
+
+_TRUE_WORDS = frozenset(["true", "sim", "yes", "1"])
+_FALSE_WORDS = frozenset(["false", "nao", "no", "0"])
+
+
+def _build_value_table():
+    """Folded value and label -> canonical value, per attribute.
+
+    Labels shared by several values ("De Correr") are left out, so the
+    category in context decides them (see `normalize_facet`).
+    """
+    table = {}
+    for attribute, values in VALID_ATTRIBUTES.items():
+        lookup = table[attribute] = {}
+        ambiguous = set()
+        for value in values:
+            lookup[fold(str(value))] = value
+            label = fold(ATTRIBUTE_LABELS[attribute][value])
+            if lookup.get(label, value) != value:
+                ambiguous.add(label)
+            lookup[label] = value
+        for label in ambiguous:
+            del lookup[label]
+    return table
+
+
+_VALUE_TABLE = _build_value_table()
+
+
+# JSON Recovery
+
+def _close_truncated(text):
+    """Closes an unterminated string and any open containers at the end of `text`."""
+    stack = []
+    in_string = escaped = False
+    for ch in text:
+        if in_string:
+            if escaped:
+                escaped = False
+            elif ch == "\\":
+                escaped = True
+            elif ch == '"':
+                in_string = False
+        elif ch == '"':
+            in_string = True
+        elif ch in "{[":
+            stack.append("}" if ch == "{" else "]")
+        elif ch in "}]" and stack:
+            stack.pop()
+    if escaped:
+        text = text[:-1]
+    if in_string:
+        text += '"'
+    text = text.rstrip().rstrip(",")
+    if text.endswith(":"):
+        text += " null"
+    return text + "".join(reversed(stack))
+
+
+def _comma_offsets(text):
+    """Offsets of commas outside strings, last first."""
+    offsets = []
+    in_string = escaped = False
+    for i, ch in enumerate(text):
+        if in_string:
+            if escaped:
+                escaped = False
+            elif ch == "\\":
+                escaped = True
+            elif ch == '"':
+                in_string = False
+        elif ch == '"':
+            in_string = True
+        elif ch == ",":
+            offsets.append(i)
+    return reversed(offsets)
+
+
+def parse_model_json(text):
+    """Parses the model's JSON, recovering fenced, wrapped or truncated output.
+
+    Returns (value, repaired) where `repaired` names the recovery applied, or
+    raises InvalidReply.
+    """
+    try:
+        return json.loads(text), None
+    except (TypeError, json.JSONDecodeError):
+        pass
+    if not isinstance(text, str) or "{" not in text:
+        raise InvalidReply("reply is not JSON")
+
+    body = PATTERN_FENCE.sub("", text)
+    body = body[body.index("{"):]
+    end = body.rfind("}")
+    if end != -1:
+        try:
+            return json.loads(body[:end + 1]), "unwrapped"
+        except json.JSONDecodeError:
+            pass
+
+    # Truncated output: close what is open, then back off to earlier commas
+    for candidate in [body, *(body[:offset] for offset in _comma_offsets(body))]:
+        try:
+            return json.loads(_close_truncated(candidate)), "truncated"
+        except json.JSONDecodeError:
+            continue
+    raise InvalidReply("reply is not JSON")
+
+
+# Value Normalization
+
+def normalize_facet(attribute, value, context=None):
+    """Returns the canonical value for a facet, or None when it cannot be mapped."""
+    if isinstance(value, bool):
+        return ("sim" if value else "nao") if attribute == "persiana" else None
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    if value in VALID_ATTRIBUTES[attribute]:
+        return value
+    if value is None or isinstance(value, (dict, list)):
+        return None
+
+    folded = fold(str(value))
+    direct = _VALUE_TABLE[attribute].get(folded)
+    if direct is not None:
+        return direct
+    if attribute == "persiana":
+        if folded in _TRUE_WORDS:
+            return "sim"
+        if folded in _FALSE_WORDS:
+            return "nao"
+
+    parsed = parse_facets(PATTERN_TOKEN.findall(folded), context)
+    if parsed and attribute in parsed:
+        return parsed[attribute]
+    return None
+
+
+def _normalize_product_payload(payload, product_choice, repairs):
+    context = {**(product_choice or {}), **payload}
+    result = {}
+    for attribute, value in payload.items():
+        if attribute not in VALID_ATTRIBUTES:
+            repairs.append(f"dropped {attribute}")
+            continue
+        canonical = normalize_facet(attribute, value, context)
+        if canonical is None:
+            repairs.append(f"dropped {attribute}={value!r}")
+            continue
+        if canonical != value:
+            repairs.append(f"{attribute}: {value!r} -> {canonical!r}")
+        result[attribute] = canonical
+
+    # persianaMotorizada is only meaningful with persiana="sim"
+    if "persianaMotorizada" in result:
+        if result.get("persiana") == "nao":
+            del result["persianaMotorizada"]
+            repairs.append("dropped persianaMotorizada (persiana=nao)")
+        elif "persiana" not in result:
+            result["persiana"] = "sim"
+    return result
+
+
+def _normalize_user_payload(payload, repairs):
+    result = {}
+    for field, value in payload.items():
+        if field not in USER_DATA_FIELDS:
+            repairs.append(f"dropped {field}")
+        elif field == "talkToHuman":
+            if isinstance(value, bool):
+                result[field] = value
+            elif fold(str(value)) in _TRUE_WORDS | _FALSE_WORDS:
+                result[field] = fold(str(value)) in _TRUE_WORDS
+                repairs.append(f"talkToHuman: {value!r} -> {result[field]!r}")
+            else:
+                repairs.append(f"dropped talkToHuman={value!r}")
+        elif field == "userPhone" and isinstance(value, int) and not isinstance(value, bool):
+            result[field] = str(value)
+            repairs.append(f"userPhone: {value!r} -> {result[field]!r}")
+        elif not isinstance(value, str) or not value.strip():
+            if value not in (None, ""):
+                repairs.append(f"dropped {field}={value!r}")
+        elif field == "userEmail" and not PATTERN_EMAIL.fullmatch(value.strip()):
+            repairs.append(f"dropped userEmail={value!r}")
+        else:
+            result[field] = value.strip()
+    return result
+
+
+def _infer_target(payload):
+    keys = set(payload)
+    if keys and keys <= set(USER_DATA_FIELDS):
+        return TARGET_USER
+    if keys <= set(VALID_ATTRIBUTES):
+        return TARGET_PRODUCT
+    return None
+
+
+def repair_reply(text, product_choice=None):
+    """Validates and normalizes a model reply against the output contract.
+
+    Returns (reply, repairs), `repairs` listing every change made, or raises
+    InvalidReply when the reply cannot be fixed without the model.
+    """
+    reply, recovered = parse_model_json(text)
+    repairs = [f"json {recovered}"] if recovered else []
+    if not isinstance(reply, dict):
+        raise InvalidReply("reply is not a JSON object")
+
+    message = reply.get("message")
+    if not isinstance(message, str) or not message.strip():
+        raise InvalidReply("missing 'message'")
+
+    data = reply.get("data")
+    if not isinstance(data, dict):
+        data = {}
+        repairs.append("added data")
+    payload = data.get("payload")
+    if not isinstance(payload, dict):
+        payload = {}
+        if data.get("payload") is not None:
+            repairs.append("dropped non-object payload")
+
+    target = data.get("target")
+    if target not in (TARGET_PRODUCT, TARGET_USER):
+        inferred = _infer_target(payload)
+        if inferred is None:
+            raise InvalidReply(f"invalid target {target!r}")
+        repairs.append(f"target: {target!r} -> {inferred!r}")
+        target = inferred
+
+    if target == TARGET_PRODUCT:
+        payload = _normalize_product_payload(payload, product_choice, repairs)
+    else:
+        payload = _normalize_user_payload(payload, repairs)
+
+    if reply.get("status") != "success":
+        repairs.append(f"status: {reply.get('status')!r} -> 'success'")
+    extra = set(reply) - {"status", "message", "data"}
+    if extra:
+        repairs.append(f"dropped {', '.join(sorted(extra))}")
+
+    return {
+        "status": "success",
+        "message": message.strip(),
+        "data": {"target": target, "payload": payload},
+    }, repairs
+
+
+def reask_prompt(system_prompt, reason):
+    """The system prompt extended with a correction request for a single retry."""
+    return (
+        f"{system_prompt}\n\n**CORRECTION**\n"
+        f"Your previous reply was rejected ({reason}). "
+        "Return ONLY the JSON object described in OUTPUT SCHEMA, using only the VALID ATTRIBUTES values."
+    )
@@ -0,0 +1,144 @@
+"""Content negotiation, ETags and precompressed bodies for the debug prompt response.
+
+The response body is `{"message": ..., "debug_prompt": prefix + suffix}`,
+where the prefix (missions, schema and KB) only changes with the KB version.
+`PrefixBody` JSON-escapes the prefix once and primes a gzip stream with it;
+each request copies that stream and compresses only its own suffix. Brotli
+(used when the optional `brotli` package is installed) has no stream copy, so
+its bodies are compressed whole and kept in a small LRU keyed by ETag.
+"""
+import hashlib
+import json
+import os
+import threading
+import zlib
+from collections import OrderedDict
+
+try:
+    import brotli
+except ImportError:
+    brotli = None  # gzip only
+
+
+# Configuration
+GZIP_LEVEL = int(os.environ.get("GZIP_LEVEL", 6))
+BROTLI_QUALITY = int(os.environ.get("BROTLI_QUALITY", 5))
+BODY_CACHE_SIZE = int(os.environ.get("BODY_CACHE_SIZE", 256))
+
+SUPPORTED_ENCODINGS = (["br"] if brotli is not None else []) + ["gzip"]  # Server preference order
+
+
+def negotiate_encoding(accept_encoding):
+    """Picks "br", "gzip" or None (identity) from an Accept-Encoding header value."""
+    if not accept_encoding:
+        return None
+    weights = {}
+    for item in accept_encoding.split(","):
+        coding, _, params = item.strip().partition(";")
+        weight = 1.0
+        for param in params.split(";"):
+            name, _, value = param.strip().partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    weight = float(value)
+                except ValueError:
+                    weight = 0.0
+        weights[coding.strip().lower()] = weight
+    best = None
+    for coding in SUPPORTED_ENCODINGS:
+        weight = weights.get(coding, weights.get("*", 0.0))
+        if weight > 0 and (best is None or weight > best[1]):
+            best = (coding, weight)
+    return best[0] if best else None
+
+
+def make_etag(kb_version, *context):
+    """Strong ETag over the KB version and the request context that shapes the body."""
+    digest = hashlib.sha256(kb_version.encode("utf-8"))
+    for value in context:
+        digest.update(b"\0" + json.dumps(value, sort_keys=True, ensure_ascii=False).encode("utf-8"))
+    return digest.hexdigest()[:32]
+
+
+def representation_etag(etag, encoding):
+    """The quoted ETag header value; each content coding is its own representation."""
+    return f'"{etag}-{encoding}"' if encoding else f'"{etag}"'
+
+
+def etag_matches(if_none_match, etag):
+    """True if an If-None-Match value names any representation of `etag`."""
+    if not if_none_match:
+        return False
+    for tag in if_none_match.split(","):
+        tag = tag.strip()
+        if tag == "*":
+            return True
+        tag = tag[2:] if tag.startswith("W/") else tag
+        tag = tag.strip('"')
+        if tag == etag or tag.rsplit("-", 1)[0] == etag:
+            return True
+    return False
+
+
+def _escape(text):
+    """JSON string contents without the quotes (escapes are per character, so pieces concatenate)."""
+    return json.dumps(text)[1:-1]
+
+
+class PrefixBody:
+    """The response body's constant head for one prompt prefix, raw and as a primed gzip stream."""
+
+    def __init__(self, message, prefix):
+        self.head = (json.dumps({"message": message, "debug_prompt": ""})[:-2] + _escape(prefix)).encode("utf-8")
+        self._gzip = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 31)  # wbits 31: gzip container
+        self._gzip_head = self._gzip.compress(self.head)
+
+    def body(self, suffix):
+        """The full, uncompressed JSON body."""
+        return self.head + self._tail(suffix)
+
+    def gzip(self, suffix):
+        """The gzip body, compressing only the suffix on a copy of the primed stream."""
+        stream = self._gzip.copy()
+        tail = self._tail(suffix)
+        return self._gzip_head + stream.compress(tail) + stream.flush()
+
+    @staticmethod
+    def _tail(suffix):
+        return (_escape(suffix) + '"}').encode("utf-8")
+
+
+class BodyCache:
+    """LRU of encoded bodies keyed by (etag, encoding)."""
+
+    def __init__(self, max_entries=BODY_CACHE_SIZE):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get_or_build(self, key, build):
+        with self._lock:
+            body = self._entries.get(key)
+            if body is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return body
+            self.misses += 1
+        body = build()
+        with self._lock:
+            self._entries[key] = body
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return body
+
+
+def encode_body(prefix_body, suffix, encoding, etag, cache):
+    """Returns the body bytes for `encoding` (None: identity)."""
+    if encoding == "gzip":
+        return prefix_body.gzip(suffix)
+    if encoding == "br":
+        return cache.get_or_build((etag, encoding),
+                                  lambda: brotli.compress(prefix_body.body(suffix), quality=BROTLI_QUALITY))
+    return prefix_body.body(suffix)
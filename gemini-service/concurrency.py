@@ -0,0 +1,73 @@
+"""Bounded concurrency for the async (ASGI) serving mode.
+
+At most `max_in_flight` model calls run at once; up to `max_queue` further
+requests wait for a slot for at most `queue_timeout` seconds. Anything beyond
+that is rejected with `Overloaded`, which handlers turn into a 429.
+
+gemini-service ships a copy of this module (the folders deploy separately);
+gemini-endpoint/tests/test_shared_modules.py checks the copies match.
+"""
+import asyncio
+import os
+from contextlib import asynccontextmanager
+
+
+# Configuration
+MAX_IN_FLIGHT = int(os.environ.get("ASYNC_MAX_IN_FLIGHT", 256))
+MAX_QUEUE = int(os.environ.get("ASYNC_MAX_QUEUE", 512))
+QUEUE_TIMEOUT_SECONDS = float(os.environ.get("ASYNC_QUEUE_TIMEOUT_SECONDS", 5.0))
+
+
+class Overloaded(Exception):
+    """Raised when no slot is available within the queue limits."""
+
+    def __init__(self, message, retry_after=1):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class ConcurrencyLimiter:
+    """Semaphore with a bounded, time-limited wait queue."""
+
+    def __init__(self, max_in_flight=MAX_IN_FLIGHT, max_queue=MAX_QUEUE, queue_timeout=QUEUE_TIMEOUT_SECONDS):
+        self.max_in_flight = max_in_flight
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self._semaphore = asyncio.Semaphore(max_in_flight)
+        self.in_flight = 0
+        self.waiting = 0
+        self.rejected = 0
+
+    @asynccontextmanager
+    async def slot(self):
+        """Holds one in-flight slot for the duration of the block."""
+        if self._semaphore.locked():
+            if self.waiting >= self.max_queue:
+                self.rejected += 1
+                raise Overloaded("Server busy: queue full")
+            self.waiting += 1
+            try:
+                await asyncio.wait_for(self._semaphore.acquire(), timeout=self.queue_timeout)
+            except asyncio.TimeoutError:
+                self.rejected += 1
+                raise Overloaded("Server busy: timed out waiting for a slot") from None
+            finally:
+                self.waiting -= 1
+        else:
+            await self._semaphore.acquire()
+
+        self.in_flight += 1
+        try:
+            yield
+        finally:
+            self.in_flight -= 1
+            self._semaphore.release()
+
+    def stats(self):
+        return {
+            "inFlight": self.in_flight,
+            "waiting": self.waiting,
+            "rejected": self.rejected,
+            "maxInFlight": self.max_in_flight,
+            "maxQueue": self.max_queue,
+        }
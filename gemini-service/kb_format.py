@@ -0,0 +1,114 @@
+"""KB serialization formats for prompt injection.
+
+Every byte of the serialized KB is sent on every request, so the format is
+configurable (`KB_FORMAT`):
+
+    json-pretty  json.dumps(indent=2), the original format
+    json-min     JSON without insignificant whitespace
+    lines        one flattened `path: value` line per leaf
+    bullets      indented bullet outline with duplicate entries removed
+
+`benchmarks/bench_kb_format.py` reports bytes and estimated tokens per format.
+
+gemini-service ships a copy for kb_manager.py, which serializes with
+`serialize_json_pretty` by default; gemini-endpoint/tests/test_shared_modules.py
+checks the copies match.
+"""
+import json
+
+
+def _is_inline_list(value):
+    """Short lists of scalars are rendered on one line ("1, 2, 3")."""
+    return (
+        isinstance(value, list)
+        and all(not isinstance(item, (dict, list)) for item in value)
+        and sum(len(str(item)) for item in value) <= 80
+    )
+
+
+def _scalar(value):
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    if value is None:
+        return "null"
+    return " ".join(str(value).split())
+
+
+def serialize_json_pretty(kb_data):
+    return json.dumps(kb_data, indent=2, ensure_ascii=False)
+
+
+def serialize_json_min(kb_data):
+    return json.dumps(kb_data, separators=(",", ":"), ensure_ascii=False)
+
+
+def _flatten(kb_data, path):
+    if isinstance(kb_data, dict):
+        for key, value in kb_data.items():
+            yield from _flatten(value, f"{path}.{key}" if path else str(key))
+    elif isinstance(kb_data, list):
+        if _is_inline_list(kb_data):
+            yield path, ", ".join(_scalar(item) for item in kb_data)
+        else:
+            for item in kb_data:
+                yield from _flatten(item, path)
+    else:
+        yield path, _scalar(kb_data)
+
+
+def serialize_lines(kb_data):
+    lines = []
+    for path, value in _flatten(kb_data, ""):
+        lines.append(f"{path}: {value}" if path else value)
+    return "\n".join(lines)
+
+
+def _bullets(kb_data, depth, out, seen=None):
+    """Appends outline lines to `out`; `seen` dedupes lines within one container."""
+    indent = "  " * depth
+    seen = set() if seen is None else seen
+
+    def emit(line):
+        if line not in seen:
+            seen.add(line)
+            out.append(line)
+
+    if isinstance(kb_data, dict):
+        for key, value in kb_data.items():
+            if isinstance(value, (dict, list)) and not _is_inline_list(value):
+                emit(f"{indent}{key}:")
+                _bullets(value, depth + 1, out)
+            elif _is_inline_list(value):
+                emit(f"{indent}- {key}: {', '.join(_scalar(item) for item in value)}")
+            else:
+                emit(f"{indent}- {key}: {_scalar(value)}")
+    elif isinstance(kb_data, list):
+        for item in kb_data:
+            if isinstance(item, (dict, list)):
+                _bullets(item, depth, out, seen)  # "- key: value" list entries stay flat
+            else:
+                emit(f"{indent}- {_scalar(item)}")
+    else:
+        emit(f"{indent}- {_scalar(kb_data)}")
+
+
+def serialize_bullets(kb_data):
+    out = []
+    _bullets(kb_data, 0, out)
+    return "\n".join(out)
+
+
+SERIALIZERS = {
+    "json-pretty": serialize_json_pretty,
+    "json-min": serialize_json_min,
+    "lines": serialize_lines,
+    "bullets": serialize_bullets,
+}
+
+
+def get_serializer(name):
+    """Returns the serializer for a KB_FORMAT name."""
+    try:
+        return SERIALIZERS[name]
+    except KeyError:
+        raise ValueError(f"Unknown KB format '{name}'. Use one of: {', '.join(SERIALIZERS)}") from None
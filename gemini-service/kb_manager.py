@@ -0,0 +1,157 @@
+"""Versioned knowledge base loader with change detection and hot reload.
+
+The KB file is fingerprinted by mtime/size and content hash. A daemon thread
+polls the fingerprint and swaps in a freshly parsed snapshot when the content
+changes; readers always get a complete, immutable snapshot. Failed loads keep
+serving the last good snapshot and are retried with exponential backoff
+instead of being cached.
+
+When a compiled artifact (see build_kb.py) sits next to the source and was
+built from the same bytes, its pre-parsed data is used and the source parser
+(PyYAML) is never imported. A stale or missing artifact falls back to parsing
+the source, so editing kb.yaml without rebuilding still works.
+
+gemini-endpoint and gemini-service deploy separately and each ship a copy of
+this module (and of kb_format.py, which it serializes with); edit one and copy
+it to the other. gemini-endpoint/tests/test_shared_modules.py checks they match.
+"""
+import hashlib
+import json
+import os
+import sys
+import threading
+import time
+from collections import namedtuple
+
+from kb_format import serialize_json_pretty
+
+
+# Configuration
+RELOAD_INTERVAL_SECONDS = float(os.environ.get("KB_RELOAD_INTERVAL_SECONDS", 30))
+RETRY_BASE_SECONDS = float(os.environ.get("KB_RETRY_BASE_SECONDS", 1))
+RETRY_MAX_SECONDS = float(os.environ.get("KB_RETRY_MAX_SECONDS", 60))
+
+KBSnapshot = namedtuple("KBSnapshot", ["content", "data", "version", "loaded_at", "index"])
+
+EMPTY_SNAPSHOT = KBSnapshot(content="{}", data={}, version="empty", loaded_at=0.0, index=None)
+
+
+def compiled_path_for(path):
+    """kb.yaml -> kb.compiled.json"""
+    return os.path.splitext(path)[0] + ".compiled.json"
+
+
+def _stat(path):
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return (stat.st_mtime_ns, stat.st_size)
+
+
+class KnowledgeBase:
+    """Holds the current KB snapshot and keeps it in sync with the file on disk."""
+
+    def __init__(self, path, parse, serialize=serialize_json_pretty, build_index=None,
+                 reload_interval=RELOAD_INTERVAL_SECONDS, clock=time.monotonic, compiled_path=None):
+        self.path = path
+        self.parse = parse
+        self.compiled_path = compiled_path
+        self.serialize = serialize
+        self.build_index = build_index
+        self.reload_interval = reload_interval
+        self._clock = clock
+        self._snapshot = None
+        self._fingerprint = None  # (mtime_ns, size) of the source and compiled files
+        self._content_hash = None
+        self._failures = 0
+        self._retry_at = 0.0
+        self._lock = threading.Lock()
+        self._watcher = None
+
+    def snapshot(self):
+        """Returns the current snapshot, loading on first use or after a failed load."""
+        snapshot = self._snapshot
+        if snapshot is None:
+            if self._clock() >= self._retry_at:
+                self.refresh()
+            snapshot = self._snapshot
+            if snapshot is None:
+                return EMPTY_SNAPSHOT
+        self._ensure_watcher()
+        return snapshot
+
+    def refresh(self, force=False):
+        """Reloads the KB if the file changed. Returns True if a new version was installed."""
+        with self._lock:
+            try:
+                source_stat = _stat(self.path)
+                compiled_stat = _stat(self.compiled_path) if self.compiled_path else None
+                if source_stat is None and compiled_stat is None:
+                    raise FileNotFoundError(self.path)
+                fingerprint = (source_stat, compiled_stat)
+                if not force and self._snapshot is not None and fingerprint == self._fingerprint:
+                    return False
+
+                raw = None
+                content_hash = None
+                if source_stat is not None:
+                    with open(self.path, "rb") as f:
+                        raw = f.read()
+                    content_hash = hashlib.sha256(raw).hexdigest()
+                compiled = self._load_compiled(content_hash) if compiled_stat is not None else None
+                if compiled is not None:
+                    content_hash = compiled["sourceHash"]
+                if not force and self._snapshot is not None and content_hash == self._content_hash:
+                    self._fingerprint = fingerprint  # Touched but unchanged
+                    return False
+
+                data = compiled["data"] if compiled is not None else self.parse(raw.decode("utf-8"))
+                content = self.serialize(data)
+                index = self.build_index(data) if self.build_index else None
+            except Exception as e:
+                self._failures += 1
+                delay = min(RETRY_BASE_SECONDS * (2 ** (self._failures - 1)), RETRY_MAX_SECONDS)
+                self._retry_at = self._clock() + delay
+                print(f"Error loading KB (attempt {self._failures}, retry in {delay:g}s): {e}", file=sys.stderr)
+                return False
+
+            self._snapshot = KBSnapshot(
+                content=content,
+                data=data,
+                version=content_hash[:12],
+                loaded_at=time.time(),
+                index=index,
+            )
+            self._fingerprint = fingerprint
+            self._content_hash = content_hash
+            self._failures = 0
+            self._retry_at = 0.0
+            return True
+
+    def _load_compiled(self, source_hash):
+        """Returns the compiled artifact if it matches `source_hash` (or there is no source)."""
+        with open(self.compiled_path, "r", encoding="utf-8") as f:
+            compiled = json.load(f)
+        if source_hash is not None and compiled.get("sourceHash") != source_hash:
+            print(f"Ignoring stale {os.path.basename(self.compiled_path)}; parsing the source", file=sys.stderr)
+            return None
+        return compiled
+
+    def _ensure_watcher(self):
+        if self._watcher is not None or self.reload_interval <= 0:
+            return
+        with self._lock:
+            if self._watcher is None:
+                self._watcher = threading.Thread(target=self._watch, name="kb-reload", daemon=True)
+                self._watcher.start()
+
+    def _watch(self):
+        while True:
+            wait = self.reload_interval
+            if self._failures:
+                wait = max(0.0, min(wait, self._retry_at - self._clock()))
+            time.sleep(wait)
+            if self._clock() >= self._retry_at:
+                if self.refresh():
+                    print(f"KB reloaded: version {self._snapshot.version}", file=sys.stderr)
@@ -2,51 +2,31 @@ import functions_framework
 import json
 import yaml
 import os
-import sys
+import textwrap
+import threading
+
+from compression import (BodyCache, PrefixBody, encode_body, etag_matches, make_etag,
+                         negotiate_encoding, representation_etag)
+from concurrency import Overloaded
+from kb_manager import KnowledgeBase
 
 # Global Cache
-_KB_CONTENT = None
 KB_FILE = "kb.yaml"
+# Resolve absolute path for robustness in Cloud Run
+_KB = KnowledgeBase(os.path.join(os.path.dirname(os.path.abspath(__file__)), KB_FILE), parse=yaml.safe_load)
 
 def load_knowledge_base():
-    """Loads and caches the knowledge base from disk."""
-    global _KB_CONTENT
-    if _KB_CONTENT:
-        return _KB_CONTENT
-    
-    try:
-        # Resolve absolute path for robustness in Cloud Run
-        base_path = os.path.dirname(os.path.abspath(__file__))
-        file_path = os.path.join(base_path, KB_FILE)
-        
-        with open(file_path, 'r', encoding='utf-8') as f:
-            kb_data = yaml.safe_load(f)
-        _KB_CONTENT = json.dumps(kb_data, indent=2, ensure_ascii=False)
-    except Exception as e:
-        print(f"Error loading KB: {e}", file=sys.stderr)
-        _KB_CONTENT = "{}"
-    
-    return _KB_CONTENT
+    """Returns the serialized KB from the current snapshot (see kb_manager.py)."""
+    return _KB.snapshot().content
 
-def build_system_prompt(user_prompt, product_choice, user_data, kb_content):
-    """Constructs the system prompt based on the 3-priority mission architecture."""
-    
-    # Context Serialization (Handle None/Empty)
-    ctx_product = json.dumps(product_choice, ensure_ascii=False) if product_choice else "None"
-    ctx_user = json.dumps(user_data, ensure_ascii=False) if user_data else "{}"
+def kb_version():
+    """Returns the content hash identifying the current KB snapshot."""
+    return _KB.snapshot().version
 
-    return f"""
+_PROMPT_PREFIX = textwrap.dedent("""\
     You are a specialized Window & Door Configurator Agent.
     Your goal is to process the user's request and return a SINGLE JSON object.
 
-    **CONTEXT**
-    - User Prompt: "{user_prompt}"
-    - Current Product: {ctx_product}
-    - User Data: {ctx_user}
-
-    **KNOWLEDGE BASE**
-    {kb_content}
-
     **MISSIONS (IN ORDER OF PRIORITY)**
 
     1. **PRIORITY 1: HUMAN HANDOFF (EXIT)**
@@ -75,45 +55,134 @@ def build_system_prompt(user_prompt, product_choice, user_data, kb_content):
         "payload": {{ ...values... }}
       }}
     }}
+
+    **KNOWLEDGE BASE**
+    {kb_content}
+
+    """)
+
+DEBUG_MESSAGE = "Prompt Built Successfully"
+
+# Static prompt portion for the current KB: (kb_content, prefix, PrefixBody)
+_PREFIX = None
+_PREFIX_LOCK = threading.Lock()
+_BODY_CACHE = BodyCache()
+
+def _prompt_prefix(kb_content):
+    """Returns (prefix, PrefixBody) for `kb_content`, rebuilding them when the KB changes."""
+    global _PREFIX
+    cached = _PREFIX
+    if cached is None or cached[0] != kb_content:
+        with _PREFIX_LOCK:
+            if _PREFIX is None or _PREFIX[0] != kb_content:
+                prefix = _PROMPT_PREFIX.format(kb_content=kb_content)
+                _PREFIX = (kb_content, prefix, PrefixBody(DEBUG_MESSAGE, prefix))
+            cached = _PREFIX
+    return cached[1], cached[2]
+
+def render_context(user_prompt, product_choice, user_data):
+    """Renders the per-request part of the prompt, which follows the static prefix."""
+    # Context Serialization (Handle None/Empty)
+    ctx_product = json.dumps(product_choice, ensure_ascii=False) if product_choice else "None"
+    ctx_user = json.dumps(user_data, ensure_ascii=False) if user_data else "{}"
+    return (
+        "**CONTEXT**\n"
+        f'- User Prompt: "{user_prompt}"\n'
+        f"- Current Product: {ctx_product}\n"
+        f"- User Data: {ctx_user}\n"
+    )
+
+def build_system_prompt(user_prompt, product_choice, user_data, kb_content):
+    """Constructs the system prompt based on the 3-priority mission architecture.
+
+    The missions, schema and KB form a prefix that only changes with the KB;
+    the request context comes last.
     """
+    prefix, _ = _prompt_prefix(kb_content)
+    return prefix + render_context(user_prompt, product_choice, user_data)
+
+def _json_arg(args, name):
+    """A JSON-encoded query parameter (GET requests), or None."""
+    try:
+        return json.loads(args[name]) if args.get(name) else None
+    except ValueError:
+        return None
 
 @functions_framework.http
 def gemini_chat(request):
     """
     Mental model:
-    input: request object
+    input: request object (POST JSON body, or GET with prompt/productChoice/userData query parameters)
     output: tuple (body, status_code, headers)
+
+    The body is gzip or brotli encoded per Accept-Encoding. Its strong ETag
+    covers the KB version and the request context, so a GET carrying a
+    matching If-None-Match gets a 304 without the prompt being rebuilt.
     """
     
     # Enable CORS for local testing/frontend integration
     headers = {
         'Access-Control-Allow-Origin': '*',
-        'Content-Type': 'application/json'
+        'Access-Control-Expose-Headers': 'ETag',
+        'Content-Type': 'application/json',
+        'Vary': 'Accept-Encoding'
     }
 
     # Handle OPTIONS for CORS preflight
     if request.method == 'OPTIONS':
-        headers['Access-Control-Allow-Methods'] = 'POST'
-        headers['Access-Control-Allow-Headers'] = 'Content-Type'
+        headers['Access-Control-Allow-Methods'] = 'GET, POST'
+        headers['Access-Control-Allow-Headers'] = 'Content-Type, If-None-Match'
         return ('', 204, headers)
 
     # 1. Input Parsing
-    req_json = request.get_json(silent=True) or {}
-    user_prompt = req_json.get("prompt", "")
-    
+    if request.method in ('GET', 'HEAD'):
+        args = getattr(request, 'args', None) or {}
+        user_prompt = args.get("prompt", "")
+        product_choice = _json_arg(args, "productChoice")
+        user_data = _json_arg(args, "userData")
+    else:
+        req_json = request.get_json(silent=True) or {}
+        user_prompt = req_json.get("prompt", "")
+        product_choice = req_json.get("productChoice")
+        user_data = req_json.get("userData")
+
     # 2. Load KB
-    kb_content = load_knowledge_base()
-    
-    # 3. Build Prompt (Mock Logic)
-    system_prompt = build_system_prompt(
-        user_prompt,
-        req_json.get("productChoice"),
-        req_json.get("userData"),
-        kb_content
-    )
-    
-    # Return PROMPT for verification (Checkpoint 2.2)
-    return (json.dumps({
-        "message": "Prompt Built Successfully", 
-        "debug_prompt": system_prompt
-    }), 200, headers)
+    kb = _KB.snapshot()
+
+    # 3. Conditional GET
+    request_headers = getattr(request, 'headers', None) or {}
+    etag = make_etag(kb.version, user_prompt, product_choice, user_data)
+    encoding = negotiate_encoding(request_headers.get('Accept-Encoding'))  # The KB alone is worth compressing
+    headers['ETag'] = representation_etag(etag, encoding)
+    headers['Cache-Control'] = 'no-cache'  # Revalidate every time; unchanged prompts cost a 304
+    if request.method in ('GET', 'HEAD') and etag_matches(request_headers.get('If-None-Match'), etag):
+        return ('', 304, headers)
+
+    # 4. Build Prompt (Mock Logic), return it for verification (Checkpoint 2.2)
+    _, prefix_body = _prompt_prefix(kb.content)
+    suffix = render_context(user_prompt, product_choice, user_data)
+    body = encode_body(prefix_body, suffix, encoding, etag, _BODY_CACHE)
+    if encoding:
+        headers['Content-Encoding'] = encoding
+    return (body, 200, headers)
+
+
+async def gemini_chat_async(request, limiter):
+    """Async entry point (see asgi.py); same contract as `gemini_chat`.
+
+    Prompt building is CPU-only, so the handler runs inline while holding a
+    limiter slot; requests beyond the queue limits get a 429.
+    """
+    try:
+        async with limiter.slot():
+            return gemini_chat(request)
+    except Overloaded as e:
+        headers = {
+            'Access-Control-Allow-Origin': '*',
+            'Content-Type': 'application/json',
+            'Retry-After': str(e.retry_after)
+        }
+        return (json.dumps({"status": "error", "message": str(e)}), 429, headers)
+
+
+ASYNC_HANDLER = gemini_chat_async  # What asgi.py serves
@@ -0,0 +1,2 @@
+// Codebase Map chunk (auto-generated by update_map.py, DO NOT EDIT MANUALLY)
+export const ELEMENTS=[{"name":"APP_INFO","file":"scripts/app.js","type":"constant","signature":"N/A","description":"Variable used to confirm update and mapping in codebase.","categories":["APP"],"dependencies":[],"sideEffects":false},{"name":"TEST_UPDATE_VARIABLE","file":"scripts/app.js","type":"constant","signature":"N/A","description":"Variable used to confirm update and mapping in codebase.","categories":["APP"],"dependencies":[],"sideEffects":false},{"name":"handleBreadcrumbClick","file":"scripts/app.js","type":"function","signature":"(facet, index) => void","description":"Resets selections to a specific point when a breadcrumb is clicked.","categories":["APP"],"dependencies":["FACET_ORDER","logger"],"sideEffects":false},{"name":"handleRestart","file":"scripts/app.js","type":"function","signature":"() => void","description":"Resets the application state to initial defaults.","categories":["APP"],"dependencies":["logger"],"sideEffects":false},{"name":"handleSelection","file":"scripts/app.js","type":"function","signature":"(facet, value) => void","description":"Updates state based on user selection and triggers UI refresh.","categories":["APP"],"dependencies":["calculateNextSelections","logger"],"sideEffects":false},{"name":"init","file":"scripts/app.js","type":"function","signature":"() => void","description":"Initializes the application, session, and event listeners.","categories":["APP"],"dependencies":["initEventListeners","logger","session"],"sideEffects":false},{"name":"updateUI","file":"scripts/app.js","type":"function","signature":"() => void","description":"Calculates logic state and updates the UI view.","categories":["APP"],"dependencies":["runFacetLoop","session","updateView"],"sideEffects":false}];
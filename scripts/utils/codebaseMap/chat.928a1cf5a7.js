@@ -0,0 +1,2 @@
+// Codebase Map chunk (auto-generated by update_map.py, DO NOT EDIT MANUALLY)
+export const ELEMENTS=[{"name":"addChatMessage","file":"scripts/ui/chat.js","type":"function","signature":"(text, type, icon = 'fa-comment') => void","description":"Appends a message bubble to the chat history. \\n// Supports multiple types: 'text', 'product-chips', 'product-image', and 'button'. \\n// Handles HTML rendering and styling based on message type.","categories":["CHAT","UI"],"dependencies":["chatMessagesEl","logger"],"sideEffects":false},{"name":"handleUserMessage","file":"scripts/ui/chat.js","type":"function","signature":"() => void","description":"Processes text input from the user. \\n// Handles special simulation commands (e.g., /sim-contact). \\n// Logs messages to storage and triggers a simulated bot response (placeholder).","categories":["CHAT","UI"],"dependencies":["chatInput","session"],"sideEffects":false},{"name":"initChatListeners","file":"scripts/ui/chat.js","type":"function","signature":"() => void","description":"Initializes event listeners for the chat input field and send button. \\n// Enables input interactions and binds Enter key press.","categories":["CHAT","UI"],"dependencies":["chatInput","chatSendBtn"],"sideEffects":false},{"name":"renderChat","file":"scripts/ui/chat.js","type":"function","signature":"(selections, engineResult) => void","description":"Rebuilds the chat interface based on the entire conversation state. \\n// 1. Renders initial greeting. \\n// 2. Replays Q&A pairs from facet selections. \\n// 3. Displays the final result (chips, image, buttons) or the next pending question.","categories":["CHAT","UI"],"dependencies":["FACET_DEFINITIONS","FACET_ORDER","chatMessagesEl"],"sideEffects":false}];
@@ -0,0 +1,2 @@
+// Codebase Map chunk (auto-generated by update_map.py, DO NOT EDIT MANUALLY)
+export const ELEMENTS=[{"name":"CONSTANTS_INFO","file":"scripts/constants.js","type":"constant","signature":"N/A","description":"Object containing definitions for each facet, including labels and icons.","categories":["CONSTANTS"],"dependencies":[],"sideEffects":false},{"name":"FACET_DEFINITIONS","file":"scripts/constants.js","type":"constant","signature":"N/A","description":"Object containing definitions for each facet, including labels and icons.","categories":["CONSTANTS"],"dependencies":[],"sideEffects":false},{"name":"FACET_ORDER","file":"scripts/constants.js","type":"constant","signature":"N/A","description":"Object containing definitions for each facet, including labels and icons.","categories":["CONSTANTS"],"dependencies":[],"sideEffects":false},{"name":"FIELD_MAP","file":"scripts/constants.js","type":"constant","signature":"N/A","description":"Object mapping UI facet names to product catalog field names.","categories":["CONSTANTS"],"dependencies":[],"sideEffects":false}];
@@ -0,0 +1,2 @@
+// Codebase Map chunk (auto-generated by update_map.py, DO NOT EDIT MANUALLY)
+export const ELEMENTS=[{"name":"BASE_PRODUCT_URL","file":"scripts/productCatalog.js","type":"constant","signature":"N/A","description":"The master database of all available products. \\n// A flat array of objects, each representing a valid combination of attributes (slug, image, system, material, etc.).","categories":["DATA"],"dependencies":[],"sideEffects":false},{"name":"PRODUCT_CATALOG","file":"scripts/productCatalog.js","type":"constant","signature":"N/A","description":"The master database of all available products. \\n// A flat array of objects, each representing a valid combination of attributes (slug, image, system, material, etc.).","categories":["DATA"],"dependencies":[],"sideEffects":false}];
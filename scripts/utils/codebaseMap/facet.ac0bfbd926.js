@@ -0,0 +1,2 @@
+// Codebase Map chunk (auto-generated by update_map.py, DO NOT EDIT MANUALLY)
+export const ELEMENTS=[{"name":"applyFilters","file":"scripts/logic.js","type":"function","signature":"(selections, catalog) => void","description":"Filters the product catalog based on current user selections. \\n// It iterates through facets, skipping undefined selections and handling conditional logic (like motorizada dependency). \\n// Uses loose equality to match mixed string/number types.","categories":["FACET","LOGIC"],"dependencies":["FACET_ORDER","logger"],"sideEffects":false},{"name":"calculateNextSelections","file":"scripts/logic.js","type":"function","signature":"(current, facet, value) => void","description":"Calculates the next state of selections. \\n// It handles cascading resets (clearing downstream selections when an upstream one changes) \\n// and implements specific business logic dependencies (e.g., if 'persiana' != 'sim', 'motorizada' is null).","categories":["FACET","LOGIC"],"dependencies":["FACET_ORDER","logger"],"sideEffects":false},{"name":"getProductField","file":"scripts/logic.js","type":"function","signature":"(product, uiFacet) => void","description":"Calculates the next state of selections. \\n// It handles cascading resets (clearing downstream selections when an upstream one changes) \\n// and implements specific business logic dependencies (e.g., if 'persiana' != 'sim', 'motorizada' is null).","categories":["FACET","LOGIC"],"dependencies":[],"sideEffects":false},{"name":"getUniqueOptions","file":"scripts/logic.js","type":"function","signature":"(attribute, products) => void","description":"Extracts unique, valid options for a specific attribute from the filtered product list. \\n// Handles numerical sorting for 'folhas' and alphabetical for others.","categories":["FACET","LOGIC"],"dependencies":[],"sideEffects":false},{"name":"runFacetLoop","file":"scripts/logic.js","type":"function","signature":"(selections) => void","description":"The core decision engine. \\n// Iterates through facets in order to find the next unresolved question. \\n// Handles auto-selection (single option), deadlocks (0 options), and termination (valid product found).","categories":["FACET","LOGIC"],"dependencies":["FACET_DEFINITIONS","FACET_ORDER","PRODUCT_CATALOG","logger"],"sideEffects":false}];
@@ -0,0 +1,39 @@
+/**
+ * Codebase Map index (Auto-generated)
+ * Generated by update_map.py
+ * DO NOT EDIT MANUALLY
+ */
+export const CHUNKS = {"APP":"./app.0f049e5ecf.js","CHAT":"./chat.928a1cf5a7.js","CONSTANTS":"./constants.909eeb55bb.js","DATA":"./data.927994722c.js","FACET":"./facet.ac0bfbd926.js","UI":"./ui.781753e1c9.js","UTILS":"./utils.5f7e70ada7.js","Uncategorized":"./uncategorized.c9b811fa44.js"};
+export const CATEGORY_OF = {"APP_INFO":"APP","TEST_UPDATE_VARIABLE":"APP","handleBreadcrumbClick":"APP","handleRestart":"APP","handleSelection":"APP","init":"APP","updateUI":"APP","GEMINI_ENDPOINT_URL":"Uncategorized","firebaseConfig":"Uncategorized","CONSTANTS_INFO":"CONSTANTS","FACET_DEFINITIONS":"CONSTANTS","FACET_ORDER":"CONSTANTS","FIELD_MAP":"CONSTANTS","session":"Uncategorized","applyFilters":"FACET","calculateNextSelections":"FACET","getProductField":"FACET","getUniqueOptions":"FACET","runFacetLoop":"FACET","BASE_PRODUCT_URL":"DATA","PRODUCT_CATALOG":"DATA","addChatMessage":"CHAT","handleUserMessage":"CHAT","initChatListeners":"CHAT","renderChat":"CHAT","createOptionCard":"UI","createProductCard":"UI","getIconForValue":"UI","breadcrumbEl":"UI","chatInput":"UI","chatMessagesEl":"UI","chatSendBtn":"UI","chatSidebar":"UI","gridEl":"UI","productResultsEl":"UI","restartBtn":"UI","resultAreaEl":"UI","tabChat":"UI","tabWizard":"UI","titleEl":"UI","wizardColumn":"UI","UI_INFO":"UI","renderBreadcrumbs":"UI","switchTab":"UI","initEventListeners":"UI","updateView":"UI","logger":"UTILS"};
+
+const loaded = new Map();
+const pending = new Map();
+
+// Imports one category's chunk (once); resolves to its elements.
+export function loadCategory(category) {
+    if (!(category in CHUNKS)) return Promise.resolve([]);
+    if (!pending.has(category)) {
+        pending.set(category, import(CHUNKS[category]).then(m => {
+            loaded.set(category, m.ELEMENTS);
+            return m.ELEMENTS;
+        }));
+    }
+    return pending.get(category);
+}
+
+// Returns the element if its chunk is already loaded, otherwise starts loading it and returns undefined.
+export function getElement(name) {
+    const category = CATEGORY_OF[name];
+    if (category === undefined) return undefined;
+    if (!loaded.has(category)) {
+        loadCategory(category);
+        return undefined;
+    }
+    return loaded.get(category).find(e => e.name === name);
+}
+
+export function findElement(name) {
+    const category = CATEGORY_OF[name];
+    if (category === undefined) return Promise.resolve(undefined);
+    return loadCategory(category).then(elements => elements.find(e => e.name === name));
+}
@@ -0,0 +1,2 @@
+// Codebase Map chunk (auto-generated by update_map.py, DO NOT EDIT MANUALLY)
+export const ELEMENTS=[{"name":"createOptionCard","file":"scripts/ui/components.js","type":"function","signature":"(facet, value, onSelect, selections = {}) => void","description":"Creates a DOM card element for a facet option with image and click handling.","categories":["UI"],"dependencies":["FACET_DEFINITIONS","PRODUCT_CATALOG","applyFilters"],"sideEffects":false},{"name":"createProductCard","file":"scripts/ui/components.js","type":"function","signature":"(product) => void","description":"Creates a DOM card element displaying product details with actions.","categories":["UI"],"dependencies":["BASE_PRODUCT_URL","FACET_DEFINITIONS","FACET_ORDER","FIELD_MAP"],"sideEffects":false},{"name":"getIconForValue","file":"scripts/ui/components.js","type":"function","signature":"(facet, value) => void","description":"Gets the icon for a facet value.","categories":["UI"],"dependencies":["FACET_DEFINITIONS"],"sideEffects":false},{"name":"breadcrumbEl","file":"scripts/ui/elements.js","type":"constant","signature":"N/A","description":"DOM element for the product results container.","categories":["UI"],"dependencies":[],"sideEffects":false},{"name":"chatInput","file":"scripts/ui/elements.js","type":"constant","signature":"N/A","description":"DOM element for the chat send button.","categories":["UI"],"dependencies":[],"sideEffects":false},{"name":"chatMessagesEl","file":"scripts/ui/elements.js","type":"constant","signature":"N/A","description":"DOM element for the wizard tab button.","categories":["UI"],"dependencies":[],"sideEffects":false},{"name":"chatSendBtn","file":"scripts/ui/elements.js","type":"constant","signature":"N/A","description":"DOM element for the chat send button.","categories":["UI"],"dependencies":[],"sideEffects":false},{"name":"chatSidebar","file":"scripts/ui/elements.js","type":"constant","signature":"N/A","description":"DOM element for the chat input field.","categories":["UI"],"dependencies":[],"sideEffects":false},{"name":"gridEl","file":"scripts/ui/elements.js","type":"constant","signature":"N/A","description":"DOM element for the results display area.","categories":["UI"],"dependencies":[],"sideEffects":false},{"name":"productResultsEl","file":"scripts/ui/elements.js","type":"constant","signature":"N/A","description":"DOM element for the chat messages container.","categories":["UI"],"dependencies":[],"sideEffects":false},{"name":"restartBtn","file":"scripts/ui/elements.js","type":"constant","signature":"N/A","description":"DOM element for the chat messages container.","categories":["UI"],"dependencies":[],"sideEffects":false},{"name":"resultAreaEl","file":"scripts/ui/elements.js","type":"constant","signature":"N/A","description":"DOM element for the restart button.","categories":["UI"],"dependencies":[],"sideEffects":false},{"name":"tabChat","file":"scripts/ui/elements.js","type":"constant","signature":"N/A","description":"DOM element for the chat sidebar container.","categories":["UI"],"dependencies":[],"sideEffects":false},{"name":"tabWizard","file":"scripts/ui/elements.js","type":"constant","signature":"N/A","description":"DOM element for the wizard column container.","categories":["UI"],"dependencies":[],"sideEffects":false},{"name":"titleEl","file":"scripts/ui/elements.js","type":"constant","signature":"N/A","description":"DOM element for the breadcrumb navigation.","categories":["UI"],"dependencies":[],"sideEffects":false},{"name":"wizardColumn","file":"scripts/ui/elements.js","type":"constant","signature":"N/A","description":"DOM element for the chat sidebar container.","categories":["UI"],"dependencies":[],"sideEffects":false},{"name":"UI_INFO","file":"scripts/ui/index.js","type":"constant","signature":"N/A","description":"Metadata object for the UI module.","categories":["UI"],"dependencies":[],"sideEffects":false},{"name":"renderBreadcrumbs","file":"scripts/ui/navigation.js","type":"function","signature":"(selections, onReset) => void","description":"Renders breadcrumb navigation from current selections.","categories":["UI"],"dependencies":["FACET_DEFINITIONS","FACET_ORDER","breadcrumbEl"],"sideEffects":false},{"name":"switchTab","file":"scripts/ui/navigation.js","type":"function","signature":"(tab) => void","description":"Switches between wizard and chat tabs in mobile view.","categories":["UI"],"dependencies":["chatSidebar","tabChat","tabWizard","wizardColumn"],"sideEffects":false},{"name":"initEventListeners","file":"scripts/ui/renderer.js","type":"function","signature":"(callbacks) => void","description":"Initializes all event listeners for UI interactions.","categories":["UI"],"dependencies":["restartBtn","switchTab","tabChat","tabWizard"],"sideEffects":false},{"name":"updateView","file":"scripts/ui/renderer.js","type":"function","signature":"(selections, engineResult, callbacks) => void","description":"Updates the entire view based on selections and engine results.","categories":["UI"],"dependencies":["createOptionCard","createProductCard","gridEl","productResultsEl","renderBreadcrumbs","renderChat","resultAreaEl","titleEl"],"sideEffects":false}];
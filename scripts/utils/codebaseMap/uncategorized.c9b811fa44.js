@@ -0,0 +1,2 @@
+// Codebase Map chunk (auto-generated by update_map.py, DO NOT EDIT MANUALLY)
+export const ELEMENTS=[{"name":"GEMINI_ENDPOINT_URL","file":"scripts/config.js","type":"constant","signature":"N/A","description":"URL for the Gemini Cloud Function endpoint.","categories":["Uncategorized"],"dependencies":[],"sideEffects":false},{"name":"firebaseConfig","file":"scripts/config.js","type":"constant","signature":"N/A","description":"Configuration details for Firebase services.","categories":["Uncategorized"],"dependencies":[],"sideEffects":false},{"name":"session","file":"scripts/data/session.js","type":"constant","signature":"N/A","description":"Singleton object for managing user session and remote persistence.","categories":["Uncategorized"],"dependencies":[],"sideEffects":false}];
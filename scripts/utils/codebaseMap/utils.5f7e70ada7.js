@@ -0,0 +1,2 @@
+// Codebase Map chunk (auto-generated by update_map.py, DO NOT EDIT MANUALLY)
+export const ELEMENTS=[{"name":"logger","file":"scripts/utils/logger.js","type":"constant","signature":"N/A","description":"Structured console logger providing grouped, labeled, and styled console logs with caller identification","categories":["UTILS"],"dependencies":[],"sideEffects":false}];
@@ -3,7 +3,8 @@
  * Provides grouped, labeled, and styled console logs with caller identification.
  */
 
-import { CODEBASE_MAP } from '../../code_control/codebaseMap.js';
+// Only the small index loads with the page; element details come from per-category chunks on demand
+import { CATEGORY_OF, getElement } from './codebaseMap/index.js';
 
 const STYLES = {
     'APP': 'background: #007bff; color: white; padding: 2px 5px; border-radius: 3px; font-weight: bold;',
@@ -98,13 +99,27 @@ class Logger {
     }
 
     /**
-     * Get details from codebase map
+     * Remove prefixes like "Object." or "Proxy." or "Logger."
+     * @param {string} callerName 
+     */
+    _cleanName(callerName) {
+        return callerName.replace(/^(Object\.|Proxy\.|Logger\.)/, '');
+    }
+
+    /**
+     * Get the auto-label (first category) from the codebase map index
+     * @param {string} callerName 
+     */
+    _getCallerLabel(callerName) {
+        return CATEGORY_OF[this._cleanName(callerName)] || 'DEFAULT';
+    }
+
+    /**
+     * Get details from codebase map (undefined until the caller's chunk has loaded)
      * @param {string} callerName 
      */
     _getCallerInfo(callerName) {
-        // Remove prefixes like "Object." or "Proxy." or "Logger."
-        const cleanName = callerName.replace(/^(Object\.|Proxy\.|Logger\.)/, '');
-        return CODEBASE_MAP.elements.find(e => e.name === cleanName);
+        return getElement(this._cleanName(callerName));
     }
 
     /**
@@ -171,8 +186,7 @@ class Logger {
             data = arg3;
         } else {
             // Auto-label mode
-            const info = this._getCallerInfo(caller);
-            label = (info && info.categories && info.categories.length > 0) ? info.categories[0] : 'DEFAULT';
+            label = this._getCallerLabel(caller);
             message = arg1;
             data = arg2;
         }
@@ -205,8 +219,7 @@ class Logger {
             label = arg1;
             title = arg2;
         } else {
-            const info = this._getCallerInfo(caller);
-            label = (info && info.categories && info.categories.length > 0) ? info.categories[0] : 'DEFAULT';
+            label = this._getCallerLabel(caller);
             title = arg1;
         }
 
@@ -250,8 +263,7 @@ class Logger {
             oldValue = arg3;
             newValue = arg4;
         } else {
-            const info = this._getCallerInfo(caller);
-            label = (info && info.categories && info.categories.length > 0) ? info.categories[0] : 'DEFAULT';
+            label = this._getCallerLabel(caller);
             variableName = arg1;
             oldValue = arg2;
             newValue = arg3;
@@ -286,8 +298,7 @@ class Logger {
             data = arg3;
         } else {
             const caller = this._getCaller();
-            const info = this._getCallerInfo(caller);
-            label = (info && info.categories && info.categories.length > 0) ? info.categories[0] : 'DEFAULT';
+            label = this._getCallerLabel(caller);
             message = arg1;
             data = arg2;
         }
@@ -320,8 +331,7 @@ class Logger {
             data = arg3;
         } else {
             const caller = this._getCaller();
-            const info = this._getCallerInfo(caller);
-            label = (info && info.categories && info.categories.length > 0) ? info.categories[0] : 'DEFAULT';
+            label = this._getCallerLabel(caller);
             message = arg1;
             data = arg2;
         }